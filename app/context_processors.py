@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.db.models import CharField, Count, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils.functional import SimpleLazyObject
+
+from app.models import Inventory, Order, Product, PurchaseOrder
+from app.modules.approval_module import QUEUE_SOURCES
+from app.modules.cache_module import cached
+
+# products with less orderable stock than this (summed over vendors) are "low"
+LOW_STOCK_THRESHOLD = getattr(settings, "KMDV_LOW_STOCK_THRESHOLD", 10)
+# purchase orders raised but not yet delivered or rejected
+OPEN_PO_STATUSES = ("PO_RAISED", "PO_APPROVED", "PO_SHIPPED")
+
+# writes to any of these bump the cached badges: approvals and POs save
+# through the model (or bump explicitly on bulk updates), stock moves touch
+# Inventory, and new products start out low on stock
+BADGE_MODELS = (PurchaseOrder, Inventory, Order, Product)
+
+
+def _count(label, qs):
+    """``(label, rows)`` for ``qs`` – a single ungrouped COUNT."""
+    return (
+        qs.order_by()
+        .annotate(label=Value(label, output_field=CharField()))
+        .values("label")
+        .annotate(n=Count("pk"))
+        .values_list("label", "n")
+    )
+
+
+def _badge_counts():
+    """Every badge in one UNION ALL round trip."""
+    low_stock = (
+        Product.objects.annotate(stock=Coalesce(Sum("stockbalance__quantity"), 0))
+        .filter(stock__lt=LOW_STOCK_THRESHOLD)
+        .values("pk")
+    )
+    counts = [
+        *(
+            _count(kind, Model.objects.filter(approval_status="PENDING"))
+            for kind, (Model, _, _) in QUEUE_SOURCES.items()
+        ),
+        _count("low_stock", Product.objects.filter(pk__in=low_stock)),
+        _count(
+            "open_pos",
+            PurchaseOrder.objects.filter(status__in=OPEN_PO_STATUSES).exclude(
+                approval_status="CANCELLED"
+            ),
+        ),
+    ]
+    found = dict(counts[0].union(*counts[1:], all=True))
+    return {
+        "pending_approvals": sum(found.get(kind, 0) for kind in QUEUE_SOURCES),
+        "low_stock": found.get("low_stock", 0),
+        "open_pos": found.get("open_pos", 0),
+    }
+
+
+def nav_badges(request):
+    """Counts for the navigation badges in ``base.html``.
+
+    Served from the aggregate cache, so a page render costs no queries until
+    an approval, stock or purchase write invalidates it. Lazy, so templates
+    that never show the badges (print views, partials) skip even the cache.
+    """
+    if not request.user.is_authenticated:
+        return {}
+    return {
+        "nav_badges": SimpleLazyObject(
+            lambda: cached(
+                "nav_badges", BADGE_MODELS, _badge_counts, params=LOW_STOCK_THRESHOLD
+            )
+        )
+    }
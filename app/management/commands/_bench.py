@@ -0,0 +1,106 @@
+"""Helpers shared by the benchmark commands (not a command itself)."""
+import os
+import random
+import statistics
+import tempfile
+from contextlib import contextmanager
+
+from django.contrib.auth.models import User
+from django.db import connection
+
+from app.models import Category, Inventory, Order, Product, PurchaseOrder, Vendor
+
+BATCH = 5000
+
+
+@contextmanager
+def scratch_database(path=None):
+    """Run against a throw-away SQLite file, never the configured database."""
+    cleanup = path is None
+    if path is None:
+        fd, path = tempfile.mkstemp(prefix="kmdv-bench-", suffix=".sqlite3")
+        os.close(fd)
+    connection.settings_dict.setdefault("TEST", {})["NAME"] = str(path)
+    old_name = connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False
+    )
+    try:
+        yield path
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        if cleanup and os.path.exists(path):
+            os.remove(path)
+
+
+def seed(
+    *, products, vendors, inventory, orders, purchases, stock=(50, 500), user=None, rng=None
+):
+    """Bulk insert a synthetic data set; returns the user that owns the orders."""
+    rng = rng or random.Random(42)
+    if user is None:
+        user, _ = User.objects.get_or_create(username="bench")
+    category = Category.objects.create(name="Bench")
+
+    Product.objects.bulk_create(
+        Product(
+            product_id=f"BP{i:06d}",
+            name=f"Bench product {i}",
+            category=category,
+            price=rng.randint(100, 50000) / 100,
+        )
+        for i in range(products)
+    )
+    Vendor.objects.bulk_create(
+        Vendor(vendor_id=f"BV{i:06d}", name=f"Bench vendor {i}", address="-")
+        for i in range(vendors)
+    )
+    prices = dict(Product.objects.values_list("id", "price"))
+    product_ids = list(prices)
+    vendor_ids = list(Vendor.objects.values_list("id", flat=True))
+
+    def pair():
+        return rng.choice(product_ids), rng.choice(vendor_ids)
+
+    def batched(model, total, build):
+        for start in range(0, total, BATCH):
+            model.objects.bulk_create(
+                build() for _ in range(min(BATCH, total - start))
+            )
+
+    def inventory_row():
+        p, v = pair()
+        qty = rng.randint(*stock)
+        return Inventory(
+            product_id=p, vendor_id=v, stock_quantity=qty, inward_qty=qty, unit_cost=prices[p]
+        )
+
+    def order_row():
+        p, v = pair()
+        return Order(user=user, product_id=p, vendor_id=v, quantity=rng.randint(1, 20))
+
+    def purchase_row():
+        p, v = pair()
+        return PurchaseOrder(product_id=p, vendor_id=v, quantity=rng.randint(1, 200))
+
+    batched(Inventory, inventory, inventory_row)
+    batched(Order, orders, order_row)
+    batched(PurchaseOrder, purchases, purchase_row)
+    return user
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def describe(samples):
+    """min / median / p95 / mean in milliseconds."""
+    ms = [s * 1000 for s in samples]
+    return (
+        f"min {min(ms):8.1f} ms  median {statistics.median(ms):8.1f} ms  "
+        f"p95 {percentile(ms, 95):8.1f} ms  mean {statistics.fmean(ms):8.1f} ms"
+    )
@@ -0,0 +1,297 @@
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Max, Sum
+from django.test import Client
+from django.test.utils import setup_test_environment
+
+from app.models import Inventory, Order, OrderAllocation, Product, StockBalance, Vendor
+from app.modules.search_module import rebuild_index
+from app.modules.snapshot_module import rebuild_snapshot
+from app.modules.stock_module import rebuild_balances
+
+from ._bench import percentile, scratch_database, seed
+
+
+class LockTimer:
+    """``execute_wrapper`` that books every statement slower than
+    ``threshold`` seconds as a lock wait – on an idle scratch database the
+    hot-path statements take well under a millisecond, so anything slower
+    was queued behind another transaction."""
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.waits = []
+        self._guard = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            if elapsed >= self.threshold:
+                with self._guard:
+                    self.waits.append(elapsed)
+
+
+def outcome(response):
+    """placed / insufficient / error:<reason> for one add_order response."""
+    if response.status_code != 302:
+        exc_info = getattr(response, "exc_info", None)
+        if exc_info:
+            return f"http {response.status_code}: {exc_info[0].__name__}: {str(exc_info[1])[:60]}"
+        return f"http {response.status_code}"
+    if response.url.rstrip("/").endswith("/orders"):
+        return "placed"
+    texts = [str(m) for m in get_messages(response.wsgi_request)]
+    if any(text.startswith("Insufficient stock") for text in texts):
+        return "insufficient"
+    return "error: " + ("; ".join(texts)[:80] or "no message")
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a scratch database and fire concurrent add_order requests (threads, "
+        "one test client each) at a few hot product/vendor pairs. Reports throughput, "
+        "latency percentiles, lock waits and any stock oversell."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=400)
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--hot-pairs", type=int, default=4, help="Pairs all orders aim at.")
+        parser.add_argument("--lots", type=int, default=10, help="Inventory lots per hot pair.")
+        parser.add_argument("--lot-stock", type=int, default=20, help="Units per hot lot.")
+        parser.add_argument("--max-qty", type=int, default=5, help="Order quantity is 1..max.")
+        parser.add_argument("--products", type=int, default=200)
+        parser.add_argument("--vendors", type=int, default=20)
+        parser.add_argument("--inventory", type=int, default=5000)
+        parser.add_argument("--orders", type=int, default=5000)
+        parser.add_argument(
+            "--lock-threshold-ms",
+            type=float,
+            default=20.0,
+            help="Statements slower than this count as lock waits.",
+        )
+        parser.add_argument(
+            "--sqlite-transaction-mode",
+            choices=("DEFERRED", "IMMEDIATE", "EXCLUSIVE"),
+            help="Begin SQLite transactions in this mode (default: the configured mode).",
+        )
+        parser.add_argument(
+            "--database",
+            help="SQLite file to seed (default: a temporary file, removed afterwards)",
+        )
+
+    def handle(self, *args, **opts):
+        if opts["sqlite_transaction_mode"]:
+            if connection.vendor != "sqlite":
+                raise CommandError("--sqlite-transaction-mode only applies to SQLite.")
+            connection.settings_dict.setdefault("OPTIONS", {})["transaction_mode"] = opts[
+                "sqlite_transaction_mode"
+            ]
+        setup_test_environment()
+        # the scratch database answers to the test client's host name
+        settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, "testserver"]
+
+        with scratch_database(opts["database"]) as path:
+            self.stdout.write(f"Seeding {path} ...")
+            user, hot = self.prepare(opts)
+            report = self.run(user, hot, opts)
+        self.print_report(report, opts)
+        if report["anomalies"]:
+            raise CommandError(f"{len(report['anomalies'])} stock anomal(y/ies) found.")
+
+    # ------------------------------------------------------------------
+    # setup
+    # ------------------------------------------------------------------
+    def prepare(self, opts):
+        user = seed(
+            products=opts["products"],
+            vendors=opts["vendors"],
+            inventory=opts["inventory"],
+            orders=opts["orders"],
+            purchases=0,
+        )
+        user.is_superuser = user.is_staff = True
+        user.save()
+
+        products = list(Product.objects.order_by("id").values_list("id", "price")[: opts["hot_pairs"]])
+        vendors = list(Vendor.objects.order_by("id").values_list("id", flat=True)[: opts["hot_pairs"]])
+        hot = [(product_id, vendor_id) for (product_id, _), vendor_id in zip(products, vendors)]
+        prices = dict(products)
+        Inventory.objects.bulk_create(
+            Inventory(
+                product_id=product_id,
+                vendor_id=vendor_id,
+                stock_quantity=opts["lot_stock"],
+                inward_qty=opts["lot_stock"],
+                unit_cost=prices[product_id],
+            )
+            for product_id, vendor_id in hot
+            for _ in range(opts["lots"])
+        )
+        # bulk loads skip the signals that keep these current
+        rebuild_balances()
+        rebuild_index()
+        rebuild_snapshot()
+        return user, hot
+
+    # ------------------------------------------------------------------
+    # load
+    # ------------------------------------------------------------------
+    def run(self, user, hot, opts):
+        rng = random.Random(7)
+        jobs = [
+            (*rng.choice(hot), rng.randint(1, opts["max_qty"])) for _ in range(opts["requests"])
+        ]
+        before = self.stock(hot)
+        last_order = Order.objects.aggregate(last=Max("id"))["last"] or 0
+
+        clients = Queue()
+        for _ in range(opts["threads"]):
+            # server errors are results to count, not reasons to stop
+            client = Client(raise_request_exception=False)
+            client.force_login(user)
+            clients.put(client)
+        connection.close()  # every worker opens its own connection
+
+        timer = LockTimer(opts["lock_threshold_ms"] / 1000)
+        results = []
+        results_guard = threading.Lock()
+
+        def place(job):
+            product_id, vendor_id, qty = job
+            client = clients.get()
+            try:
+                with connection.execute_wrapper(timer):
+                    started = time.perf_counter()
+                    response = client.post(
+                        "/orders/add/", {"product": product_id, "vendor": vendor_id, "qty": qty}
+                    )
+                    elapsed = time.perf_counter() - started
+            finally:
+                clients.put(client)
+                connection.close()
+            with results_guard:
+                results.append((job, outcome(response), elapsed))
+
+        # failures are tallied below; don't log a traceback / budget warning each
+        quiet = [logging.getLogger(name) for name in ("django.request", "app.query_budget")]
+        levels = [logger.level for logger in quiet]
+        for logger in quiet:
+            logger.setLevel(logging.CRITICAL)
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=opts["threads"]) as pool:
+                list(pool.map(place, jobs))
+            wall = time.perf_counter() - started
+        finally:
+            for logger, level in zip(quiet, levels):
+                logger.setLevel(level)
+
+        return {
+            "wall": wall,
+            "results": results,
+            "lock_waits": timer.waits,
+            "anomalies": self.find_anomalies(hot, before, last_order, results),
+        }
+
+    # ------------------------------------------------------------------
+    # checks
+    # ------------------------------------------------------------------
+    @staticmethod
+    def stock(hot):
+        rows = (
+            Inventory.objects.filter(vendor__isnull=False)
+            .values_list("product_id", "vendor_id")
+            .annotate(total=Sum("stock_quantity"))
+        )
+        totals = {(p, v): total for p, v, total in rows}
+        return {pair: totals.get(pair, 0) for pair in hot}
+
+    def find_anomalies(self, hot, before, last_order, results):
+        anomalies = []
+        after = self.stock(hot)
+        balances = dict(
+            ((p, v), qty)
+            for p, v, qty in StockBalance.objects.values_list("product_id", "vendor_id", "quantity")
+        )
+        new_orders = Order.objects.filter(id__gt=last_order)
+        ordered = {
+            (p, v): total
+            for p, v, total in new_orders.values_list("product_id", "vendor_id").annotate(
+                total=Sum("quantity")
+            )
+        }
+        for pair in hot:
+            sold = ordered.get(pair, 0)
+            if sold > before[pair]:
+                anomalies.append(f"{pair}: oversold – {sold} ordered from {before[pair]} in stock")
+            if before[pair] - sold != after[pair]:
+                anomalies.append(
+                    f"{pair}: lots hold {after[pair]}, expected {before[pair]} - {sold}"
+                )
+            if balances.get(pair, 0) != after[pair]:
+                anomalies.append(f"{pair}: balance {balances.get(pair, 0)} ≠ lots {after[pair]}")
+
+        journalled = dict(
+            OrderAllocation.objects.filter(order__in=new_orders)
+            .values_list("order_id")
+            .annotate(total=Sum("qty"))
+        )
+        for order_id, quantity in new_orders.values_list("id", "quantity"):
+            if journalled.get(order_id, 0) != quantity:
+                anomalies.append(
+                    f"order {order_id}: journal {journalled.get(order_id, 0)} ≠ qty {quantity}"
+                )
+
+        placed = sum(1 for _, result, _ in results if result == "placed")
+        if placed != new_orders.count():
+            anomalies.append(f"{placed} placed responses but {new_orders.count()} new orders")
+        return anomalies
+
+    # ------------------------------------------------------------------
+    # report
+    # ------------------------------------------------------------------
+    def print_report(self, report, opts):
+        results, wall = report["results"], report["wall"]
+        latencies = [elapsed * 1000 for _, _, elapsed in results]
+        outcomes = Counter(result for _, result, _ in results)
+        waits = report["lock_waits"]
+
+        self.stdout.write(
+            f"{len(results)} requests, {opts['threads']} threads, "
+            f"{opts['hot_pairs']} hot pair(s), {wall:.2f}s"
+        )
+        self.stdout.write(
+            f"throughput  {len(results) / wall:8.1f} req/s   "
+            f"{outcomes['placed'] / wall:8.1f} orders/s"
+        )
+        self.stdout.write(
+            "latency     "
+            + "  ".join(f"p{pct} {percentile(latencies, pct):8.1f} ms" for pct in (50, 95, 99))
+            + f"  max {max(latencies, default=0):8.1f} ms"
+        )
+        self.stdout.write(
+            f"lock waits  {len(waits)} statement(s) ≥ {opts['lock_threshold_ms']:g} ms, "
+            f"{sum(waits):.2f}s total, max {max(waits, default=0) * 1000:.1f} ms"
+        )
+        for result, count in outcomes.most_common():
+            self.stdout.write(f"  {count:6d}  {result}")
+
+        if report["anomalies"]:
+            for anomaly in report["anomalies"][:20]:
+                self.stdout.write(self.style.ERROR(f"ANOMALY {anomaly}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("No oversell or stock drift."))
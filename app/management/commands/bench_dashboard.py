@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+from django.core.management.base import BaseCommand
+
+from app.modules.dashboard_module import (
+    ASYNC_WORKERS,
+    compute_dashboard_metrics,
+    compute_dashboard_metrics_async,
+)
+
+from ._bench import describe, scratch_database, seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a scratch database and compare the sequential dashboard aggregates "
+        "with the concurrent (async) ones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=2000)
+        parser.add_argument("--vendors", type=int, default=200)
+        parser.add_argument("--inventory", type=int, default=200_000)
+        parser.add_argument("--orders", type=int, default=500_000)
+        parser.add_argument("--purchases", type=int, default=100_000)
+        parser.add_argument("--repeat", type=int, default=10)
+        parser.add_argument(
+            "--database",
+            help="SQLite file to seed (default: a temporary file, removed afterwards)",
+        )
+
+    def handle(self, *args, **opts):
+        with scratch_database(opts["database"]) as path:
+            self.stdout.write(f"Seeding {path} ...")
+            started = time.perf_counter()
+            seed(
+                products=opts["products"],
+                vendors=opts["vendors"],
+                inventory=opts["inventory"],
+                orders=opts["orders"],
+                purchases=opts["purchases"],
+            )
+            self.stdout.write(f"Seeded in {time.perf_counter() - started:.1f}s")
+
+            sync_metrics = compute_dashboard_metrics()  # warm the page cache
+            async_metrics = asyncio.run(compute_dashboard_metrics_async())
+            if sync_metrics != async_metrics:
+                self.stderr.write(self.style.ERROR("Sync and async results differ!"))
+
+            sync_times, async_times = [], []
+            for _ in range(opts["repeat"]):
+                started = time.perf_counter()
+                compute_dashboard_metrics()
+                sync_times.append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                asyncio.run(compute_dashboard_metrics_async())
+                async_times.append(time.perf_counter() - started)
+
+        self.stdout.write(f"sync               {describe(sync_times)}")
+        self.stdout.write(f"async ({ASYNC_WORKERS} workers) {describe(async_times)}")
+        speedup = sum(sync_times) / sum(async_times)
+        self.stdout.write(self.style.SUCCESS(f"Speed-up: {speedup:.2f}x"))
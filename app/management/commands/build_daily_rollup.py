@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from app.modules.rollup_module import run_rollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold orders, purchase orders and inwards created since the last run into "
+        "the daily rollup table. Schedule it (e.g. every few minutes via cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Discard the rollup and watermarks and rebuild from the full history.",
+        )
+
+    def handle(self, *args, **options):
+        written = run_rollup(full=options["full"])
+        self.stdout.write(self.style.SUCCESS(f"Daily rollup updated: {written} row(s) written."))
@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from app.modules.valuation_module import (
+    PeriodClosed,
+    PeriodNotCurrent,
+    close_period,
+    period_history,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Close a valuation period: store closing stock at FIFO cost (per product) "
+        "and the period's cost of goods sold. Run at each month / period end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date",
+            help=(
+                "Period end date, YYYY-MM-DD; must be today in TIME_ZONE, since the "
+                "figures are read as they stand now (default: today)."
+            ),
+        )
+        parser.add_argument(
+            "--force", action="store_true", help="Re-close the latest period with current figures."
+        )
+        parser.add_argument(
+            "--list", action="store_true", help="Print the stored periods instead of closing one."
+        )
+
+    def handle(self, *args, **options):
+        if options["list"]:
+            for period in period_history():
+                self.stdout.write(
+                    f"{period.period_end}  qty {period.closing_qty:>10}  "
+                    f"value {period.closing_value:>14}  COGS {period.period_cogs:>14}"
+                )
+            return
+
+        period_end = timezone.localdate()
+        if options["date"]:
+            try:
+                period_end = parse_date(options["date"])
+            except ValueError:
+                period_end = None
+            if period_end is None:
+                raise CommandError("--date: expected YYYY-MM-DD")
+        try:
+            period = close_period(period_end, force=options["force"])
+        except PeriodClosed as exc:
+            raise CommandError(f"{exc} Use --force to re-close the latest period.")
+        except PeriodNotCurrent as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Closed {period.period_end}: {period.closing_qty} unit(s) worth "
+                f"{period.closing_value} at cost; COGS for the period {period.period_cogs}."
+            )
+        )
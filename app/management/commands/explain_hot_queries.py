@@ -0,0 +1,157 @@
+import re
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+from django.db.models.functions import Mod
+from django.utils import timezone
+
+from app.models import Inventory, Order, PurchaseOrder, StockBalance
+from app.modules.allocation_module import allocation_lots
+from app.modules.stock_module import rebuild_balances
+
+from ._bench import scratch_database, seed
+
+# EXPLAIN QUERY PLAN rows are "<id> <parent> <notused> <detail>"
+_DETAIL = re.compile(r"^\d+ \d+ \d+ ")
+# detail of a step that reads a table without any index
+_FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+_INDEX = re.compile(r"USING (?:COVERING )?INDEX (\w+)|USING INTEGER PRIMARY KEY")
+# a subquery SQLite materialises itself; scanning it is not a table scan
+_CO_ROUTINE = re.compile(r"^CO-ROUTINE (\S+)$")
+
+
+def hot_queries(product_id, vendor_id):
+    """(name, queryset) for the query shapes the order / approval / list
+    pages run most, bound to one sample product/vendor pair."""
+    pair = {"product_id": product_id, "vendor_id": vendor_id}
+    day = timezone.localdate()
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    end = start + timedelta(days=1)
+
+    return [
+        ("stock balance", StockBalance.objects.filter(**pair)),
+        ("fifo allocate", allocation_lots({(product_id, vendor_id): 10})),
+        ("fifo release", Inventory.objects.filter(**pair).order_by("id")),
+        (
+            "stock for pair",
+            Inventory.objects.filter(**pair)
+            .values("product_id")
+            .annotate(total=Sum("stock_quantity")),
+        ),
+        (
+            "vendors for product",
+            Inventory.objects.filter(product_id=product_id, vendor__isnull=False)
+            .values("vendor")
+            .annotate(total=Sum("stock_quantity")),
+        ),
+        ("pending inventory", Inventory.objects.filter(approval_status="PENDING")),
+        ("pending orders", Order.objects.filter(approval_status="PENDING")),
+        ("pending POs", PurchaseOrder.objects.filter(approval_status="PENDING")),
+        (
+            "inventory by status",
+            Inventory.objects.filter(status="INWARD_REQUESTED").order_by("-id")[:51],
+        ),
+        ("orders by status", Order.objects.filter(status="ORDER_RAISED").order_by("-id")[:51]),
+        ("POs by status", PurchaseOrder.objects.filter(status="PO_RAISED").order_by("-id")[:51]),
+        (
+            "inventory by day",
+            Inventory.objects.filter(inward_date__gte=start, inward_date__lt=end),
+        ),
+        ("orders by day", Order.objects.filter(order_date__gte=start, order_date__lt=end)),
+        ("POs by day", PurchaseOrder.objects.filter(created_at__gte=start, created_at__lt=end)),
+    ]
+
+
+def settle_history(every=20):
+    """Seeded rows are all new and pending; settle all but one in ``every``
+    (approved, inventory lots drained) so the planner statistics look like a
+    live database's."""
+    settled = {
+        Inventory: "INWARD_COMPLETED",
+        Order: "ORDER_DELIVERED",
+        PurchaseOrder: "INWARD_REQUESTED",
+    }
+    for model, status in settled.items():
+        model.objects.annotate(bucket=Mod("id", every)).exclude(bucket=0).update(
+            approval_status="APPROVED", status=status
+        )
+    Inventory.objects.filter(status="INWARD_COMPLETED").update(stock_quantity=0)
+
+
+def explain(qs) -> str:
+    """``qs.explain()``, run by hand: for a filter on a window function Django
+    repeats the EXPLAIN prefix inside the subquery it wraps the query in."""
+    sql, params = qs.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return "\n".join(" ".join(str(col) for col in row) for row in cursor.fetchall())
+
+
+def analyse(plan: str):
+    """Indexes named in a plan, and the tables it scans without one."""
+    indexes, scans, co_routines = [], [], set()
+    for line in plan.splitlines():
+        detail = _DETAIL.sub("", line.strip())
+        found = _INDEX.search(detail)
+        if found:
+            indexes.append(found.group(1) or "rowid")
+        co_routine = _CO_ROUTINE.match(detail)
+        if co_routine:
+            co_routines.add(co_routine.group(1))
+        scan = _FULL_SCAN.match(detail)
+        if scan and scan.group(1) not in co_routines:
+            scans.append(scan.group(1))
+    return indexes, scans
+
+
+class Command(BaseCommand):
+    help = (
+        "Run EXPLAIN QUERY PLAN for the hot order / approval / list queries and "
+        "report which index each one uses. Exits non-zero if any does a full scan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scratch",
+            action="store_true",
+            help="Explain against a seeded throw-away database instead of the configured one.",
+        )
+        parser.add_argument("--verbose-plans", action="store_true", help="Print the raw plans.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("EXPLAIN QUERY PLAN output is only understood for SQLite.")
+        if options["scratch"]:
+            with scratch_database():
+                seed(products=200, vendors=20, inventory=2000, orders=2000, purchases=500)
+                settle_history()
+                rebuild_balances()
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE")
+                failures = self.report(options["verbose_plans"])
+        else:
+            failures = self.report(options["verbose_plans"])
+        if failures:
+            raise CommandError(f"{failures} hot quer(y/ies) scan a table without an index.")
+
+    def report(self, verbose):
+        sample = Inventory.objects.filter(vendor__isnull=False).values_list(
+            "product_id", "vendor_id"
+        ).first() or (1, 1)
+
+        failures = 0
+        width = max(len(name) for name, _ in hot_queries(*sample))
+        for name, qs in hot_queries(*sample):
+            plan = explain(qs)
+            indexes, scans = analyse(plan)
+            if scans:
+                failures += 1
+                status = self.style.ERROR(f"FULL SCAN {', '.join(scans)}")
+            else:
+                status = self.style.SUCCESS(", ".join(indexes) or "no table access")
+            self.stdout.write(f"{name:<{width}}  {status}")
+            if verbose:
+                self.stdout.write(f"    {plan}".replace("\n", "\n    "))
+        return failures
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from app.modules.snapshot_module import rebuild_snapshot
+
+
+class Command(BaseCommand):
+    help = "Recompute the dashboard snapshot totals from the order, inventory and PO tables."
+
+    def handle(self, *args, **options):
+        snapshot = rebuild_snapshot()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Dashboard snapshot rebuilt: stock {snapshot.total_stock}, "
+                f"orders {snapshot.total_orders}, PO {snapshot.total_po_orders}."
+            )
+        )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from app.modules.search_module import fts_enabled, rebuild_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the product / vendor search index from scratch. Needed after "
+        "bulk loads, which bypass the save signals that keep it in sync."
+    )
+
+    def handle(self, *args, **options):
+        counts = rebuild_index()
+        backend = "FTS5 trigram" if fts_enabled() else "n-gram table"
+        summary = ", ".join(f"{n} {kind}(s)" for kind, n in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Search index rebuilt ({backend}): {summary}."))
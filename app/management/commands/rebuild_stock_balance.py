@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from app.modules.stock_module import rebuild_balances
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the per-(product, vendor) stock balances from the Inventory "
+        "lots. Needed after bulk loads, which bypass the inventory signals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--product", type=int, help="Only rebuild this product's balances.")
+
+    def handle(self, *args, **options):
+        written = rebuild_balances(options["product"])
+        self.stdout.write(self.style.SUCCESS(f"Stock balances rebuilt: {written} row(s)."))
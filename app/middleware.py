@@ -0,0 +1,147 @@
+import logging
+import re
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("app.query_budget")
+
+# Max queries per request, by URL name. Session, user and profile lookups are
+# included, so nothing below 3 is realistic for a logged-in page. Each is the
+# page's most expensive path as measured by QueryBudgetTests (app/tests.py),
+# which runs every flow with the middleware raising. dashboard_async has no
+# entry: its aggregates run on executor threads, whose connections are not
+# wrapped by the request's recorder.
+QUERY_BUDGETS = {
+    "dashboard": 24,  # first visit builds the snapshot; 8 once built
+    "stock_chart_data": 6,
+    "order_chart_data": 6,
+    "trend_chart_data": 6,
+    "product_list": 5,
+    "add_product": 9,
+    "edit_product": 12,
+    "delete_product": 27,
+    "category_list": 5,
+    "add_category": 6,
+    "edit_category": 6,
+    "delete_category": 29,
+    "vendor_list": 5,
+    "add_vendor": 8,
+    "edit_vendor": 9,
+    "delete_vendor": 11,
+    "inventory_list": 8,
+    "add_inventory": 12,
+    "export_inventory": 6,
+    "edit_inventory": 18,
+    "delete_inventory": 13,
+    "order_list": 8,
+    "add_order": 20,
+    "add_order_batch": 24,
+    "export_orders": 6,
+    "stock_availability": 4,
+    "stock_map": 4,
+    "edit_order": 32,
+    "cancel_order": 8,
+    "delete_order": 21,
+    "register": 8,
+    "profile": 6,
+    "user_list": 5,
+    "user_add": 12,
+    "user_edit": 9,
+    "user_delete": 16,
+    "user_reset_password": 8,
+    "purchase_list": 8,
+    "add_purchase": 12,
+    "export_purchases": 6,
+    "edit_purchase": 14,
+    "delete_purchase": 12,
+    "print_purchase_order": 5,
+    "approval_request_list": 8,
+    "approval_manager_list": 8,
+    "po_approval_request_detail": 6,
+    "inventory_approval_request_detail": 6,
+    "order_approval_request_detail": 6,
+    "update_approval": 11,
+    "mark_approved": 10,
+    "mark_rejected": 10,
+}
+
+# same statement this many times in one request is reported as N+1
+REPEAT_THRESHOLD = 5
+
+_IN_LIST = re.compile(r"IN \((?:%s, )*%s\)")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def sql_shape(sql):
+    """Statement with literals and IN-list lengths erased."""
+    sql = _IN_LIST.sub("IN (...)", sql)
+    return _LITERAL.sub("?", sql)
+
+
+class _QueryRecorder:
+    def __init__(self):
+        self.shapes = Counter()
+
+    @property
+    def count(self):
+        return sum(self.shapes.values())
+
+    def __call__(self, execute, sql, params, many, context):
+        self.shapes[sql_shape(sql)] += 1
+        return execute(sql, params, many, context)
+
+
+class QueryBudgetMiddleware:
+    """Count the queries each request runs and report requests over their
+    budget or repeating the same statement (N+1).
+
+    Reports are logged to ``app.query_budget``; with
+    ``KMDV_QUERY_BUDGET_RAISE = True`` they raise ``QueryBudgetExceeded``
+    instead.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.budgets = {**QUERY_BUDGETS, **getattr(settings, "KMDV_QUERY_BUDGETS", {})}
+        self.threshold = getattr(settings, "KMDV_QUERY_REPEAT_THRESHOLD", REPEAT_THRESHOLD)
+        self.raise_errors = getattr(settings, "KMDV_QUERY_BUDGET_RAISE", False)
+
+    def __call__(self, request):
+        recorder = _QueryRecorder()
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(recorder))
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        url_name = match.url_name if match else None
+        if settings.DEBUG:
+            response["X-Query-Count"] = str(recorder.count)
+        self.check(request, url_name, recorder)
+        return response
+
+    def check(self, request, url_name, recorder):
+        problems = []
+        budget = self.budgets.get(url_name)
+        if budget is not None and recorder.count > budget:
+            problems.append(f"{recorder.count} queries (budget {budget})")
+
+        for shape, times in recorder.shapes.most_common():
+            if times < self.threshold:
+                break
+            problems.append(f"N+1: {times}x {shape[:200]}")
+
+        if not problems:
+            return
+        message = f"{request.method} {request.path} [{url_name}]: " + "; ".join(problems)
+        if self.raise_errors:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0019_remove_order_is_cancelled_order_approval_status_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardProductTotal',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='app.product')),
+                ('stock_qty', models.BigIntegerField(default=0)),
+                ('order_qty', models.BigIntegerField(default=0)),
+                ('po_qty', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DashboardSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('products_count', models.PositiveIntegerField(default=0)),
+                ('orders_count', models.PositiveIntegerField(default=0)),
+                ('total_orders', models.BigIntegerField(default=0)),
+                ('total_order_price', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('total_stock', models.BigIntegerField(default=0)),
+                ('total_inward_qty', models.BigIntegerField(default=0)),
+                ('total_stock_price', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('total_po_orders', models.BigIntegerField(default=0)),
+                ('total_po_order_price', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('rebuilt_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='inventory',
+            name='status',
+            field=models.CharField(choices=[('INWARD_REQUESTED', 'Requested'), ('INWARD_APPROVED', 'Approved'), ('INWARD_REJECTED', 'Rejected'), ('INWARD_QC', 'QC-Done'), ('INWARD_COMPLETED', 'Completed')], default='INWARD_REQUESTED', max_length=20),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0020_dashboardsnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=20, unique=True)),
+                ('last_timestamp', models.DateTimeField(blank=True, null=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('ordered_qty', models.BigIntegerField(default=0)),
+                ('ordered_value', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('po_qty', models.BigIntegerField(default=0)),
+                ('po_value', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('inward_qty', models.BigIntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='app.product')),
+                ('vendor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='app.vendor')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('date', 'product', 'vendor'), name='daily_rollup_unique_key')],
+            },
+        ),
+    ]
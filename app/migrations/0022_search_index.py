@@ -0,0 +1,80 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:25
+
+from django.db import migrations, models
+
+FTS_TABLE = "app_search_fts"
+GRAM = 3
+
+
+def _grams(text):
+    text = (text or "").lower()
+    return {text[i : i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+def create_search_index(apps, schema_editor):
+    """FTS5 trigram table on SQLite builds that have it, otherwise fill the
+    SearchNgram fallback table."""
+    Product = apps.get_model("app", "Product")
+    Vendor = apps.get_model("app", "Vendor")
+    SearchNgram = apps.get_model("app", "SearchNgram")
+    rows = [
+        ("product", p.pk, p.name or "", p.product_id or "")
+        for p in Product.objects.only("pk", "name", "product_id")
+    ] + [
+        ("vendor", v.pk, v.name or "", v.vendor_id or "")
+        for v in Vendor.objects.only("pk", "name", "vendor_id")
+    ]
+
+    if schema_editor.connection.vendor == "sqlite":
+        try:
+            with schema_editor.connection.cursor() as cursor:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                    "kind UNINDEXED, object_id UNINDEXED, name, code, tokenize='trigram')"
+                )
+                cursor.executemany(
+                    f"INSERT INTO {FTS_TABLE} (kind, object_id, name, code) VALUES (%s, %s, %s, %s)",
+                    rows,
+                )
+            return
+        except Exception:
+            pass  # no FTS5 / trigram tokenizer in this SQLite build
+
+    SearchNgram.objects.bulk_create(
+        (
+            SearchNgram(kind=kind, field=field, object_id=pk, gram=gram)
+            for kind, pk, name, code in rows
+            for field, value in (("name", name), ("code", code))
+            for gram in _grams(value)
+        ),
+        batch_size=2000,
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0021_dailyrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchNgram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=10)),
+                ('field', models.CharField(max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('gram', models.CharField(max_length=3)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'gram', 'object_id'], name='search_ngram_lookup_idx'), models.Index(fields=['kind', 'object_id'], name='search_ngram_object_idx')],
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_balances(apps, schema_editor):
+    Inventory = apps.get_model("app", "Inventory")
+    StockBalance = apps.get_model("app", "StockBalance")
+    totals = (
+        Inventory.objects.filter(vendor__isnull=False)
+        .values("product_id", "vendor_id")
+        .annotate(total=Sum("stock_quantity"))
+        .order_by()
+    )
+    StockBalance.objects.bulk_create(
+        (
+            StockBalance(
+                product_id=row["product_id"],
+                vendor_id=row["vendor_id"],
+                quantity=row["total"],
+            )
+            for row in totals
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0023_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='app.product')),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='app.vendor')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('product', 'vendor'), name='stock_balance_pair')],
+            },
+        ),
+        migrations.RunPython(backfill_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_costs(apps, schema_editor):
+    Inventory = apps.get_model("app", "Inventory")
+    OrderAllocation = apps.get_model("app", "OrderAllocation")
+    DashboardSnapshot = apps.get_model("app", "DashboardSnapshot")
+    Product = apps.get_model("app", "Product")
+
+    # no purchase costs were recorded so far – today's list price is the best guess
+    Inventory.objects.update(
+        unit_cost=Subquery(Product.objects.filter(pk=OuterRef("product_id")).values("price")[:1])
+    )
+    OrderAllocation.objects.update(
+        unit_cost=Subquery(
+            Inventory.objects.filter(pk=OuterRef("inventory_id")).values("unit_cost")[:1]
+        )
+    )
+    # rebuilt with the cost totals on the next dashboard read
+    DashboardSnapshot.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0025_orderallocation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventory',
+            name='unit_cost',
+            field=models.DecimalField(decimal_places=2, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='orderallocation',
+            name='unit_cost',
+            field=models.DecimalField(decimal_places=2, max_digits=12, null=True),
+        ),
+        migrations.AlterField(
+            model_name='orderallocation',
+            name='inventory',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='allocations', to='app.inventory'),
+        ),
+        migrations.AddField(
+            model_name='dashboardsnapshot',
+            name='total_cogs',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=16),
+        ),
+        migrations.AddField(
+            model_name='dashboardsnapshot',
+            name='total_stock_cost',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=16),
+        ),
+        migrations.RunPython(backfill_costs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='inventory',
+            name='unit_cost',
+            field=models.DecimalField(decimal_places=2, max_digits=12),
+        ),
+        migrations.AlterField(
+            model_name='orderallocation',
+            name='unit_cost',
+            field=models.DecimalField(decimal_places=2, max_digits=12),
+        ),
+        migrations.CreateModel(
+            name='ValuationPeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_end', models.DateField(unique=True)),
+                ('closing_qty', models.BigIntegerField(default=0)),
+                ('closing_value', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('cogs_to_date', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('period_cogs', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('closed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-period_end'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ValuationPeriodLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('qty', models.BigIntegerField(default=0)),
+                ('value', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='app.valuationperiod')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='app.product')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('period', 'product'), name='valuation_line_unique')],
+            },
+        ),
+    ]
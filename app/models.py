@@ -1,6 +1,6 @@
 from django.contrib.auth.models import User
 from django.db import models
-from django.db.models import F
+from django.db.models import F, Q
 
 
 class Category(models.Model):
@@ -44,6 +44,8 @@ class Inventory(models.Model):
     vendor = models.ForeignKey(Vendor, on_delete=models.SET_NULL, null=True, blank=True)
     stock_quantity = models.PositiveIntegerField()
     inward_qty = models.PositiveIntegerField(default=0)
+    # cost of one unit of this lot; defaults to the product's list price at inward
+    unit_cost = models.DecimalField(max_digits=12, decimal_places=2)
     status = models.CharField(
         max_length=20, choices=STATUS_CHOICES, default="INWARD_REQUESTED"
     )
@@ -58,16 +60,42 @@ class Inventory(models.Model):
             ],
             default='PENDING'
         )
+
+    class Meta:
+        indexes = [
+            # a pair's lots oldest first: the FIFO draw (running total per pair),
+            # release() and per-pair stock sums
+            models.Index(fields=["product", "vendor", "id"], name="inventory_lot_idx"),
+            models.Index(
+                fields=["id"], name="inventory_pending_idx", condition=Q(approval_status="PENDING")
+            ),
+            models.Index(fields=["status", "id"], name="inventory_status_idx"),
+            models.Index(fields=["inward_date", "id"], name="inventory_date_idx"),
+        ]
+
     def __str__(self):
         return (
             f"{self.product.name} - {self.stock_quantity} ({self.get_status_display()})"
         )
 
 
+class OrderBatch(models.Model):
+    """Header of a multi-line order; each line is an ``Order``."""
+
+    user       = models.ForeignKey(User, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Order batch {self.id} by {self.user.username}"
+
+
 class Order(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     vendor = models.ForeignKey(Vendor, on_delete=models.SET_NULL, null=True, blank=True)
+    batch = models.ForeignKey(
+        OrderBatch, on_delete=models.SET_NULL, null=True, blank=True, related_name="lines"
+    )
     quantity = models.PositiveIntegerField()
     order_date = models.DateTimeField(auto_now_add=True)
     STATUS_CHOICES = [
@@ -95,6 +123,15 @@ class Order(models.Model):
         default='PENDING'
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["id"], name="order_pending_idx", condition=Q(approval_status="PENDING")
+            ),
+            models.Index(fields=["status", "id"], name="order_status_idx"),
+            models.Index(fields=["order_date", "id"], name="order_date_idx"),
+        ]
+
     def __str__(self):
         return f"Order {self.id} by {self.user.username}"
 
@@ -152,5 +189,211 @@ class PurchaseOrder(models.Model):
     created_at      = models.DateTimeField(auto_now_add=True)
     updated_at      = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["id"], name="po_pending_idx", condition=Q(approval_status="PENDING")
+            ),
+            models.Index(fields=["status", "id"], name="po_status_idx"),
+            models.Index(fields=["created_at", "id"], name="po_created_at_idx"),
+        ]
+
     def __str__(self):
         return f"PO #{self.pk} — {self.product.name} ({self.quantity})"
+
+
+class StockBalance(models.Model):
+    """Available stock per (product, vendor): the sum of ``stock_quantity``
+    over the pair's Inventory lots, kept current by inventory signals.
+    Lots without a vendor are not orderable and are not tracked."""
+
+    product    = models.ForeignKey(Product, on_delete=models.CASCADE)
+    vendor     = models.ForeignKey(Vendor, on_delete=models.CASCADE)
+    quantity   = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["product", "vendor"], name="stock_balance_pair"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}/{self.vendor_id}: {self.quantity}"
+
+
+class OrderAllocation(models.Model):
+    """Journal of the Inventory lots an order's quantity was taken from, so
+    edits and deletes can put stock back on exactly those lots. ``unit_cost``
+    is the lot's cost when taken – the journal is also the FIFO COGS ledger,
+    and keeps its rows (without a lot) when a lot is deleted."""
+
+    order      = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="allocations")
+    inventory  = models.ForeignKey(
+        Inventory, on_delete=models.SET_NULL, null=True, related_name="allocations"
+    )
+    qty        = models.PositiveIntegerField()
+    unit_cost  = models.DecimalField(max_digits=12, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Order #{self.order_id} ← lot #{self.inventory_id}: {self.qty}"
+
+
+class DashboardSnapshot(models.Model):
+    """Single row of running dashboard totals, kept current by signal deltas."""
+
+    products_count       = models.PositiveIntegerField(default=0)
+    orders_count         = models.PositiveIntegerField(default=0)
+    total_orders         = models.BigIntegerField(default=0)
+    total_order_price    = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    total_stock          = models.BigIntegerField(default=0)
+    total_inward_qty     = models.BigIntegerField(default=0)
+    total_stock_price    = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    total_po_orders      = models.BigIntegerField(default=0)
+    total_po_order_price = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    total_stock_cost     = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    total_cogs           = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    rebuilt_at           = models.DateTimeField(auto_now_add=True)
+    updated_at           = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Dashboard snapshot (updated {self.updated_at:%d %b %Y %H:%M})"
+
+
+class DashboardProductTotal(models.Model):
+    """Per-product running quantities backing the dashboard top-N lists."""
+
+    product   = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True)
+    stock_qty = models.BigIntegerField(default=0)
+    order_qty = models.BigIntegerField(default=0)
+    po_qty    = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.product_id}: stock {self.stock_qty}, ordered {self.order_qty}"
+
+
+class ValuationPeriod(models.Model):
+    """Stock valuation frozen at a period close by ``close_valuation_period``.
+    Historical figures are read from here, never recomputed."""
+
+    period_end    = models.DateField(unique=True)
+    closing_qty   = models.BigIntegerField(default=0)
+    closing_value = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    cogs_to_date  = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    period_cogs   = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    closed_at     = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-period_end"]
+
+    def __str__(self):
+        return f"Valuation at {self.period_end}: {self.closing_value}"
+
+
+class ValuationPeriodLine(models.Model):
+    """Closing quantity and value at cost of one product in a closed period."""
+
+    period  = models.ForeignKey(ValuationPeriod, on_delete=models.CASCADE, related_name="lines")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    qty     = models.BigIntegerField(default=0)
+    value   = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["period", "product"], name="valuation_line_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.period.period_end} – {self.product_id}: {self.qty} @ {self.value}"
+
+
+class StatusTransition(models.Model):
+    """Append-only log of approval / status changes on POs, inward lots and
+    orders, written in one batch per transaction by ``transition_module``."""
+
+    KIND_CHOICES = [
+        ("po", "Purchase order"),
+        ("inventory", "Inward"),
+        ("order", "Order"),
+    ]
+
+    kind          = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id     = models.BigIntegerField()
+    from_approval = models.CharField(max_length=20)
+    to_approval   = models.CharField(max_length=20)
+    from_status   = models.CharField(max_length=20)
+    to_status     = models.CharField(max_length=20)
+    user          = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at    = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # one record's history, oldest first
+            models.Index(fields=["kind", "object_id", "id"], name="transition_object_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError("Status transitions are append-only.")
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return (
+            f"{self.kind} #{self.object_id}: {self.from_approval}/{self.from_status}"
+            f" → {self.to_approval}/{self.to_status}"
+        )
+
+
+class DailyRollup(models.Model):
+    """Per-day movement totals for one (product, vendor), fed incrementally
+    by the ``build_daily_rollup`` command."""
+
+    date          = models.DateField()
+    product       = models.ForeignKey(Product, on_delete=models.CASCADE)
+    vendor        = models.ForeignKey(Vendor, on_delete=models.SET_NULL, null=True, blank=True)
+    ordered_qty   = models.BigIntegerField(default=0)
+    ordered_value = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    po_qty        = models.BigIntegerField(default=0)
+    po_value      = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    inward_qty    = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "product", "vendor"], name="daily_rollup_unique_key"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.date} – {self.product_id}/{self.vendor_id}"
+
+
+class RollupWatermark(models.Model):
+    """Newest source row already folded into ``DailyRollup``."""
+
+    source         = models.CharField(max_length=20, unique=True)
+    last_timestamp = models.DateTimeField(null=True, blank=True)
+    last_id        = models.BigIntegerField(default=0)
+    updated_at     = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source} @ {self.last_timestamp} (#{self.last_id})"
+
+
+class SearchNgram(models.Model):
+    """Trigram index over product / vendor names and codes, used for
+    substring search when SQLite FTS5 is not available."""
+
+    kind      = models.CharField(max_length=10)
+    field     = models.CharField(max_length=10)
+    object_id = models.BigIntegerField()
+    gram      = models.CharField(max_length=3)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["kind", "gram", "object_id"], name="search_ngram_lookup_idx"),
+            models.Index(fields=["kind", "object_id"], name="search_ngram_object_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}#{self.object_id} {self.field}:{self.gram}"
@@ -0,0 +1,323 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from django.db.models import (
+    BigIntegerField,
+    Case,
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    PositiveIntegerField,
+    Subquery,
+    Sum,
+    Value,
+    When,
+    Window,
+)
+
+from app.models import Inventory, OrderAllocation
+from app.modules import snapshot_module, stock_module
+from app.modules.cache_module import bump_version
+from app.modules.stock_module import pairs_q
+
+
+# (product_id, vendor_id)
+Pair = Tuple[int, int]
+
+
+class InsufficientStock(Exception):
+    def __init__(self, available, requested):
+        self.available = available
+        self.requested = requested
+        super().__init__(f"Available: {available}, Requested: {requested}")
+
+
+@dataclass(frozen=True)
+class LotAllocation:
+    inventory_id: int
+    qty: int
+    unit_cost: Decimal
+
+
+@dataclass
+class AllocationPlan:
+    """Which lots a quantity of one (product, vendor) is taken from."""
+
+    product_id: int
+    vendor_id: int
+    quantity: int
+    lots: List[LotAllocation] = field(default_factory=list)
+
+    @property
+    def allocated(self) -> int:
+        return sum(lot.qty for lot in self.lots)
+
+    @property
+    def cost(self) -> Decimal:
+        """FIFO cost of the allocated quantity."""
+        return sum((lot.qty * lot.unit_cost for lot in self.lots), Decimal("0.00"))
+
+
+def allocation_lots(quantities: Dict[Pair, int]):
+    """The open lots a FIFO draw of ``quantities`` – {pair: quantity > 0} –
+    touches, as (product, vendor, lot, stock, stock before it, unit cost).
+
+    A running total over each pair's lots (oldest first) picks every lot
+    whose preceding stock is still short of the pair's quantity.
+    """
+    running = Window(
+        Sum("stock_quantity"),
+        partition_by=[F("product_id"), F("vendor_id")],
+        order_by=F("id").asc(),
+        output_field=BigIntegerField(),
+    )
+    requested = Case(
+        *(
+            When(product_id=p, vendor_id=v, then=Value(quantity))
+            for (p, v), quantity in quantities.items()
+        ),
+        output_field=BigIntegerField(),
+    )
+    return (
+        Inventory.objects.filter(pairs_q(quantities), stock_quantity__gt=0)
+        .annotate(
+            before=ExpressionWrapper(
+                running - F("stock_quantity"), output_field=BigIntegerField()
+            ),
+            requested=requested,
+        )
+        .filter(before__lt=F("requested"))
+        .order_by("id")
+        .values_list("product_id", "vendor_id", "id", "stock_quantity", "before", "unit_cost")
+    )
+
+
+def plan_allocations(quantities: Dict[Pair, int]) -> Dict[Pair, AllocationPlan]:
+    """FIFO allocation for many (product, vendor) pairs – {pair: quantity} –
+    in one query (``allocation_lots``); the last lot picked for a pair is
+    only partly used.
+    """
+    plans = {
+        (int(p), int(v)): AllocationPlan(int(p), int(v), quantity)
+        for (p, v), quantity in quantities.items()
+        if quantity > 0
+    }
+    if not plans:
+        return plans
+
+    lots = allocation_lots({pair: plan.quantity for pair, plan in plans.items()})
+    for product_id, vendor_id, lot_id, stock, before, unit_cost in lots:
+        plan = plans[product_id, vendor_id]
+        plan.lots.append(LotAllocation(lot_id, min(stock, plan.quantity - before), unit_cost))
+    return plans
+
+
+def plan_allocation(product_id, vendor_id, quantity: int) -> AllocationPlan:
+    """FIFO allocation of ``quantity`` over one pair's open lots."""
+    plans = plan_allocations({(product_id, vendor_id): quantity})
+    return plans.get((int(product_id), int(vendor_id))) or AllocationPlan(
+        product_id, vendor_id, quantity
+    )
+
+
+def _moved(product_id, vendor_id, qty: int, cost: Decimal, cogs: Decimal = 0) -> None:
+    """Bulk updates skip the Inventory signals – apply their effects here.
+
+    ``cost`` is the value at cost of the ``qty`` moved; ``cogs`` the change
+    to cost of goods sold it stands for.
+    """
+    snapshot_module.apply_delta(product_id, stock=qty, stock_cost=cost, cogs=cogs)
+    stock_module.apply_stock_delta(product_id, vendor_id, qty)
+    bump_version(Inventory)
+
+
+def _deduct(lots: Sequence[LotAllocation]) -> None:
+    """Take every lot's quantity off its stock with a single UPDATE."""
+    Inventory.objects.filter(pk__in=[lot.inventory_id for lot in lots]).update(
+        stock_quantity=Case(
+            *(When(pk=lot.inventory_id, then=F("stock_quantity") - lot.qty) for lot in lots),
+            default=F("stock_quantity"),
+            output_field=PositiveIntegerField(),
+        )
+    )
+
+
+def apply_plan(plan: AllocationPlan) -> None:
+    """Deduct every lot of ``plan`` with a single UPDATE."""
+    if not plan.lots:
+        return
+    _deduct(plan.lots)
+    _moved(plan.product_id, plan.vendor_id, -plan.allocated, -plan.cost, cogs=plan.cost)
+
+
+def apply_plans(plans: Iterable[AllocationPlan]) -> None:
+    """``apply_plan`` for many pairs: one UPDATE for all their lots, and the
+    balance / dashboard effects applied in bulk too."""
+    plans = [plan for plan in plans if plan.lots]
+    if not plans:
+        return
+    _deduct([lot for plan in plans for lot in plan.lots])
+
+    per_product = defaultdict(lambda: {"stock": 0, "stock_cost": 0, "cogs": 0})
+    for plan in plans:
+        moved = per_product[plan.product_id]
+        moved["stock"] -= plan.allocated
+        moved["stock_cost"] -= plan.cost
+        moved["cogs"] += plan.cost
+    snapshot_module.apply_deltas(per_product)
+    stock_module.apply_stock_deltas(
+        {(plan.product_id, plan.vendor_id): -plan.allocated for plan in plans}
+    )
+    bump_version(Inventory)
+
+
+def allocate(product_id, vendor_id, quantity: int) -> AllocationPlan:
+    """Take ``quantity`` from the pair's lots, oldest first, and return the
+    plan that was applied. Call inside a transaction, after locking the
+    pair's balance (``stock_module.lock_balances``).
+
+    Raises ``InsufficientStock`` – before touching anything – if the open
+    lots cannot cover ``quantity``.
+    """
+    plan = plan_allocation(product_id, vendor_id, quantity)
+    if plan.allocated < quantity:
+        raise InsufficientStock(plan.allocated, quantity)
+    apply_plan(plan)
+    return plan
+
+
+def allocate_many(quantities: Dict[Pair, int]) -> Dict[Pair, AllocationPlan]:
+    """``allocate`` for many pairs at once – {pair: quantity} – planned in
+    one query and applied in bulk. Lock every pair's balance first.
+
+    Raises ``InsufficientStock`` for the first pair its lots cannot cover,
+    before anything is written.
+    """
+    plans = plan_allocations(quantities)
+    for plan in plans.values():
+        if plan.allocated < plan.quantity:
+            raise InsufficientStock(plan.allocated, plan.quantity)
+    apply_plans(plans.values())
+    return plans
+
+
+def split_plan(plan: AllocationPlan, quantities: Sequence[int]) -> List[List[LotAllocation]]:
+    """Share a pair's allocated lots between order lines, FIFO in line order."""
+    lots = iter(plan.lots)
+    lot, left = None, 0
+    shares = []
+    for quantity in quantities:
+        share = []
+        while quantity:
+            if not left:
+                lot = next(lots)
+                left = lot.qty
+            take = min(left, quantity)
+            share.append(LotAllocation(lot.inventory_id, take, lot.unit_cost))
+            left -= take
+            quantity -= take
+        shares.append(share)
+    return shares
+
+
+def release(product_id, vendor_id, quantity: int) -> int:
+    """Put ``quantity`` back on the pair's oldest lot, at that lot's cost.
+
+    Returns the quantity restored (0 when the pair has no lots left).
+    """
+    if quantity <= 0:
+        return 0
+    oldest = (
+        Inventory.objects.filter(product_id=product_id, vendor_id=vendor_id)
+        .order_by("id")
+        .values_list("id", "unit_cost")
+        .first()
+    )
+    if oldest is None:
+        return 0
+    lot_id, unit_cost = oldest
+    Inventory.objects.filter(pk=lot_id).update(stock_quantity=F("stock_quantity") + quantity)
+    _moved(product_id, vendor_id, quantity, quantity * unit_cost)
+    return quantity
+
+
+# ---------------------------------------------------------------------------
+# order ↔ lot journal
+# ---------------------------------------------------------------------------
+def record_allocation(order, plan: AllocationPlan) -> None:
+    """Journal which lots ``order`` was filled from, and at what cost."""
+    OrderAllocation.objects.bulk_create(
+        OrderAllocation(
+            order=order, inventory_id=lot.inventory_id, qty=lot.qty, unit_cost=lot.unit_cost
+        )
+        for lot in plan.lots
+    )
+
+
+def record_allocations(lines: Iterable[Tuple[object, Sequence[LotAllocation]]]) -> None:
+    """``record_allocation`` for many orders – (order, lots) pairs – in one insert."""
+    OrderAllocation.objects.bulk_create(
+        OrderAllocation(
+            order=order, inventory_id=lot.inventory_id, qty=lot.qty, unit_cost=lot.unit_cost
+        )
+        for order, lots in lines
+        for lot in lots
+    )
+
+
+def restore_order(order) -> int:
+    """Give an order's stock back to the lots it was taken from – one UPDATE
+    for all journalled lots – and clear its journal, reversing its COGS.
+
+    Quantity without a journal entry (orders placed before the journal
+    existed, or lots deleted since) goes back through ``release``.
+    Returns the quantity restored.
+    """
+    journal = OrderAllocation.objects.filter(order=order)
+    moved = list(
+        journal.values("inventory__product_id", "inventory__vendor_id")
+        .annotate(
+            total=Sum("qty"),
+            cost=Sum(
+                F("qty") * F("unit_cost"),
+                output_field=DecimalField(max_digits=16, decimal_places=2),
+            ),
+        )
+        .order_by()
+    )
+
+    restored = 0
+    orphaned_cogs = Decimal("0.00")
+    if moved:
+        per_lot = (
+            journal.filter(inventory=OuterRef("pk"))
+            .values("inventory")
+            .annotate(total=Sum("qty"))
+            .values("total")
+        )
+        Inventory.objects.filter(pk__in=journal.values("inventory")).update(
+            stock_quantity=F("stock_quantity") + Subquery(per_lot)
+        )
+        journal.delete()
+        for row in moved:
+            if row["inventory__product_id"] is None:  # lot deleted since
+                orphaned_cogs += row["cost"]
+                continue
+            _moved(
+                row["inventory__product_id"],
+                row["inventory__vendor_id"],
+                row["total"],
+                row["cost"],
+                cogs=-row["cost"],
+            )
+            restored += row["total"]
+
+    if orphaned_cogs:
+        snapshot_module.apply_delta(order.product_id, cogs=-orphaned_cogs)
+    remainder = order.quantity - restored
+    if remainder > 0:
+        restored += release(order.product_id, order.vendor_id, remainder)
+    return restored
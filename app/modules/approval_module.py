@@ -0,0 +1,242 @@
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+
+from django.core.exceptions import ValidationError
+from django.db.models import (
+    CharField,
+    Count,
+    DecimalField,
+    F,
+    IntegerField,
+    Q,
+    Subquery,
+    Value,
+)
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from app.models import Inventory, Order, PurchaseOrder
+from app.modules.pagination_module import (
+    KeysetPage,
+    add_links,
+    decode_cursor,
+    encode_cursor,
+    line_total,
+    page_size_param,
+    page_url,
+)
+
+# kind → (model, requested quantity, raised at)
+QUEUE_SOURCES = {
+    "po": (PurchaseOrder, "quantity", "created_at"),
+    "inventory": (Inventory, "inward_qty", "inward_date"),
+    "order": (Order, "quantity", "order_date"),
+}
+QUEUE_LABELS = {"po": "Purchase", "inventory": "Inward", "order": "Order"}
+QUEUE_DETAIL_URLS = {
+    "po": "po_approval_request_detail",
+    "inventory": "inventory_approval_request_detail",
+    "order": "order_approval_request_detail",
+}
+
+# public ?sort= name → (union column, whether the column runs opposite to it);
+# an older request has a greater age, so age follows raised_at backwards
+QUEUE_SORTS = {"age": ("raised_at", True), "value": ("value", False)}
+DEFAULT_QUEUE_SORT = "-age"  # oldest first
+
+_COLUMNS = (
+    "kind",
+    "row_id",
+    "product_name",
+    "product_code",
+    "vendor_name",
+    "vendor_code",
+    "qty",
+    "value",
+    "raised_at",
+    *(f"{kind}_count" for kind in QUEUE_SOURCES),
+)
+
+
+@dataclass(frozen=True)
+class QueueItem:
+    kind: str
+    id: int
+    product_name: str
+    product_code: str
+    vendor_name: Optional[str]
+    vendor_code: Optional[str]
+    qty: int
+    value: Decimal
+    raised_at: datetime
+
+    @property
+    def label(self) -> str:
+        return QUEUE_LABELS[self.kind]
+
+    @property
+    def detail_url_name(self) -> str:
+        return QUEUE_DETAIL_URLS[self.kind]
+
+    @property
+    def age(self):
+        return timezone.now() - self.raised_at
+
+
+def _pending(kind):
+    return QUEUE_SOURCES[kind][0].objects.filter(approval_status="PENDING")
+
+
+def _count_subquery(kind):
+    return Subquery(
+        _pending(kind).order_by().values("approval_status").annotate(n=Count("id")).values("n"),
+        output_field=IntegerField(),
+    )
+
+
+def _branch(kind):
+    """Pending rows of one model in the queue's common projection, carrying
+    every type's pending count so one round trip returns both."""
+    _, qty_field, raised_field = QUEUE_SOURCES[kind]
+    return (
+        _pending(kind)
+        .order_by()
+        .annotate(
+            kind=Value(kind, output_field=CharField()),
+            row_id=F("id"),
+            product_name=F("product__name"),
+            product_code=F("product__product_id"),
+            vendor_name=F("vendor__name"),
+            vendor_code=F("vendor__vendor_id"),
+            qty=F(qty_field),
+            value=line_total(qty_field),
+            raised_at=F(raised_field),
+            **{f"{other}_count": _count_subquery(other) for other in QUEUE_SOURCES},
+        )
+    )
+
+
+def pending_counts() -> Dict[str, int]:
+    """Pending approvals per type, in one query."""
+    kinds = list(QUEUE_SOURCES)
+    counts = [
+        _pending(kind)
+        .order_by()
+        .values("approval_status")
+        .annotate(kind=Value(kind, output_field=CharField()), n=Count("id"))
+        .values_list("kind", "n")
+        for kind in kinds
+    ]
+    found = dict(counts[0].union(*counts[1:], all=True))
+    return {kind: found.get(kind, 0) for kind in kinds}
+
+
+def _after(kind, column, value, cursor_kind, cursor_id, descending):
+    """Rows of ``kind`` strictly after (value, cursor_kind, cursor_id).
+
+    The union is ordered by (column, kind, id); ``kind`` is constant within
+    a branch, so each branch gets the reduced comparison.
+    """
+    op = "lt" if descending else "gt"
+    past_value = Q(**{f"{column}__{op}": value})
+    if kind == cursor_kind:
+        return past_value | Q(**{column: value, f"id__{op}": cursor_id})
+    if (kind > cursor_kind) != descending:
+        return past_value | Q(**{column: value})
+    return past_value
+
+
+def _cursor_value(column, raw):
+    if column == "raised_at":
+        value = parse_datetime(raw)
+        if value is None:
+            raise ValueError(raw)
+        return value
+    return DecimalField().to_python(raw)
+
+
+def approval_queue(request, kinds=None) -> Tuple[KeysetPage, Dict[str, int]]:
+    """One page of the pending approvals of ``kinds`` (default: all three
+    models), fetched with a single ``UNION ALL`` and keyset-paginated on
+    ``?sort=age|value`` with (type, id) as the tie-break.
+
+    Returns the page and the pending count per type; the counts ride along
+    on every row as scalar subqueries, so a non-empty page costs one query.
+    """
+    params = request.GET
+    kinds = [kind for kind in (kinds or QUEUE_SOURCES) if kind in QUEUE_SOURCES]
+
+    sort = params.get("sort") or DEFAULT_QUEUE_SORT
+    if sort.lstrip("-") not in QUEUE_SORTS:
+        sort = DEFAULT_QUEUE_SORT
+    column, inverted = QUEUE_SORTS[sort.lstrip("-")]
+    descending = sort.startswith("-") != inverted
+    page_size = page_size_param(params)
+
+    backwards = False
+    cursor = params.get("cursor")
+    boundary = None
+    if cursor:
+        try:
+            (raw, cursor_kind, cursor_id), backwards = decode_cursor(cursor)
+            boundary = (_cursor_value(column, raw), str(cursor_kind), int(cursor_id))
+        except (ValueError, TypeError, ValidationError):
+            cursor, backwards = None, False  # tampered / stale cursor → first page
+
+    walk_descending = descending != backwards
+    branches = []
+    for kind in kinds:
+        branch = _branch(kind)
+        if boundary:
+            branch = branch.filter(_after(kind, column, *boundary, walk_descending))
+        branches.append(branch.values(*_COLUMNS))
+
+    rows = []
+    if branches:
+        prefix = "-" if walk_descending else ""
+        union = branches[0].union(*branches[1:], all=True) if len(branches) > 1 else branches[0]
+        rows = list(
+            union.order_by(f"{prefix}{column}", f"{prefix}kind", f"{prefix}row_id")[
+                : page_size + 1
+            ]
+        )
+
+    if rows:
+        counts = {kind: rows[0][f"{kind}_count"] or 0 for kind in QUEUE_SOURCES}
+    else:
+        counts = pending_counts()
+
+    more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows.reverse()
+    items = [
+        QueueItem(
+            kind=row["kind"],
+            id=row["row_id"],
+            product_name=row["product_name"],
+            product_code=row["product_code"],
+            vendor_name=row["vendor_name"],
+            vendor_code=row["vendor_code"],
+            qty=row["qty"],
+            value=row["value"],
+            raised_at=row["raised_at"],
+        )
+        for row in rows
+    ]
+
+    def edge(item, going_back):
+        return encode_cursor([getattr(item, column), item.kind, item.id], going_back)
+
+    page = KeysetPage(object_list=items, sort=sort, page_size=page_size)
+    if items:
+        if more or backwards:
+            page.next_url = page_url(params, cursor=edge(items[-1], False))
+        if cursor and (more or not backwards):
+            page.previous_url = page_url(params, cursor=edge(items[0], True))
+    if cursor:
+        page.first_url = page_url(params, cursor=None)
+    add_links(page, params, QUEUE_SORTS)
+    return page, counts
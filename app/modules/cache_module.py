@@ -0,0 +1,154 @@
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import patch_cache_control
+
+KEY_PREFIX = "kmdv"
+
+# seconds an aggregate may be served even if no version bump reached the cache
+DEFAULT_TIMEOUT = getattr(settings, "KMDV_AGGREGATE_CACHE_TIMEOUT", 300)
+# how long a recomputation may hold the cross-process lock
+LOCK_TIMEOUT = 30
+# how long a waiting request polls for the winner's result before computing itself
+LOCK_WAIT = 5.0
+POLL_INTERVAL = 0.05
+
+_local_locks: dict = {}
+_local_locks_guard = threading.Lock()
+
+
+def _label(model) -> str:
+    return model if isinstance(model, str) else model._meta.label_lower
+
+
+def _version_key(model) -> str:
+    return f"{KEY_PREFIX}:version:{_label(model)}"
+
+
+def _changed_key(model) -> str:
+    return f"{KEY_PREFIX}:changed:{_label(model)}"
+
+
+def _fresh_version() -> int:
+    # time based, so a version that was evicted never restarts at an old value
+    return time.time_ns() // 1000
+
+
+def get_versions(models: Iterable) -> tuple:
+    keys = [_version_key(m) for m in models]
+    found = cache.get_many(keys)
+    versions = []
+    for key in keys:
+        if key not in found:
+            cache.add(key, _fresh_version(), None)
+            found[key] = cache.get(key)
+        versions.append(found[key])
+    return tuple(versions)
+
+
+def _bump(models) -> None:
+    now = time.time()
+    for model in models:
+        key = _version_key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _fresh_version(), None)
+        cache.set(_changed_key(model), now, None)
+
+
+def last_changed(models: Iterable) -> Optional[datetime]:
+    """When any of ``models`` was last written, if this cache has seen it."""
+    stamps = cache.get_many([_changed_key(m) for m in models]).values()
+    if not stamps:
+        return None
+    return datetime.fromtimestamp(int(max(stamps)), tz=timezone.utc)
+
+
+def bump_version(*models) -> None:
+    """Invalidate every cached aggregate that depends on ``models``.
+
+    Deferred until the surrounding transaction commits so a concurrent reader
+    cannot cache pre-commit data under the new version.
+    """
+    transaction.on_commit(lambda: _bump(models))
+
+
+def fingerprint(models: Iterable, params: Any = None) -> str:
+    """Stable hash of ``params`` and the current versions of ``models``."""
+    return hashlib.md5(
+        repr((params, get_versions(tuple(models)))).encode(), usedforsecurity=False
+    ).hexdigest()
+
+
+def make_key(namespace: str, models: Iterable, params: Any = None) -> str:
+    return f"{KEY_PREFIX}:agg:{namespace}:{fingerprint(models, params)}"
+
+
+def revalidate(response):
+    """Let the browser keep ``response`` but revalidate it with its ETag on
+    every use – for JSON that the views' ``condition`` decorators answer with
+    a 304 while nothing changed."""
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _local_lock(key: str) -> threading.Lock:
+    with _local_locks_guard:
+        return _local_locks.setdefault(key, threading.Lock())
+
+
+def cached(
+    namespace: str,
+    models: Iterable,
+    compute: Callable[[], Any],
+    *,
+    params: Any = None,
+    timeout: Optional[int] = None,
+) -> Any:
+    """Return ``compute()`` cached under the current versions of ``models``.
+
+    Concurrent misses on the same key recompute once: threads in this process
+    queue on a local lock, other processes wait on a ``cache.add`` lock and
+    poll for the winner's value.
+    """
+    key = make_key(namespace, models, params)
+    timeout = DEFAULT_TIMEOUT if timeout is None else timeout
+
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    try:
+        with _local_lock(key):
+            value = cache.get(key)
+            if value is not None:
+                return value
+
+            lock_key = f"{key}:lock"
+            owns_lock = cache.add(lock_key, 1, LOCK_TIMEOUT)
+            if not owns_lock:
+                deadline = time.monotonic() + LOCK_WAIT
+                while time.monotonic() < deadline:
+                    time.sleep(POLL_INTERVAL)
+                    value = cache.get(key)
+                    if value is not None:
+                        return value
+
+            try:
+                value = compute()
+                cache.set(key, value, timeout)
+            finally:
+                if owns_lock:
+                    cache.delete(lock_key)
+            return value
+    finally:
+        # on every exit – a hit, the winner's value, or compute() raising
+        with _local_locks_guard:
+            _local_locks.pop(key, None)
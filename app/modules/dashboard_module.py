@@ -0,0 +1,148 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Callable, Dict, List
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Count, DecimalField, F, Sum, Value
+from django.db.models.functions import Coalesce
+
+from app.models import Inventory, Order, OrderAllocation, Product, PurchaseOrder
+
+TOP_N = 3
+
+# Each worker holds its own DB connection, so the pool size also bounds the
+# connections the async dashboard can have open at once.
+ASYNC_WORKERS = getattr(settings, "KMDV_DASHBOARD_WORKERS", 4)
+_executor = ThreadPoolExecutor(
+    max_workers=ASYNC_WORKERS, thread_name_prefix="kmdv-dashboard"
+)
+
+ZERO = Value(0)
+ZERO_PRICE = Value(Decimal("0.00"), output_field=DecimalField(max_digits=14, decimal_places=2))
+
+
+def _line_value(qty_field: str, price_field: str = "product__price") -> Any:
+    """quantity * price (the list price by default), summed – NULL-safe for empty tables."""
+    return Coalesce(
+        Sum(
+            F(qty_field) * F(price_field),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        ),
+        ZERO_PRICE,
+    )
+
+
+@dataclass
+class DashboardMetrics:
+    """All KPI figures rendered on the dashboard."""
+
+    products_count: int = 0
+    orders_count: int = 0
+    total_orders: int = 0
+    total_order_price: Decimal = Decimal("0.00")
+    total_stock: int = 0
+    total_inward_qty: int = 0
+    total_stock_price: Decimal = Decimal("0.00")
+    total_po_orders: int = 0
+    total_po_order_price: Decimal = Decimal("0.00")
+    total_stock_cost: Decimal = Decimal("0.00")
+    total_cogs: Decimal = Decimal("0.00")
+    order_summary: List[Dict[str, Any]] = field(default_factory=list)
+    inventory_summary: List[Dict[str, Any]] = field(default_factory=list)
+
+    def as_context(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+
+# ----------------------------------------------------------------------------
+# one query per table
+# ----------------------------------------------------------------------------
+def order_totals() -> Dict[str, Any]:
+    return Order.objects.aggregate(
+        orders_count=Count("id"),
+        total_orders=Coalesce(Sum("quantity"), ZERO),
+        total_order_price=_line_value("quantity"),
+    )
+
+
+def inventory_totals() -> Dict[str, Any]:
+    return Inventory.objects.aggregate(
+        total_stock=Coalesce(Sum("stock_quantity"), ZERO),
+        total_inward_qty=Coalesce(Sum("inward_qty"), ZERO),
+        total_stock_price=_line_value("stock_quantity"),
+        total_stock_cost=_line_value("stock_quantity", "unit_cost"),
+    )
+
+
+def cogs_totals() -> Dict[str, Any]:
+    """FIFO cost of goods sold: every journalled lot draw at its lot cost."""
+    return OrderAllocation.objects.aggregate(total_cogs=_line_value("qty", "unit_cost"))
+
+
+def purchase_totals() -> Dict[str, Any]:
+    return PurchaseOrder.objects.aggregate(
+        total_po_orders=Coalesce(Sum("quantity"), ZERO),
+        total_po_order_price=_line_value("quantity"),
+    )
+
+
+def product_totals() -> Dict[str, Any]:
+    return {"products_count": Product.objects.count()}
+
+
+def top_orders(limit: int = TOP_N) -> Dict[str, Any]:
+    rows = (
+        Order.objects.values("product__name")
+        .annotate(total=Sum("quantity"))
+        .order_by("-total")[:limit]
+    )
+    return {"order_summary": list(rows)}
+
+
+def top_stock(limit: int = TOP_N) -> Dict[str, Any]:
+    rows = (
+        Inventory.objects.values("product__name")
+        .annotate(total=Sum("stock_quantity"))
+        .order_by("-total")[:limit]
+    )
+    return {"inventory_summary": list(rows)}
+
+
+# Independent of each other – callers may run them in any order.
+METRIC_QUERIES = (
+    product_totals,
+    order_totals,
+    inventory_totals,
+    purchase_totals,
+    cogs_totals,
+    top_orders,
+    top_stock,
+)
+
+
+def compute_dashboard_metrics() -> DashboardMetrics:
+    values: Dict[str, Any] = {}
+    for query in METRIC_QUERIES:
+        values.update(query())
+    return DashboardMetrics(**values)
+
+
+def _run_query(query: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    try:
+        return query()
+    finally:
+        close_old_connections()
+
+
+async def compute_dashboard_metrics_async() -> DashboardMetrics:
+    """Same figures as compute_dashboard_metrics, with the queries in parallel."""
+    run = sync_to_async(_run_query, thread_sensitive=False, executor=_executor)
+    results = await asyncio.gather(*(run(query) for query in METRIC_QUERIES))
+    values: Dict[str, Any] = {}
+    for result in results:
+        values.update(result)
+    return DashboardMetrics(**values)
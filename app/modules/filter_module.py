@@ -0,0 +1,197 @@
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from typing import Any, Dict, Tuple
+
+from django.conf import settings
+from django.contrib import messages
+from django.db.models import Q
+from django.http import HttpResponseBadRequest
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from app.modules.search_module import search_ids
+
+
+class FilterError(ValueError):
+    pass
+
+
+# ---------------------------------------------------------------------------
+# filter kinds
+# ---------------------------------------------------------------------------
+@dataclass(frozen=True)
+class Filter:
+    """One ``?param=`` of a list page, bound to a queryset field.
+
+    ``clean`` validates the raw string (raising ``FilterError``), ``lookups``
+    names the ORM lookups it compiles to and ``bind`` returns their values.
+    """
+
+    param: str
+    field: str
+
+    def clean(self, raw: str) -> Any:
+        return raw
+
+    def lookups(self) -> Tuple[str, ...]:
+        return (self.field,)
+
+    def bind(self, value) -> Tuple[Any, ...]:
+        return (value,)
+
+
+@dataclass(frozen=True)
+class IntFilter(Filter):
+    def clean(self, raw):
+        try:
+            return int(raw)
+        except ValueError:
+            raise FilterError(f"{self.param}: not a whole number") from None
+
+
+@dataclass(frozen=True)
+class DecimalFilter(Filter):
+    def clean(self, raw):
+        try:
+            value = Decimal(raw)
+        except InvalidOperation:
+            raise FilterError(f"{self.param}: not a number") from None
+        if not value.is_finite():
+            raise FilterError(f"{self.param}: not a number")
+        return value
+
+
+@dataclass(frozen=True)
+class ChoiceFilter(Filter):
+    choices: Tuple[str, ...] = ()
+
+    def clean(self, raw):
+        if raw not in self.choices:
+            raise FilterError(f"{self.param}: unknown value {raw!r}")
+        return raw
+
+
+@dataclass(frozen=True)
+class DateFilter(Filter):
+    """Calendar-day equality on a ``DateTimeField``, as a half-open
+    ``[day, day + 1)`` range in the current time zone so the column index
+    can be used (``__date`` wraps the column in a function)."""
+
+    def clean(self, raw):
+        try:
+            value = parse_date(raw)
+        except ValueError:
+            value = None
+        if value is None:
+            raise FilterError(f"{self.param}: expected YYYY-MM-DD")
+        return value
+
+    def lookups(self):
+        return (f"{self.field}__gte", f"{self.field}__lt")
+
+    def bind(self, value: date):
+        return (_start_of_day(value), _start_of_day(value + timedelta(days=1)))
+
+
+@dataclass(frozen=True)
+class SearchFilter(Filter):
+    """Substring match on a product / vendor, resolved to a primary-key set
+    through the search index. ``field`` is the foreign key column."""
+
+    kind: str = ""
+
+    def lookups(self):
+        return (f"{self.field}__in",)
+
+    def bind(self, value):
+        return (search_ids(self.kind, value),)
+
+
+def _start_of_day(day: date) -> datetime:
+    start = datetime.combine(day, time.min)
+    return timezone.make_aware(start) if settings.USE_TZ else start
+
+
+def choice_values(choices) -> Tuple[str, ...]:
+    return tuple(value for value, _ in choices)
+
+
+# ---------------------------------------------------------------------------
+# spec
+# ---------------------------------------------------------------------------
+@dataclass
+class ParsedFilters:
+    spec: "FilterSpec"
+    values: Dict[str, Any] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def shape(self) -> frozenset:
+        return frozenset(self.values)
+
+    @property
+    def q(self) -> Q:
+        return self.spec.query(self)
+
+    @property
+    def cache_params(self) -> tuple:
+        """Cleaned values in a stable order – equivalent query strings share a key."""
+        return tuple(sorted((name, repr(value)) for name, value in self.values.items()))
+
+
+class FilterSpec:
+    """Declarative filters for one list view.
+
+    ``parse`` validates the query string once; invalid or blank values are
+    dropped (and listed in ``errors``). The lookups used for each set of
+    present parameters are compiled once and cached per spec.
+    """
+
+    def __init__(self, *filters: Filter):
+        self.filters = {f.param: f for f in filters}
+        self._plan = lru_cache(maxsize=128)(self._compile)
+
+    def parse(self, querydict) -> ParsedFilters:
+        parsed = ParsedFilters(spec=self)
+        for param, spec in self.filters.items():
+            raw = querydict.get(param)
+            if not raw:
+                continue
+            try:
+                parsed.values[param] = spec.clean(raw)
+            except FilterError as exc:
+                parsed.errors[param] = str(exc)
+        return parsed
+
+    def _compile(self, shape: frozenset) -> Tuple[Tuple[Filter, Tuple[str, ...]], ...]:
+        return tuple(
+            (spec, spec.lookups()) for param, spec in self.filters.items() if param in shape
+        )
+
+    def query(self, parsed: ParsedFilters) -> Q:
+        kwargs = {}
+        for spec, lookups in self._plan(parsed.shape):
+            kwargs.update(zip(lookups, spec.bind(parsed.values[spec.param])))
+        return Q(**kwargs)
+
+
+# ---------------------------------------------------------------------------
+# reporting invalid values
+# ---------------------------------------------------------------------------
+def report_errors(request, parsed: ParsedFilters) -> None:
+    """Tell a list page's user which filters were ignored."""
+    for error in parsed.errors.values():
+        messages.warning(
+            request, f"Filter ignored – {error}", extra_tags="auto-dismiss page-specific"
+        )
+
+
+def invalid_filters(parsed: ParsedFilters) -> HttpResponseBadRequest:
+    """The 400 an export answers invalid filters with – dropping them there
+    would silently export more rows than were asked for."""
+    return HttpResponseBadRequest(
+        "Invalid filters: " + "; ".join(parsed.errors.values()),
+        content_type="text/plain; charset=utf-8",
+    )
@@ -0,0 +1,107 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+from django.db import transaction
+
+from app.models import Order, OrderBatch
+from app.modules import snapshot_module
+from app.modules.allocation_module import allocate_many, record_allocations, split_plan
+from app.modules.cache_module import bump_version
+from app.modules.stock_module import lock_balances
+
+
+@dataclass(frozen=True)
+class OrderLine:
+    product_id: int
+    vendor_id: int
+    quantity: int
+
+    @property
+    def pair(self) -> Tuple[int, int]:
+        return (self.product_id, self.vendor_id)
+
+
+class LinesShort(Exception):
+    """Some lines ask for more than their (product, vendor) has in stock.
+
+    ``shortages`` maps each short pair to (available, requested) – the
+    requested quantity summed over every line of that pair.
+    """
+
+    def __init__(self, shortages: Dict[Tuple[int, int], Tuple[int, int]]):
+        self.shortages = shortages
+        super().__init__(f"{len(shortages)} product/vendor pair(s) short of stock")
+
+
+def parse_lines(post) -> Tuple[List[OrderLine], List[str]]:
+    """Order lines from the repeated ``product`` / ``vendor`` / ``qty`` fields
+    of a multi-line order form. Fully blank rows are skipped."""
+    lines, errors = [], []
+    rows = zip(post.getlist("product"), post.getlist("vendor"), post.getlist("qty"))
+    for number, (product, vendor, qty) in enumerate(rows, start=1):
+        if not (product or vendor or qty):
+            continue
+        try:
+            line = OrderLine(int(product), int(vendor), int(qty))
+        except ValueError:
+            errors.append(f"Line {number}: choose a product, a vendor and a whole quantity.")
+            continue
+        if line.quantity < 1:
+            errors.append(f"Line {number}: quantity must be at least 1.")
+            continue
+        lines.append(line)
+    return lines, errors
+
+
+@transaction.atomic
+def place_order_batch(user, lines: Sequence[OrderLine]) -> OrderBatch:
+    """Create a multi-line order in one transaction.
+
+    Every pair's balance is locked and checked in one query, stock for all
+    lines is allocated FIFO in bulk, and the lines are inserted with one
+    ``bulk_create`` – the query count does not grow with the line count.
+    Raises ``LinesShort`` (nothing written) if any pair lacks stock.
+    """
+    requested = defaultdict(int)
+    for line in lines:
+        requested[line.pair] += line.quantity
+
+    available = lock_balances(requested)
+    shortages = {
+        pair: (available[pair], qty) for pair, qty in requested.items() if available[pair] < qty
+    }
+    if shortages:
+        raise LinesShort(shortages)
+
+    plans = allocate_many(requested)
+
+    batch = OrderBatch.objects.create(user=user)
+    orders = Order.objects.bulk_create(
+        Order(
+            user=user,
+            product_id=line.product_id,
+            vendor_id=line.vendor_id,
+            quantity=line.quantity,
+            batch=batch,
+        )
+        for line in lines
+    )
+
+    # bulk_create skips the Order signals – apply their effects here
+    by_pair = defaultdict(list)
+    ordered = defaultdict(lambda: {"order_qty": 0, "orders": 0})
+    for order in orders:
+        by_pair[order.product_id, order.vendor_id].append(order)
+        ordered[order.product_id]["order_qty"] += order.quantity
+        ordered[order.product_id]["orders"] += 1
+    record_allocations(
+        (order, lots)
+        for pair, pair_orders in by_pair.items()
+        for order, lots in zip(
+            pair_orders, split_plan(plans[pair], [order.quantity for order in pair_orders])
+        )
+    )
+    snapshot_module.apply_deltas(ordered)
+    bump_version(Order)
+    return batch
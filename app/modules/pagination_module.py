@@ -0,0 +1,156 @@
+import base64
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import DecimalField, F, Q
+from django.db.models.functions import Round
+
+DEFAULT_PAGE_SIZE = getattr(settings, "KMDV_LIST_PAGE_SIZE", 50)
+MAX_PAGE_SIZE = 500
+PAGE_SIZE_CHOICES = (25, 50, 100, 250)
+
+
+def line_total(qty_field: str, price_field: str = "product__price") -> Round:
+    """``qty × price`` rounded to paise in SQL. SQLite multiplies decimals as
+    floats, and an unrounded product never equals a keyset cursor's (or a
+    filter's) value, so every sortable total is annotated through this."""
+    return Round(
+        F(qty_field) * F(price_field),
+        2,
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+@dataclass
+class KeysetPage:
+    object_list: List[Any]
+    sort: str
+    page_size: int
+    next_url: Optional[str] = None
+    previous_url: Optional[str] = None
+    first_url: Optional[str] = None
+    sort_links: Dict[str, str] = field(default_factory=dict)
+    size_links: Dict[int, str] = field(default_factory=dict)
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_url is not None
+
+    @property
+    def has_previous(self) -> bool:
+        return self.previous_url is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def encode_cursor(values, backwards: bool) -> str:
+    raw = json.dumps([values, backwards], default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    padded = cursor + "=" * (-len(cursor) % 4)
+    values, backwards = json.loads(base64.urlsafe_b64decode(padded))
+    return values, bool(backwards)
+
+
+def page_size_param(params) -> int:
+    try:
+        page_size = int(params.get("page_size") or DEFAULT_PAGE_SIZE)
+    except ValueError:
+        page_size = DEFAULT_PAGE_SIZE
+    return min(max(page_size, 1), MAX_PAGE_SIZE)
+
+
+def add_links(page: KeysetPage, params, sort_names) -> None:
+    """Fill the sort-toggle and page-size links; both restart at page one."""
+    for name in sort_names:
+        toggled = name if page.sort == f"-{name}" else f"-{name}"
+        page.sort_links[name] = page_url(params, sort=toggled, cursor=None)
+    for size in PAGE_SIZE_CHOICES:
+        page.size_links[size] = page_url(params, page_size=str(size), cursor=None)
+
+
+def _output_field(qs, name):
+    if name in qs.query.annotations:
+        return qs.query.annotations[name].output_field
+    return qs.model._meta.get_field(name)
+
+
+def page_url(querydict, **changes) -> str:
+    params = querydict.copy()
+    for key, value in changes.items():
+        if value is None:
+            params.pop(key, None)
+        else:
+            params[key] = value
+    return f"?{params.urlencode()}"
+
+
+def _after(field_name, value, pk, descending):
+    """Rows strictly after (value, pk) in the given direction."""
+    op = "lt" if descending else "gt"
+    if field_name == "id":
+        return Q(**{f"id__{op}": pk})
+    return Q(**{f"{field_name}__{op}": value}) | Q(**{field_name: value, f"id__{op}": pk})
+
+
+def keyset_paginate(request, qs, *, sort_fields: Dict[str, str], default_sort="-id"):
+    """Cursor pagination over ``qs`` ordered by a whitelisted column plus ``id``.
+
+    ``sort_fields`` maps the public ``?sort=`` names to queryset fields (model
+    fields or annotations). The cursor carries the boundary row's sort value
+    and id, so deep pages cost the same as the first one – no OFFSET.
+    """
+    params = request.GET
+
+    sort = params.get("sort") or default_sort
+    descending = sort.startswith("-")
+    if sort.lstrip("-") not in sort_fields:
+        sort = default_sort
+        descending = sort.startswith("-")
+    field_name = sort_fields[sort.lstrip("-")]
+
+    page_size = page_size_param(params)
+
+    backwards = False
+    cursor = params.get("cursor")
+    if cursor:
+        try:
+            (value, pk), backwards = decode_cursor(cursor)
+            value = _output_field(qs, field_name).to_python(value)
+            qs = qs.filter(_after(field_name, value, int(pk), descending != backwards))
+        except (ValueError, TypeError, ValidationError):
+            cursor, backwards = None, False  # tampered / stale cursor → first page
+
+    walk_descending = descending != backwards
+    prefix = "-" if walk_descending else ""
+    ordering = [f"{prefix}{field_name}"] if field_name != "id" else []
+    rows = list(qs.order_by(*ordering, f"{prefix}id")[: page_size + 1])
+
+    more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows.reverse()
+
+    def boundary(obj, going_back):
+        return encode_cursor([getattr(obj, field_name), obj.pk], going_back)
+
+    page = KeysetPage(object_list=rows, sort=sort, page_size=page_size)
+    if rows:
+        if more or backwards:
+            page.next_url = page_url(params, cursor=boundary(rows[-1], False))
+        if cursor and (more or not backwards):
+            page.previous_url = page_url(params, cursor=boundary(rows[0], True))
+    if cursor:
+        page.first_url = page_url(params, cursor=None)
+
+    add_links(page, params, sort_fields)
+    return page
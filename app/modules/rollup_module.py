@@ -0,0 +1,133 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Max, Q, Sum
+from django.db.models.functions import TruncDate
+
+from app.models import DailyRollup, Inventory, Order, PurchaseOrder, RollupWatermark
+from app.modules.cache_module import bump_version
+
+# source name → (model, timestamp field, quantity field, rollup qty, rollup value)
+SOURCES = {
+    "order": (Order, "order_date", "quantity", "ordered_qty", "ordered_value"),
+    "purchase": (PurchaseOrder, "created_at", "quantity", "po_qty", "po_value"),
+    "inventory": (Inventory, "inward_date", "inward_qty", "inward_qty", None),
+}
+ROLLUP_FIELDS = ["ordered_qty", "ordered_value", "po_qty", "po_value", "inward_qty"]
+
+
+def _after(ts_field, timestamp, last_id):
+    return Q(**{f"{ts_field}__gt": timestamp}) | Q(
+        **{ts_field: timestamp, "id__gt": last_id}
+    )
+
+
+def _upto(ts_field, timestamp, last_id):
+    return Q(**{f"{ts_field}__lt": timestamp}) | Q(
+        **{ts_field: timestamp, "id__lte": last_id}
+    )
+
+
+def _collect(source, watermark) -> Dict[tuple, Dict[str, object]]:
+    """Grouped day totals for the source rows newer than ``watermark``.
+
+    Moves the watermark to the newest row included; rows written while this
+    runs are left for the next run.
+    """
+    model, ts_field, qty_field, qty_target, value_target = SOURCES[source]
+    qs = model.objects.all()
+    if watermark.last_timestamp is not None:
+        qs = qs.filter(_after(ts_field, watermark.last_timestamp, watermark.last_id))
+
+    newest = qs.order_by(f"-{ts_field}", "-id").values_list(ts_field, "id").first()
+    if newest is None:
+        return {}
+    qs = qs.filter(_upto(ts_field, *newest))
+
+    annotations = {"qty": Sum(qty_field)}
+    if value_target:
+        annotations["value"] = Sum(
+            F(qty_field) * F("product__price"),
+            output_field=DecimalField(max_digits=16, decimal_places=2),
+        )
+    rows = (
+        qs.annotate(day=TruncDate(ts_field))
+        .values("day", "product_id", "vendor_id")
+        .annotate(**annotations)
+        .order_by()
+    )
+
+    deltas = {}
+    for row in rows:
+        delta = {qty_target: row["qty"] or 0}
+        if value_target:
+            delta[value_target] = row["value"] or Decimal("0.00")
+        deltas[(row["day"], row["product_id"], row["vendor_id"])] = delta
+
+    watermark.last_timestamp, watermark.last_id = newest
+    watermark.save()
+    return deltas
+
+
+def _merge(deltas: Dict[tuple, Dict[str, object]]) -> int:
+    days = {key[0] for key in deltas}
+    existing = {
+        (r.date, r.product_id, r.vendor_id): r
+        for r in DailyRollup.objects.filter(date__in=days)
+    }
+    to_update, to_create = [], []
+    for key, delta in deltas.items():
+        row = existing.get(key)
+        if row is None:
+            to_create.append(
+                DailyRollup(date=key[0], product_id=key[1], vendor_id=key[2], **delta)
+            )
+            continue
+        for name, value in delta.items():
+            setattr(row, name, getattr(row, name) + value)
+        to_update.append(row)
+
+    DailyRollup.objects.bulk_create(to_create, batch_size=1000)
+    DailyRollup.objects.bulk_update(to_update, ROLLUP_FIELDS, batch_size=1000)
+    return len(to_create) + len(to_update)
+
+
+def rollup_state() -> Tuple[Optional[datetime], int, int]:
+    """Version of the rollup as recorded in the database: every run that
+    folds rows in moves a watermark, and a full rebuild recreates them.
+
+    ``build_daily_rollup`` runs in its own process, so its cache-version bump
+    never reaches the web workers' (per-process) cache – readers key on this.
+    """
+    state = RollupWatermark.objects.aggregate(
+        changed=Max("updated_at"), sources=Count("id"), ids=Sum("last_id")
+    )
+    return state["changed"], state["sources"], state["ids"] or 0
+
+
+@transaction.atomic
+def run_rollup(full: bool = False) -> int:
+    """Fold new order / PO / inward rows into ``DailyRollup``.
+
+    Rows are picked up once, by their creation timestamp; later edits to
+    already-rolled-up rows are only reflected by a ``full`` rebuild.
+    Returns the number of rollup rows written.
+    """
+    if full:
+        DailyRollup.objects.all().delete()
+        RollupWatermark.objects.all().delete()
+
+    merged: Dict[tuple, Dict[str, object]] = {}
+    for source in SOURCES:
+        watermark, _ = RollupWatermark.objects.select_for_update().get_or_create(
+            source=source
+        )
+        for key, delta in _collect(source, watermark).items():
+            merged.setdefault(key, {}).update(delta)
+
+    written = _merge(merged) if merged else 0
+    if written or full:
+        bump_version(DailyRollup)
+    return written
@@ -0,0 +1,161 @@
+from typing import Dict, Iterable, List, Set, Tuple
+
+from django.db import connection, transaction
+from django.db.models import Count, Q
+
+from app.models import Product, SearchNgram, Vendor
+
+FTS_TABLE = "app_search_fts"
+GRAM = 3
+
+# kind → (model, searchable fields); the FTS table has one column per field slot
+KINDS: Dict[str, Tuple[type, Tuple[str, str]]] = {
+    "product": (Product, ("name", "product_id")),
+    "vendor": (Vendor, ("name", "vendor_id")),
+}
+FTS_COLUMNS = ("name", "code")
+
+# database NAME → whether the FTS table exists (checked once per database)
+_fts_tables: Dict[str, bool] = {}
+
+
+def fts_enabled() -> bool:
+    """The FTS table was created by the search-index migration."""
+    if connection.vendor != "sqlite":
+        return False
+    name = str(connection.settings_dict["NAME"])
+    if name not in _fts_tables:
+        _fts_tables[name] = FTS_TABLE in connection.introspection.table_names()
+    return _fts_tables[name]
+
+
+# ---------------------------------------------------------------------------
+# index maintenance
+# ---------------------------------------------------------------------------
+def _grams(text: str) -> Set[str]:
+    text = (text or "").lower()
+    return {text[i : i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+def _values(kind, obj) -> List[str]:
+    _, fields = KINDS[kind]
+    return [str(getattr(obj, f) or "") for f in fields]
+
+
+def _write(kind, objects: Iterable) -> None:
+    objects = list(objects)
+    if not objects:
+        return
+    if fts_enabled():
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (kind, object_id, name, code) VALUES (%s, %s, %s, %s)",
+                [(kind, obj.pk, *_values(kind, obj)) for obj in objects],
+            )
+        return
+    SearchNgram.objects.bulk_create(
+        (
+            SearchNgram(kind=kind, field=column, object_id=obj.pk, gram=gram)
+            for obj in objects
+            for column, value in zip(FTS_COLUMNS, _values(kind, obj))
+            for gram in _grams(value)
+        ),
+        batch_size=2000,
+    )
+
+
+def unindex_object(kind: str, pk) -> None:
+    unindex_objects(kind, [pk])
+
+
+def unindex_objects(kind: str, pks: Iterable) -> None:
+    pks = list(pks)
+    if not pks:
+        return
+    if fts_enabled():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE kind = %s AND object_id IN "
+                f"({', '.join(['%s'] * len(pks))})",
+                [kind, *pks],
+            )
+    else:
+        SearchNgram.objects.filter(kind=kind, object_id__in=pks).delete()
+
+
+def index_object(kind: str, obj) -> None:
+    with transaction.atomic():
+        unindex_object(kind, obj.pk)
+        _write(kind, [obj])
+
+
+@transaction.atomic
+def rebuild_index() -> Dict[str, int]:
+    """Re-create the index for every product and vendor."""
+    if fts_enabled():
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+    SearchNgram.objects.all().delete()
+
+    counts = {}
+    for kind, (model, fields) in KINDS.items():
+        objects = model.objects.only("pk", *fields)
+        _write(kind, objects.iterator(chunk_size=2000))
+        counts[kind] = objects.count()
+    return counts
+
+
+# ---------------------------------------------------------------------------
+# lookup
+# ---------------------------------------------------------------------------
+def _scan(kind: str, term: str) -> List[int]:
+    model, fields = KINDS[kind]
+    query = Q()
+    for f in fields:
+        query |= Q(**{f"{f}__icontains": term})
+    return list(model.objects.filter(query).values_list("pk", flat=True))
+
+
+def _fts_ids(kind: str, term: str) -> List[int]:
+    phrase = '"' + term.replace('"', '""') + '"'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT object_id FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND kind = %s",
+            ["{name code} : " + phrase, kind],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _ngram_ids(kind: str, term: str) -> List[int]:
+    grams = _grams(term)
+    candidates = set(
+        SearchNgram.objects.filter(kind=kind, gram__in=grams)
+        .values("object_id", "field")
+        .annotate(hits=Count("gram", distinct=True))
+        .filter(hits=len(grams))
+        .values_list("object_id", flat=True)
+    )
+    if not candidates:
+        return []
+    # every trigram present does not guarantee the substring – confirm by pk
+    model, fields = KINDS[kind]
+    query = Q()
+    for f in fields:
+        query |= Q(**{f"{f}__icontains": term})
+    return list(
+        model.objects.filter(query, pk__in=candidates).values_list("pk", flat=True)
+    )
+
+
+def search_ids(kind: str, term: str) -> List[int]:
+    """Primary keys of ``kind`` rows whose name or code contains ``term``
+    (case-insensitive) – the same match as the old ``icontains`` filters."""
+    if not term:
+        return []
+    if len(term) < GRAM:
+        # too short for a trigram; the dimension tables are small enough to scan
+        return _scan(kind, term)
+    if fts_enabled():
+        return _fts_ids(kind, term)
+    return _ngram_ids(kind, term)
@@ -0,0 +1,352 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from decimal import Decimal
+from typing import Dict, Iterable, Optional
+
+from django.db import transaction
+from django.db.models import BigIntegerField, Case, DecimalField, F, Sum, When
+
+from app.models import (
+    DashboardProductTotal,
+    DashboardSnapshot,
+    Inventory,
+    Order,
+    Product,
+    PurchaseOrder,
+)
+from app.modules import search_module, stock_module
+from app.modules.dashboard_module import (
+    TOP_N,
+    DashboardMetrics,
+    compute_dashboard_metrics,
+)
+
+SNAPSHOT_PK = 1
+
+
+def product_price(product_id) -> Decimal:
+    price = Product.objects.filter(pk=product_id).values_list("price", flat=True).first()
+    return price if price is not None else Decimal("0.00")
+
+
+# product quantities also kept per product in DashboardProductTotal
+PRODUCT_TOTALS = {"stock": "stock_qty", "order_qty": "order_qty", "po_qty": "po_qty"}
+
+
+def _increments(
+    price: Decimal,
+    *,
+    stock=0,
+    inward=0,
+    order_qty=0,
+    orders=0,
+    po_qty=0,
+    products=0,
+    stock_cost=0,
+    cogs=0,
+) -> Dict[str, Decimal]:
+    """Snapshot field → amount to add, for one product's movements."""
+    return {
+        "products_count": products,
+        "orders_count": orders,
+        "total_orders": order_qty,
+        "total_order_price": order_qty * price,
+        "total_stock": stock,
+        "total_inward_qty": inward,
+        "total_stock_price": stock * price,
+        "total_po_orders": po_qty,
+        "total_po_order_price": po_qty * price,
+        "total_stock_cost": stock_cost,
+        "total_cogs": cogs,
+    }
+
+
+def _update_snapshot(increments: Dict[str, Decimal]) -> int:
+    return DashboardSnapshot.objects.filter(pk=SNAPSHOT_PK).update(
+        **{name: F(name) + amount for name, amount in increments.items()}
+    )
+
+
+def apply_delta(
+    product_id,
+    *,
+    price: Optional[Decimal] = None,
+    stock: int = 0,
+    inward: int = 0,
+    order_qty: int = 0,
+    orders: int = 0,
+    po_qty: int = 0,
+    products: int = 0,
+    stock_cost: Decimal = 0,
+    cogs: Decimal = 0,
+) -> None:
+    """Add (or subtract) movement quantities to the running totals.
+
+    ``stock_cost`` and ``cogs`` are already valued (lot quantity × lot unit
+    cost); the other quantities are valued at the product's list price.
+
+    Nothing happens until a snapshot has been built – the dashboard falls back
+    to live aggregation in that case, and the first rebuild starts from the
+    real table contents.
+    """
+    if not any((stock, inward, order_qty, orders, po_qty, products, stock_cost, cogs)):
+        return
+    batch = _batch.get()
+    if batch is not None:
+        movements = batch["products"][product_id]
+        for name, amount in (
+            ("stock", stock),
+            ("inward", inward),
+            ("order_qty", order_qty),
+            ("orders", orders),
+            ("po_qty", po_qty),
+            ("products", products),
+            ("stock_cost", stock_cost),
+            ("cogs", cogs),
+        ):
+            movements[name] += amount
+        return
+    if price is None and (stock or order_qty or po_qty):
+        price = product_price(product_id)
+    price = price or Decimal("0.00")
+
+    updated = _update_snapshot(
+        _increments(
+            price,
+            stock=stock,
+            inward=inward,
+            order_qty=order_qty,
+            orders=orders,
+            po_qty=po_qty,
+            products=products,
+            stock_cost=stock_cost,
+            cogs=cogs,
+        )
+    )
+    if not updated or not any((stock, order_qty, po_qty)):
+        return
+
+    touched = DashboardProductTotal.objects.filter(product_id=product_id).update(
+        stock_qty=F("stock_qty") + stock,
+        order_qty=F("order_qty") + order_qty,
+        po_qty=F("po_qty") + po_qty,
+    )
+    # a missing row with a negative delta means the product is being deleted
+    if not touched and max(stock, order_qty, po_qty) > 0:
+        DashboardProductTotal.objects.create(
+            product_id=product_id, stock_qty=stock, order_qty=order_qty, po_qty=po_qty
+        )
+
+
+def apply_deltas(deltas: Dict[int, Dict], prices: Optional[Dict[int, Decimal]] = None) -> None:
+    """``apply_delta`` for many products at once – {product_id: movements} –
+    in a fixed number of queries: one price lookup, one snapshot UPDATE, and
+    one UPDATE (plus an insert of new rows) for the per-product totals.
+    Used by bulk writes, which skip the model signals. ``prices`` are used
+    as given for the products they cover (e.g. ones deleted meanwhile)."""
+    deltas = {pid: delta for pid, delta in deltas.items() if any(delta.values())}
+    if not deltas:
+        return
+    prices = dict(prices or {})
+    missing = [pid for pid in deltas if pid not in prices]
+    if missing:
+        prices.update(Product.objects.filter(pk__in=missing).values_list("pk", "price"))
+
+    increments = defaultdict(int)
+    for pid, delta in deltas.items():
+        for name, amount in _increments(prices.get(pid) or Decimal("0.00"), **delta).items():
+            increments[name] += amount
+    if not _update_snapshot(increments):
+        return
+
+    per_product = {
+        pid: {col: delta.get(name, 0) for name, col in PRODUCT_TOTALS.items()}
+        for pid, delta in deltas.items()
+        if any(delta.get(name) for name in PRODUCT_TOTALS)
+    }
+    if not per_product:
+        return
+    existing = set(
+        DashboardProductTotal.objects.filter(product_id__in=per_product).values_list(
+            "product_id", flat=True
+        )
+    )
+    if existing:
+        DashboardProductTotal.objects.filter(product_id__in=existing).update(
+            **{
+                col: Case(
+                    *(
+                        When(product_id=pid, then=F(col) + per_product[pid][col])
+                        for pid in existing
+                    ),
+                    default=F(col),
+                    output_field=BigIntegerField(),
+                )
+                for col in PRODUCT_TOTALS.values()
+            }
+        )
+    DashboardProductTotal.objects.bulk_create(
+        DashboardProductTotal(product_id=pid, **cols)
+        for pid, cols in per_product.items()
+        if pid not in existing and max(cols.values()) > 0
+    )
+
+
+# the batch open in this context, if any – see ``batched_deltas``
+_batch: ContextVar[Optional[dict]] = ContextVar("snapshot_batch", default=None)
+
+
+def open_batch() -> Optional[dict]:
+    return _batch.get()
+
+
+@contextmanager
+def batched_deltas(products=None, orders=None):
+    """Collect the signal-driven snapshot and stock-balance deltas (and
+    search-index removals) and apply them on exit with ``apply_deltas``/
+    ``apply_stock_deltas``.
+
+    For cascading deletes (a product, a category, a user): their per-row
+    signals would otherwise cost a few queries for every order, lot and PO.
+    ``products`` about to be deleted have their prices read up front, and
+    ``orders`` about to be deleted have their COGS withdrawn up front – the
+    per-order handler skips while a batch is open. Nested uses join the outer
+    batch.
+    """
+    if _batch.get() is not None:
+        yield
+        return
+    batch = {
+        "products": defaultdict(lambda: defaultdict(int)),
+        "stock": defaultdict(int),
+        "unindex": defaultdict(set),
+    }
+    token = _batch.set(batch)
+    try:
+        with transaction.atomic():
+            prices = (
+                dict(products.values_list("pk", "price")) if products is not None else {}
+            )
+            if orders is not None:
+                cogs = (
+                    orders.filter(allocations__isnull=False)
+                    .values("product_id")
+                    .annotate(
+                        cost=Sum(
+                            F("allocations__qty") * F("allocations__unit_cost"),
+                            output_field=DecimalField(max_digits=16, decimal_places=2),
+                        )
+                    )
+                    .values_list("product_id", "cost")
+                    .order_by()
+                )
+                for product_id, cost in cogs:
+                    batch["products"][product_id]["cogs"] -= cost
+            yield
+            apply_deltas(
+                {pid: dict(movements) for pid, movements in batch["products"].items()},
+                prices=prices,
+            )
+            stock_module.apply_stock_deltas(batch["stock"])
+            for kind, pks in batch["unindex"].items():
+                search_module.unindex_objects(kind, pks)
+    finally:
+        _batch.reset(token)
+
+
+def apply_price_change(product_id, old_price: Decimal, new_price: Decimal) -> None:
+    """Re-value a product's quantities after its list price changed.
+
+    ``new_price`` may still be the raw POSTed string when the view assigned it
+    directly, so both sides are coerced to Decimal.
+    """
+    diff = Decimal(str(new_price or 0)) - Decimal(str(old_price or 0))
+    if not diff:
+        return
+    row = DashboardProductTotal.objects.filter(product_id=product_id).first()
+    if row is None:
+        return
+    DashboardSnapshot.objects.filter(pk=SNAPSHOT_PK).update(
+        total_order_price=F("total_order_price") + row.order_qty * diff,
+        total_stock_price=F("total_stock_price") + row.stock_qty * diff,
+        total_po_order_price=F("total_po_order_price") + row.po_qty * diff,
+    )
+
+
+def _grouped(qs, field) -> Dict[int, int]:
+    return dict(
+        qs.values("product_id").annotate(t=Sum(field)).values_list("product_id", "t")
+    )
+
+
+@transaction.atomic
+def rebuild_snapshot() -> DashboardSnapshot:
+    """Recompute every running total from the transactional tables."""
+    metrics = compute_dashboard_metrics()
+    fields = {
+        name: getattr(metrics, name)
+        for name in (
+            "products_count",
+            "orders_count",
+            "total_orders",
+            "total_order_price",
+            "total_stock",
+            "total_inward_qty",
+            "total_stock_price",
+            "total_po_orders",
+            "total_po_order_price",
+            "total_stock_cost",
+            "total_cogs",
+        )
+    }
+    DashboardSnapshot.objects.filter(pk=SNAPSHOT_PK).delete()
+    snapshot = DashboardSnapshot.objects.create(pk=SNAPSHOT_PK, **fields)
+
+    stock = _grouped(Inventory.objects, "stock_quantity")
+    ordered = _grouped(Order.objects, "quantity")
+    purchased = _grouped(PurchaseOrder.objects, "quantity")
+
+    DashboardProductTotal.objects.all().delete()
+    DashboardProductTotal.objects.bulk_create(
+        DashboardProductTotal(
+            product_id=pid,
+            stock_qty=stock.get(pid) or 0,
+            order_qty=ordered.get(pid) or 0,
+            po_qty=purchased.get(pid) or 0,
+        )
+        for pid in set(stock) | set(ordered) | set(purchased)
+    )
+    return snapshot
+
+
+def _top(order_field: str, limit: int) -> Iterable[Dict]:
+    rows = (
+        DashboardProductTotal.objects.filter(**{f"{order_field}__gt": 0})
+        .order_by(f"-{order_field}")
+        .values_list("product__name", order_field)[:limit]
+    )
+    return [{"product__name": name, "total": total} for name, total in rows]
+
+
+def snapshot_metrics(limit: int = TOP_N) -> DashboardMetrics:
+    """Dashboard figures read from the snapshot, building it on first use."""
+    snapshot = DashboardSnapshot.objects.filter(pk=SNAPSHOT_PK).first()
+    if snapshot is None:
+        snapshot = rebuild_snapshot()
+
+    return DashboardMetrics(
+        products_count=snapshot.products_count,
+        orders_count=snapshot.orders_count,
+        total_orders=snapshot.total_orders,
+        total_order_price=snapshot.total_order_price,
+        total_stock=snapshot.total_stock,
+        total_inward_qty=snapshot.total_inward_qty,
+        total_stock_price=snapshot.total_stock_price,
+        total_po_orders=snapshot.total_po_orders,
+        total_po_order_price=snapshot.total_po_order_price,
+        total_stock_cost=snapshot.total_stock_cost,
+        total_cogs=snapshot.total_cogs,
+        order_summary=_top("order_qty", limit),
+        inventory_summary=_top("stock_qty", limit),
+    )
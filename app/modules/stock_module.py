@@ -0,0 +1,178 @@
+import gzip
+import hashlib
+import json
+from functools import reduce
+from operator import or_
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import BigIntegerField, Case, F, Q, Sum, When
+from django.utils import timezone
+
+from app.models import Inventory, StockBalance, Vendor
+from app.modules.cache_module import cached
+
+# stock moves (inward, orders, allocations) bump Inventory; vendor edits and
+# deletes bump Vendor
+STOCK_MAP_MODELS = (Inventory, Vendor)
+
+
+def apply_stock_delta(product_id, vendor_id, qty: int) -> None:
+    """Add ``qty`` (negative to remove) to the pair's balance row."""
+    if not qty or product_id is None or vendor_id is None:
+        return
+    pair = StockBalance.objects.filter(product_id=product_id, vendor_id=vendor_id)
+    if pair.update(quantity=F("quantity") + qty, updated_at=timezone.now()):
+        return
+    # a missing row with a negative delta means the product/vendor is being deleted
+    if qty < 0:
+        return
+    try:
+        with transaction.atomic():
+            StockBalance.objects.create(
+                product_id=product_id, vendor_id=vendor_id, quantity=qty
+            )
+    except IntegrityError:
+        # created concurrently – add to the winner's row
+        pair.update(quantity=F("quantity") + qty, updated_at=timezone.now())
+
+
+def apply_stock_deltas(deltas: Dict[tuple, int]) -> None:
+    """``apply_stock_delta`` for many pairs with one UPDATE. The pairs' rows
+    must exist – callers hold them locked (``lock_balances``)."""
+    deltas = {pair: qty for pair, qty in deltas.items() if qty}
+    if not deltas:
+        return
+    StockBalance.objects.filter(pairs_q(deltas)).update(
+        quantity=Case(
+            *(
+                When(product_id=p, vendor_id=v, then=F("quantity") + qty)
+                for (p, v), qty in deltas.items()
+            ),
+            default=F("quantity"),
+            output_field=BigIntegerField(),
+        ),
+        updated_at=timezone.now(),
+    )
+
+
+def pairs_q(pairs: Iterable) -> Q:
+    """Match any of the (product_id, vendor_id) ``pairs``."""
+    return reduce(or_, (Q(product_id=p, vendor_id=v) for p, v in pairs), Q(pk__in=[]))
+
+
+def available_stock(product_id, vendor_id) -> int:
+    """Orderable stock for one pair – a single unique-index lookup."""
+    qty = (
+        StockBalance.objects.filter(product_id=product_id, vendor_id=vendor_id)
+        .values_list("quantity", flat=True)
+        .first()
+    )
+    return qty or 0
+
+
+def lock_balances(pairs: Iterable) -> Dict[tuple, int]:
+    """Lock the balance rows of ``pairs`` for the rest of the transaction and
+    return their quantities. Rows are locked in a fixed order so two orders
+    touching the same pairs cannot deadlock; missing pairs read as 0.
+
+    On SQLite ``select_for_update`` is a no-op; there the whole database is
+    locked from ``BEGIN IMMEDIATE`` (``transaction_mode`` in settings)."""
+    pairs = sorted({(int(p), int(v)) for p, v in pairs})
+    locked = {pair: 0 for pair in pairs}
+    rows = (
+        StockBalance.objects.select_for_update()
+        .filter(pairs_q(pairs))
+        .order_by("product_id", "vendor_id")
+        .values_list("product_id", "vendor_id", "quantity")
+    )
+    for product_id, vendor_id, quantity in rows:
+        locked[(product_id, vendor_id)] = quantity
+    return locked
+
+
+def availability(product_ids: Iterable = (), pairs: Iterable = ()) -> Dict[int, List[dict]]:
+    """Stock per vendor for many products and/or (product, vendor) pairs,
+    grouped by product – one query over the balances joined to their vendor.
+
+    Products list only their vendors with stock; a requested pair is listed
+    if it has a balance row, even at 0. Every requested product is a key, so
+    a pair missing from its list has no stock.
+    """
+    product_ids, pairs = list(product_ids), list(pairs)
+    wanted = Q(product_id__in=product_ids, quantity__gt=0) | pairs_q(pairs)
+    rows = (
+        StockBalance.objects.filter(wanted)
+        .order_by("product_id", "vendor__name")
+        .values_list("product_id", "vendor_id", "vendor__vendor_id", "vendor__name", "quantity")
+    )
+    found: Dict[int, List[dict]] = {
+        int(pid): [] for pid in [*product_ids, *(p for p, _ in pairs)]
+    }
+    for product_id, vendor_id, code, name, quantity in rows:
+        found.setdefault(product_id, []).append(
+            {"id": vendor_id, "vendor_id": code, "name": name, "stock": quantity}
+        )
+    return found
+
+
+def stock_map() -> dict:
+    """Every orderable (product, vendor) pair with its stock, in one query:
+
+        {"vendors": {"<id>": [code, name]},
+         "stock":   {"<product id>": [[vendor id, qty], …]}}   # by vendor name
+    """
+    vendors: Dict[str, list] = {}
+    stock: Dict[str, list] = {}
+    rows = (
+        StockBalance.objects.filter(quantity__gt=0)
+        .order_by("product_id", "vendor__name")
+        .values_list("product_id", "vendor_id", "vendor__vendor_id", "vendor__name", "quantity")
+    )
+    for product_id, vendor_id, code, name, quantity in rows:
+        vendors.setdefault(str(vendor_id), [code, name])
+        stock.setdefault(str(product_id), []).append([vendor_id, quantity])
+    return {"vendors": vendors, "stock": stock}
+
+
+def _stock_map_blob() -> Tuple[str, bytes]:
+    body = json.dumps(stock_map(), separators=(",", ":")).encode()
+    version = hashlib.sha1(body, usedforsecurity=False).hexdigest()[:16]
+    # mtime=0 keeps the bytes – and so the version – identical across rebuilds
+    return version, gzip.compress(body, mtime=0)
+
+
+def stock_map_blob() -> Tuple[str, bytes]:
+    """(version hash, gzip-compressed JSON) of ``stock_map``, built once per
+    change to the stock and shared by every order form until the next one."""
+    return cached("stock_map", STOCK_MAP_MODELS, _stock_map_blob)
+
+
+@transaction.atomic
+def rebuild_balances(product_id: Optional[int] = None) -> int:
+    """Recompute balances from the Inventory lots (after bulk loads, which
+    skip the signals). Returns the number of balance rows written."""
+    lots = Inventory.objects.filter(vendor__isnull=False)
+    balances = StockBalance.objects.all()
+    if product_id is not None:
+        lots = lots.filter(product_id=product_id)
+        balances = balances.filter(product_id=product_id)
+
+    balances.delete()
+    totals = (
+        lots.values("product_id", "vendor_id")
+        .annotate(total=Sum("stock_quantity"))
+        .order_by()
+    )
+    created = StockBalance.objects.bulk_create(
+        (
+            StockBalance(
+                product_id=row["product_id"],
+                vendor_id=row["vendor_id"],
+                quantity=row["total"],
+            )
+            for row in totals
+        ),
+        batch_size=1000,
+    )
+    return len(created)
@@ -0,0 +1,49 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable
+
+from django.db.models import Q, Sum
+
+
+@dataclass
+class Summary:
+    """Footer figures for a filtered list: overall totals plus one quantity
+    per status value."""
+
+    totals: Dict[str, Any] = field(default_factory=dict)
+    by_status: Dict[str, Any] = field(default_factory=dict)
+
+
+def summarize(
+    qs,
+    *,
+    totals: Dict[str, Any],
+    statuses: Iterable[str] = (),
+    status_field: str = "status",
+    status_quantity: str = "quantity",
+) -> Summary:
+    """Compute ``totals`` and per-status sums of ``status_quantity`` over ``qs``
+    in a single aggregate query (conditional ``Sum(..., filter=Q(...))``).
+
+    ``totals`` maps result names to aggregate expressions; a plain string is
+    summed. Missing values come back as 0 rather than None.
+    """
+    statuses = list(statuses)
+    # aliases are prefixed so a total may share its name with an annotation
+    aggregates = {
+        f"_total_{name}": Sum(expr) if isinstance(expr, str) else expr
+        for name, expr in totals.items()
+    }
+    for i, status in enumerate(statuses):
+        aggregates[f"_status_{i}"] = Sum(
+            status_quantity, filter=Q(**{status_field: status})
+        )
+
+    row = qs.order_by().aggregate(**aggregates)
+    return Summary(
+        totals={name: row[f"_total_{name}"] or 0 for name in totals},
+        by_status={s: row[f"_status_{i}"] or 0 for i, s in enumerate(statuses)},
+    )
+
+
+def status_keys(choices) -> list:
+    return [value for value, _ in choices]
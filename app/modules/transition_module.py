@@ -0,0 +1,214 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+
+from app.models import Inventory, Order, PurchaseOrder, StatusTransition
+
+KINDS = {PurchaseOrder: "po", Inventory: "inventory", Order: "order"}
+
+# approval_status moves, the same for every model
+APPROVAL_TRANSITIONS: Dict[str, FrozenSet[str]] = {
+    "PENDING": frozenset({"APPROVED", "CANCELLED"}),
+    "APPROVED": frozenset({"PENDING", "CANCELLED"}),
+    "CANCELLED": frozenset({"PENDING"}),  # re-request after a rejection
+}
+
+# the status each approval decision sets; these are the approval-stage statuses
+STATUS_MAP = {
+    "po": {
+        "PENDING": "PO_RAISED",
+        "APPROVED": "PO_APPROVED",
+        "CANCELLED": "PO_REJECTED",
+    },
+    "inventory": {
+        "PENDING": "INWARD_REQUESTED",
+        "APPROVED": "INWARD_APPROVED",
+        "CANCELLED": "INWARD_REJECTED",
+    },
+    "order": {
+        "PENDING": "ORDER_RAISED",
+        "APPROVED": "ORDER_APPROVED",
+        "CANCELLED": "ORDER_REJECTED",
+    },
+}
+
+# manual status moves once approved (the edit forms); approval-stage statuses
+# are only ever set through STATUS_MAP
+STATUS_TRANSITIONS: Dict[str, Dict[str, FrozenSet[str]]] = {
+    "po": {
+        "PO_APPROVED": frozenset({"PO_SHIPPED", "PO_DELIVERED", "INWARD_REQUESTED"}),
+        "PO_SHIPPED": frozenset({"PO_DELIVERED", "INWARD_REQUESTED"}),
+        "PO_DELIVERED": frozenset({"INWARD_REQUESTED"}),
+    },
+    "inventory": {
+        "INWARD_APPROVED": frozenset({"INWARD_QC", "INWARD_COMPLETED"}),
+        "INWARD_QC": frozenset({"INWARD_COMPLETED"}),
+    },
+    "order": {
+        "ORDER_APPROVED": frozenset({"ORDER_SHIPPED", "ORDER_DELIVERED"}),
+        "ORDER_SHIPPED": frozenset({"ORDER_DELIVERED", "ORDER_RETURNED"}),
+        "ORDER_DELIVERED": frozenset({"ORDER_RETURNED"}),
+    },
+}
+
+
+class InvalidTransition(Exception):
+    """The requested approval or status change is not in the transition table."""
+
+
+def kind_of(obj) -> str:
+    return KINDS[type(obj)]
+
+
+def touched_fields(model) -> List[str]:
+    """The model's ``auto_now`` timestamps; ``save(update_fields=...)`` and
+    ``update()`` only set them when named."""
+    return [f.name for f in model._meta.concrete_fields if getattr(f, "auto_now", False)]
+
+
+def approval_allowed(kind: str, approval: str, status: str, action: str) -> bool:
+    """Whether a record at (approval, status) may move to approval ``action``.
+
+    Approval only changes while the record is still at an approval-stage
+    status – a shipped order or a QC'd lot can no longer be rejected.
+    """
+    return (
+        action in APPROVAL_TRANSITIONS.get(approval, ())
+        and status in STATUS_MAP[kind].values()
+    )
+
+
+def check_approval(obj, action: str) -> str:
+    """Validate moving ``obj`` to approval ``action``; returns the status it sets."""
+    kind = kind_of(obj)
+    if not approval_allowed(kind, obj.approval_status, obj.status, action):
+        raise InvalidTransition(
+            f"{obj.get_approval_status_display()} ({obj.get_status_display()}) "
+            f"cannot move to {action.title()}."
+        )
+    return STATUS_MAP[kind][action]
+
+
+def check_status(obj, status: str) -> None:
+    if status == obj.status:
+        return
+    targets = STATUS_TRANSITIONS[kind_of(obj)].get(obj.status, ())
+    if obj.approval_status != "APPROVED" or status not in targets:
+        label = dict(type(obj).STATUS_CHOICES).get(status, status)
+        raise InvalidTransition(
+            f"Status cannot move from {obj.get_status_display()} to {label}."
+        )
+
+
+def status_choices(obj) -> List[Tuple[str, str]]:
+    """The current status and every manual move from it, in choice order;
+    empty until approved (the edit forms then hide the drop-down)."""
+    if obj.approval_status != "APPROVED":
+        return []
+    targets = STATUS_TRANSITIONS[kind_of(obj)].get(obj.status, frozenset()) | {obj.status}
+    return [(value, label) for value, label in type(obj).STATUS_CHOICES if value in targets]
+
+
+def set_approval(obj, action: str, user=None) -> bool:
+    """Move ``obj`` to approval ``action`` and its mapped status, save and log.
+
+    Returns False (nothing written) if it is already there; raises
+    ``InvalidTransition`` if the move is not allowed.
+    """
+    if obj.approval_status == action:
+        return False
+    status = check_approval(obj, action)
+    with logged_atomic():
+        record(kind_of(obj), obj.pk, (obj.approval_status, action), (obj.status, status), user)
+        obj.approval_status, obj.status = action, status
+        obj.save(update_fields=["approval_status", "status", *touched_fields(type(obj))])
+    return True
+
+
+def set_status(obj, status: str, user=None) -> None:
+    """Validate and assign a manual status move; the caller saves ``obj``,
+    in the same ``logged_atomic`` block."""
+    check_status(obj, status)
+    if status != obj.status:
+        approval = obj.approval_status
+        record(kind_of(obj), obj.pk, (approval, approval), (obj.status, status), user)
+        obj.status = status
+
+
+# ---------------------------------------------------------------------------
+# Transition log
+# ---------------------------------------------------------------------------
+_buffer: ContextVar[Optional[List[StatusTransition]]] = ContextVar(
+    "transition_buffer", default=None
+)
+
+
+@contextmanager
+def logged_atomic():
+    """``transaction.atomic`` that writes the transitions recorded inside it
+    with one ``bulk_create`` just before it commits, so a change and its log
+    entries commit – or roll back – together.
+
+    Nested uses write into the outermost block's buffer from a savepoint; a
+    nested block that raises rolls back to it and drops its entries, so a
+    caller that catches the error keeps neither the change nor its log.
+    """
+    buffer = _buffer.get()
+    if buffer is not None:
+        mark = len(buffer)
+        try:
+            with transaction.atomic():
+                yield
+        except BaseException:
+            del buffer[mark:]
+            raise
+        return
+
+    token = _buffer.set([])
+    try:
+        with transaction.atomic():
+            yield
+            entries = _buffer.get()
+            if entries and not transaction.get_rollback():
+                StatusTransition.objects.bulk_create(entries)
+    finally:
+        _buffer.reset(token)
+
+
+def _user_id(user) -> Optional[int]:
+    return user.pk if user is not None and user.is_authenticated else None
+
+
+def record(
+    kind: str,
+    object_id: int,
+    approval: Tuple[str, str],
+    status: Tuple[str, str],
+    user=None,
+) -> None:
+    """Log one (from, to) approval and status change."""
+    entry = StatusTransition(
+        kind=kind,
+        object_id=object_id,
+        from_approval=approval[0],
+        to_approval=approval[1],
+        from_status=status[0],
+        to_status=status[1],
+        user_id=_user_id(user),
+    )
+    record_many([entry])
+
+
+def record_many(entries: Iterable[StatusTransition]) -> None:
+    """Log transitions: buffered inside ``logged_atomic``, otherwise written
+    at once in the caller's transaction."""
+    entries = list(entries)
+    if not entries:
+        return
+    buffer = _buffer.get()
+    if buffer is None:
+        StatusTransition.objects.bulk_create(entries)
+    else:
+        buffer.extend(entries)
@@ -0,0 +1,94 @@
+from datetime import date
+from decimal import Decimal
+from typing import List, Optional
+
+from django.db import transaction
+from django.db.models import DecimalField, F, Sum
+from django.utils import timezone
+
+from app.models import DashboardSnapshot, Inventory, ValuationPeriod, ValuationPeriodLine
+from app.modules import snapshot_module
+
+
+class PeriodClosed(Exception):
+    """The period (or a later one) has already been closed."""
+
+
+class PeriodNotCurrent(Exception):
+    """The period does not end today – its figures cannot be taken now."""
+
+
+def _closing_lines():
+    """Open stock per product, valued at each lot's unit cost (FIFO layers)."""
+    return (
+        Inventory.objects.filter(stock_quantity__gt=0)
+        .values("product_id")
+        .annotate(
+            qty=Sum("stock_quantity"),
+            value=Sum(
+                F("stock_quantity") * F("unit_cost"),
+                output_field=DecimalField(max_digits=16, decimal_places=2),
+            ),
+        )
+        .order_by()
+    )
+
+
+@transaction.atomic
+def close_period(period_end: date, *, force: bool = False) -> ValuationPeriod:
+    """Freeze closing stock and cost of goods sold as at ``period_end``.
+
+    Closing stock is the lots still open, each at its own cost; COGS to date
+    is the running total the allocation engine keeps on the dashboard
+    snapshot, and the period's COGS the increase since the previous close.
+    ``force`` re-closes the latest period; earlier ones are never rewritten.
+
+    Both figures are read as they stand now, so ``period_end`` must be
+    today: an earlier date would store today's figures under a past date,
+    and a later one would freeze them before the period has run.
+    """
+    today = timezone.localdate()
+    if period_end != today:
+        raise PeriodNotCurrent(
+            f"Cannot close {period_end}: stock and COGS are only known as of today ({today})."
+        )
+    latest = ValuationPeriod.objects.order_by("-period_end").first()
+    if latest and (
+        latest.period_end > period_end or (latest.period_end == period_end and not force)
+    ):
+        raise PeriodClosed(f"Valuation already closed up to {latest.period_end}.")
+
+    snapshot = DashboardSnapshot.objects.select_for_update().filter(
+        pk=snapshot_module.SNAPSHOT_PK
+    ).first() or snapshot_module.rebuild_snapshot()
+
+    previous = (
+        ValuationPeriod.objects.filter(period_end__lt=period_end).order_by("-period_end").first()
+    )
+    lines = list(_closing_lines())
+    period, _ = ValuationPeriod.objects.update_or_create(
+        period_end=period_end,
+        defaults={
+            "closing_qty": sum(row["qty"] for row in lines),
+            "closing_value": sum((row["value"] for row in lines), Decimal("0.00")),
+            "cogs_to_date": snapshot.total_cogs,
+            "period_cogs": snapshot.total_cogs - (previous.cogs_to_date if previous else 0),
+        },
+    )
+    period.lines.all().delete()
+    ValuationPeriodLine.objects.bulk_create(
+        ValuationPeriodLine(
+            period=period, product_id=row["product_id"], qty=row["qty"], value=row["value"]
+        )
+        for row in lines
+    )
+    return period
+
+
+def valuation_as_of(day: date) -> Optional[ValuationPeriod]:
+    """The stored valuation of the last period closed on or before ``day``."""
+    return ValuationPeriod.objects.filter(period_end__lte=day).order_by("-period_end").first()
+
+
+def period_history(limit: int = 12) -> List[ValuationPeriod]:
+    return list(ValuationPeriod.objects.order_by("-period_end")[:limit])
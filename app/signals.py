@@ -1,8 +1,23 @@
+from collections import defaultdict
+
 from django.contrib.auth.models import User
-from django.db.models.signals import post_delete, post_save, pre_save
+from django.db.models import DecimalField, Expression, F, Sum
+from django.db.models.expressions import Combinable
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 
-from .models import UserProfile
+from app.modules import search_module, snapshot_module, stock_module
+from app.modules.cache_module import bump_version
+
+from .models import (
+    Category,
+    Inventory,
+    Order,
+    Product,
+    PurchaseOrder,
+    UserProfile,
+    Vendor,
+)
 
 
 
@@ -23,4 +38,183 @@ def update_employee_id(sender, instance, **kwargs):
         slug = (instance.work_location or "NA").upper().replace(" ", "")
         new_id = f"KMDV-{slug}-{instance.pk}"
         if instance.employee_id != new_id:
-            instance.employee_id = new_id
\ No newline at end of file
+            instance.employee_id = new_id
+
+
+# ---------------------------------------------------------------------------
+# Dashboard snapshot and stock balance deltas
+# ---------------------------------------------------------------------------
+# quantity fields that feed the snapshot, per model
+SNAPSHOT_FIELDS = {
+    Order: ("product_id", "quantity"),
+    Inventory: ("product_id", "vendor_id", "stock_quantity", "inward_qty", "unit_cost"),
+    PurchaseOrder: ("product_id", "quantity"),
+}
+
+
+def _normalise(values):
+    return {f: (v if f.endswith(("_id", "_cost")) else int(v or 0)) for f, v in values.items()}
+
+
+def _stored_values(sender, instance):
+    """Field values as persisted – resolves F() updates like F("qty") - n."""
+    fields = SNAPSHOT_FIELDS[sender]
+    values = {f: getattr(instance, f) for f in fields}
+    if any(isinstance(v, (Expression, Combinable)) for v in values.values()):
+        values = sender.objects.filter(pk=instance.pk).values(*fields).first() or {}
+    return _normalise(values)
+
+
+def _snapshot_delta(sender, values, sign):
+    if sender is Order:
+        return {"order_qty": sign * values["quantity"], "orders": sign}
+    if sender is Inventory:
+        return {
+            "stock": sign * values["stock_quantity"],
+            "inward": sign * values["inward_qty"],
+            "stock_cost": sign * values["stock_quantity"] * values["unit_cost"],
+        }
+    return {"po_qty": sign * values["quantity"]}
+
+
+def _apply_stock_deltas(before, after):
+    """Move a lot's stock between (product, vendor) balances."""
+    deltas = defaultdict(int)
+    if before:
+        deltas[before["product_id"], before["vendor_id"]] -= before["stock_quantity"]
+    if after:
+        deltas[after["product_id"], after["vendor_id"]] += after["stock_quantity"]
+    batch = snapshot_module.open_batch()
+    for (product_id, vendor_id), qty in deltas.items():
+        if batch is not None:
+            batch["stock"][product_id, vendor_id] += qty
+        else:
+            stock_module.apply_stock_delta(product_id, vendor_id, qty)
+
+
+@receiver(pre_save, sender=Inventory)
+def default_unit_cost(sender, instance, **kwargs):
+    """Lots inwarded without a cost are valued at the product's list price."""
+    if instance.unit_cost is None:
+        instance.unit_cost = snapshot_module.product_price(instance.product_id)
+
+
+@receiver(pre_save, sender=Order)
+@receiver(pre_save, sender=Inventory)
+@receiver(pre_save, sender=PurchaseOrder)
+def remember_snapshot_values(sender, instance, **kwargs):
+    before = None
+    if instance.pk:
+        before = (
+            sender.objects.filter(pk=instance.pk)
+            .values(*SNAPSHOT_FIELDS[sender])
+            .first()
+        )
+    instance._snapshot_before = _normalise(before) if before else None
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_save, sender=Inventory)
+@receiver(post_save, sender=PurchaseOrder)
+def update_snapshot_on_save(sender, instance, **kwargs):
+    after = _stored_values(sender, instance)
+    delta = _snapshot_delta(sender, after, +1)
+
+    before = getattr(instance, "_snapshot_before", None)
+    if before:
+        undo = _snapshot_delta(sender, before, -1)
+        if before["product_id"] == after["product_id"]:
+            delta = {k: delta[k] + undo[k] for k in delta}
+        else:
+            snapshot_module.apply_delta(before["product_id"], **undo)
+    snapshot_module.apply_delta(after["product_id"], **delta)
+
+    if sender is Inventory:
+        _apply_stock_deltas(before, after)
+
+
+@receiver(post_delete, sender=Order)
+@receiver(post_delete, sender=Inventory)
+@receiver(post_delete, sender=PurchaseOrder)
+def update_snapshot_on_delete(sender, instance, **kwargs):
+    values = _stored_values(sender, instance)
+    snapshot_module.apply_delta(values["product_id"], **_snapshot_delta(sender, values, -1))
+    if sender is Inventory:
+        _apply_stock_deltas(values, None)
+
+
+@receiver(pre_delete, sender=Order)
+def reverse_cogs_on_order_delete(sender, instance, **kwargs):
+    """An order's lot journal cascades with it (e.g. from ``Product.delete()``);
+    take the COGS it recorded off the snapshot. ``restore_order`` empties the
+    journal itself, so the order views find nothing here. Inside
+    ``snapshot_module.batched_deltas`` the batch has withdrawn it already."""
+    if snapshot_module.open_batch() is not None:
+        return
+    cost = instance.allocations.aggregate(
+        cost=Sum(
+            F("qty") * F("unit_cost"),
+            output_field=DecimalField(max_digits=16, decimal_places=2),
+        )
+    )["cost"]
+    if cost:
+        snapshot_module.apply_delta(instance.product_id, cogs=-cost)
+
+
+@receiver(pre_save, sender=Product)
+def remember_product_price(sender, instance, **kwargs):
+    instance._price_before = (
+        sender.objects.filter(pk=instance.pk).values_list("price", flat=True).first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=Product)
+def update_snapshot_on_product_save(sender, instance, created, **kwargs):
+    if created:
+        snapshot_module.apply_delta(instance.pk, products=1)
+    elif instance._price_before is not None:
+        snapshot_module.apply_price_change(
+            instance.pk, instance._price_before, instance.price
+        )
+
+
+@receiver(post_delete, sender=Product)
+def update_snapshot_on_product_delete(sender, instance, **kwargs):
+    snapshot_module.apply_delta(instance.pk, products=-1)
+
+
+# ---------------------------------------------------------------------------
+# Product / vendor search index
+# ---------------------------------------------------------------------------
+SEARCH_KINDS = {Product: "product", Vendor: "vendor"}
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Vendor)
+def update_search_index(sender, instance, **kwargs):
+    search_module.index_object(SEARCH_KINDS[sender], instance)
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Vendor)
+def remove_from_search_index(sender, instance, **kwargs):
+    batch = snapshot_module.open_batch()
+    if batch is not None:
+        batch["unindex"][SEARCH_KINDS[sender]].add(instance.pk)
+    else:
+        search_module.unindex_object(SEARCH_KINDS[sender], instance.pk)
+
+
+# ---------------------------------------------------------------------------
+# Aggregate cache invalidation
+# ---------------------------------------------------------------------------
+CACHED_MODELS = (Order, Inventory, PurchaseOrder, Product, Vendor, Category)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_cache_version(sender, **kwargs):
+    if sender in CACHED_MODELS:
+        bump_version(sender)
@@ -0,0 +1,65 @@
+// ========== DASHBOARD CHARTS ========== //
+// Canvases carry a data-chart-url; chart data is fetched after the page has
+// rendered, so the page shell and the JSON can be cached independently.
+// A payload's "unit" titles the y-axis (the trend chart's ₹ metric); counts
+// are in units otherwise.
+const kmdvCharts = {};
+const kmdvChartColors = [
+    "52, 152, 219",
+    "39, 174, 96",
+    "243, 156, 18",
+];
+
+function renderChart(canvas, param, value) {
+    const url = new URL(canvas.dataset.chartUrl, window.location.origin);
+    if (value) {
+        url.searchParams.set(param, value);
+    }
+
+    fetch(url, { credentials: "same-origin" })
+        .then((response) => response.json())
+        .then((data) => {
+            if (kmdvCharts[canvas.id]) {
+                kmdvCharts[canvas.id].destroy();
+            }
+            data.datasets.forEach((dataset, i) => {
+                const rgb = kmdvChartColors[i % kmdvChartColors.length];
+                dataset.backgroundColor = `rgba(${rgb}, 0.5)`;
+                dataset.borderColor = `rgba(${rgb}, 1)`;
+                dataset.borderWidth = 1;
+            });
+            kmdvCharts[canvas.id] = new Chart(canvas, {
+                type: canvas.dataset.chartType || "bar",
+                data: data,
+                options: {
+                    responsive: true,
+                    maintainAspectRatio: false,
+                    scales: {
+                        y: {
+                            beginAtZero: true,
+                            title: { display: true, text: data.unit || "Units" },
+                        },
+                    },
+                },
+            });
+        })
+        .catch((error) => {
+            console.error("Error loading chart data:", error);
+        });
+}
+
+document.addEventListener("DOMContentLoaded", function () {
+    document.querySelectorAll("canvas[data-chart-url]").forEach((canvas) => {
+        renderChart(canvas);
+    });
+
+    document.querySelectorAll("select.chart-group").forEach((select) => {
+        select.addEventListener("change", function () {
+            renderChart(
+                document.getElementById(this.dataset.chart),
+                this.dataset.param || "group",
+                this.value
+            );
+        });
+    });
+});
@@ -0,0 +1,31 @@
+// ========== ORDER FORM STOCK MAP ========== //
+// The order forms fetch the whole product → vendor → stock map once per page
+// (a 304 when nothing changed) and resolve vendor lists and stock locally.
+// The server re-checks stock on submit, so a slightly stale map is harmless.
+
+function loadStockMap(url) {
+    return fetch(url, { credentials: "same-origin", cache: "no-cache" })
+        .then((response) => {
+            if (!response.ok) {
+                throw new Error(`Stock map request failed (${response.status})`);
+            }
+            return response.json();
+        })
+        .then((data) => ({
+            // [{id, vendor_id, name, stock}] of the vendors with stock, by name
+            vendorsFor(productId) {
+                return (data.stock[productId] || []).map(([id, stock]) => {
+                    const [code, name] = data.vendors[id];
+                    return { id: id, vendor_id: code, name: name, stock: stock };
+                });
+            },
+            stockFor(productId, vendorId) {
+                const row = (data.stock[productId] || []).find(
+                    ([id]) => String(id) === String(vendorId)
+                );
+                return row ? row[1] : 0;
+            },
+        }));
+}
+
+window.loadStockMap = loadStockMap;
@@ -1,3 +1,756 @@
-from django.test import TestCase
+import csv
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from app.models import (
+    Category,
+    DailyRollup,
+    DashboardSnapshot,
+    Inventory,
+    Order,
+    OrderAllocation,
+    OrderBatch,
+    Product,
+    PurchaseOrder,
+    StatusTransition,
+    StockBalance,
+    ValuationPeriod,
+    Vendor,
+)
+from app.modules import (
+    cache_module,
+    export_module,
+    rollup_module,
+    snapshot_module,
+    transition_module,
+    valuation_module,
+)
+from app.modules.dashboard_module import compute_dashboard_metrics
+
+# running totals the snapshot keeps; each must equal the live aggregate
+SNAPSHOT_TOTALS = (
+    "products_count",
+    "orders_count",
+    "total_orders",
+    "total_order_price",
+    "total_stock",
+    "total_inward_qty",
+    "total_stock_price",
+    "total_po_orders",
+    "total_po_order_price",
+    "total_stock_cost",
+    "total_cogs",
+)
+CENT = Decimal("0.01")
+
+
+class SnapshotAssertions:
+    def assertSnapshotLive(self):
+        snapshot = snapshot_module.snapshot_metrics()
+        live = compute_dashboard_metrics()
+        for name in SNAPSHOT_TOTALS:
+            with self.subTest(total=name):
+                self.assertEqual(
+                    Decimal(getattr(snapshot, name)).quantize(CENT),
+                    Decimal(getattr(live, name)).quantize(CENT),
+                )
+
+
+class FifoAllocationTests(SnapshotAssertions, TestCase):
+    """Orders draw on a pair's lots oldest first, journal every lot they take
+    from, and give stock back to exactly those lots when edited or deleted."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("clerk", password="-")
+        self.client.force_login(self.user)
+        category = Category.objects.create(name="Parts")
+        self.product = Product.objects.create(
+            product_id="P-1", name="Bolt", category=category, price=Decimal("20.00")
+        )
+        self.vendor = Vendor.objects.create(vendor_id="V-1", name="Acme", address="-")
+        snapshot_module.rebuild_snapshot()
+        # oldest first: 5 @ 10.00, 10 @ 12.00, 4 @ 15.00
+        self.lots = [self._lot(5, "10.00"), self._lot(10, "12.00"), self._lot(4, "15.00")]
+
+    def _lot(self, qty, unit_cost):
+        return Inventory.objects.create(
+            product=self.product,
+            vendor=self.vendor,
+            stock_quantity=qty,
+            inward_qty=qty,
+            unit_cost=Decimal(unit_cost),
+        )
+
+    def _place(self, qty):
+        self.client.post(
+            reverse("add_order"),
+            {"product": self.product.pk, "vendor": self.vendor.pk, "qty": qty},
+        )
+        return Order.objects.latest("id")
+
+    def assertLots(self, *expected):
+        stock = dict(Inventory.objects.values_list("pk", "stock_quantity"))
+        self.assertEqual([stock[lot.pk] for lot in self.lots], list(expected))
+
+    def assertJournal(self, order, *expected):
+        rows = OrderAllocation.objects.filter(order=order).order_by("inventory_id")
+        self.assertEqual(
+            [(row.inventory_id, row.qty, row.unit_cost) for row in rows],
+            [(lot.pk, qty, lot.unit_cost) for lot, qty in expected],
+        )
+
+    def assertBalanced(self):
+        """Pair balance equals the lots' stock; snapshot equals live totals."""
+        balance = StockBalance.objects.get(product=self.product, vendor=self.vendor)
+        lots = Inventory.objects.filter(product=self.product, vendor=self.vendor).aggregate(
+            total=Sum("stock_quantity")
+        )["total"]
+        self.assertEqual(balance.quantity, lots)
+        self.assertSnapshotLive()
+
+    def test_order_spans_lots_oldest_first(self):
+        order = self._place(8)
+
+        self.assertEqual(order.quantity, 8)
+        self.assertLots(0, 7, 4)
+        self.assertJournal(order, (self.lots[0], 5), (self.lots[1], 3))
+        self.assertEqual(snapshot_module.snapshot_metrics().total_cogs, Decimal("86.00"))
+        self.assertBalanced()
+
+    def test_edit_restores_journalled_lots_before_reallocating(self):
+        order = self._place(8)
+
+        self.client.post(
+            reverse("edit_order", args=[order.pk]),
+            {"product": self.product.pk, "vendor": self.vendor.pk, "qty": 2},
+        )
+
+        # 5 + 3 back on the first two lots, then 2 from the oldest again
+        self.assertLots(3, 10, 4)
+        self.assertJournal(order, (self.lots[0], 2))
+        self.assertEqual(snapshot_module.snapshot_metrics().total_cogs, Decimal("20.00"))
+        self.assertBalanced()
+
+    def test_delete_restores_journalled_lots(self):
+        self._place(3)
+        order = self._place(8)  # 2 from the first lot, 6 from the second
+
+        self.client.post(reverse("delete_order", args=[order.pk]))
+
+        self.assertFalse(Order.objects.filter(pk=order.pk).exists())
+        self.assertFalse(OrderAllocation.objects.filter(order_id=order.pk).exists())
+        self.assertLots(2, 10, 4)
+        self.assertBalanced()
+
+    def test_legacy_order_without_journal_goes_back_through_release(self):
+        # placed before the journal existed: stock taken, nothing recorded
+        order = Order.objects.create(
+            user=self.user, product=self.product, vendor=self.vendor, quantity=6
+        )
+        second = self.lots[1]
+        second.stock_quantity = 4
+        second.save()
+
+        self.client.post(reverse("delete_order", args=[order.pk]))
+
+        # release() puts it all on the pair's oldest lot
+        self.assertLots(11, 4, 4)
+        self.assertBalanced()
+
+    def test_batch_with_one_short_line_writes_nothing(self):
+        other = Product.objects.create(
+            product_id="P-2", name="Nut", category=self.product.category, price=Decimal("3.00")
+        )
+        Inventory.objects.create(
+            product=other,
+            vendor=self.vendor,
+            stock_quantity=2,
+            inward_qty=2,
+            unit_cost=Decimal("2.00"),
+        )
+
+        response = self.client.post(
+            reverse("add_order_batch"),
+            {
+                "product": [self.product.pk, other.pk],
+                "vendor": [self.vendor.pk, self.vendor.pk],
+                "qty": [8, 5],
+            },
+        )
+
+        self.assertRedirects(response, reverse("add_order_batch"), fetch_redirect_response=False)
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(OrderBatch.objects.exists())
+        self.assertFalse(OrderAllocation.objects.exists())
+        self.assertLots(5, 10, 4)
+        self.assertEqual(Inventory.objects.get(product=other).stock_quantity, 2)
+        self.assertBalanced()
+
+
+@override_settings(KMDV_QUERY_BUDGET_RAISE=True)
+class QueryBudgetTests(SnapshotAssertions, TestCase):
+    """Every page's most expensive valid path stays within its
+    ``QUERY_BUDGETS`` entry – the middleware raises on any overrun (or N+1)."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_superuser("admin", "admin@example.com", "-")
+        self.user.userprofile.save()  # assigns its employee_id, freeing "" for the next user
+        self.client.force_login(self.user)
+        self.category = Category.objects.create(name="Parts")
+        self.products = [
+            Product.objects.create(
+                product_id=f"P-{i}", name=f"Part {i}", category=self.category, price=price
+            )
+            for i, price in enumerate((Decimal("20.00"), Decimal("7.50")), start=1)
+        ]
+        self.vendors = [
+            Vendor.objects.create(vendor_id=f"V-{i}", name=f"Vendor {i}", address="-")
+            for i in (1, 2)
+        ]
+        snapshot_module.rebuild_snapshot()
+        for product in self.products:
+            for vendor in self.vendors:
+                for qty in (5, 10):
+                    Inventory.objects.create(
+                        product=product,
+                        vendor=vendor,
+                        stock_quantity=qty,
+                        inward_qty=qty,
+                        unit_cost=product.price,
+                    )
+        self.lot = Inventory.objects.filter(
+            product=self.products[0], vendor=self.vendors[0]
+        ).first()
+        self.post("add_order", data=self._line(self.products[0], self.vendors[0], 8))
+        self.order = Order.objects.latest("id")
+        self.po = PurchaseOrder.objects.create(
+            product=self.products[0], vendor=self.vendors[0], quantity=20
+        )
+
+    def _line(self, product, vendor, qty):
+        return {"product": product.pk, "vendor": vendor.pk, "qty": qty}
+
+    def get(self, name, *args, query=""):
+        response = self.client.get(reverse(name, args=args) + query)
+        self.assertLess(response.status_code, 400, name)
+        return response
+
+    def post(self, name, *args, data=None):
+        response = self.client.post(reverse(name, args=args), data or {})
+        self.assertEqual(response.status_code, 302, name)  # saved and redirected
+        return response
+
+    def approve(self, obj, model):
+        obj.approval_status = "APPROVED"
+        obj.status = transition_module.STATUS_MAP[model]["APPROVED"]
+        obj.save()
+
+    def test_dashboard_and_charts(self):
+        DashboardSnapshot.objects.all().delete()  # first visit builds it
+        self.get("dashboard")
+        self.get("stock_chart_data", query="?group=category")
+        self.get("order_chart_data", query="?group=vendor")
+        self.get("trend_chart_data", query="?metric=value&days=90")
+
+    def test_products(self):
+        self.get("product_list")
+        self.get("add_product")
+        self.post(
+            "add_product",
+            data={"product_id": "P-9", "name": "New", "category": self.category.pk, "price": "4"},
+        )
+        product = self.products[0]
+        self.get("edit_product", product.pk)
+        self.post(
+            "edit_product",
+            product.pk,
+            data={
+                "product_id": "P-1A",
+                "name": "Renamed",
+                "category": self.category.pk,
+                "price": "25.00",
+            },
+        )
+        self.get("delete_product", product.pk)
+        self.post("delete_product", product.pk)
+        self.assertSnapshotLive()  # cascaded deltas applied as one batch
+
+    def test_categories(self):
+        self.get("category_list")
+        self.post("add_category", data={"name": "Tools"})
+        self.post("edit_category", self.category.pk, data={"name": "Spares"})
+        # both products with their lots, order and PO cascade
+        self.post("delete_category", self.category.pk)
+        self.assertSnapshotLive()
+
+    def test_vendors(self):
+        self.get("vendor_list")
+        self.post("add_vendor", data={"vendor_id": "V-9", "name": "New", "address": "-"})
+        vendor = self.vendors[1]
+        self.post(
+            "edit_vendor", vendor.pk, data={"vendor_id": "V-2A", "name": "Renamed", "address": "-"}
+        )
+        self.post("delete_vendor", vendor.pk)
+
+    def test_inventory(self):
+        self.get("inventory_list", query="?status=INWARD_REQUESTED&sort=-total_price")
+        self.get("export_inventory")
+        self.get("add_inventory")
+        self.post(
+            "add_inventory", data={**self._line(*self.products, 0), "qty": 6, "unit_cost": "3"}
+        )
+        lot = self.lot
+        self.get("edit_inventory", lot.pk)
+        self.approve(lot, "inventory")
+        # product, vendor and status all change
+        self.post(
+            "edit_inventory",
+            lot.pk,
+            data={**self._line(self.products[1], self.vendors[1], 4), "status": "INWARD_QC"},
+        )
+        # vendor only
+        self.post(
+            "edit_inventory",
+            lot.pk,
+            data={**self._line(self.products[1], self.vendors[0], 4), "status": "INWARD_QC"},
+        )
+        self.post("edit_inventory", lot.pk, data={"request_approval": "1"})
+        self.get("delete_inventory", lot.pk)
+        self.post("delete_inventory", lot.pk)
+
+    def test_orders(self):
+        self.get("order_list", query="?status=ORDER_RAISED&sort=-total_price")
+        self.get("export_orders")
+        self.get("add_order")
+        self.get("add_order_batch")
+        self.post(
+            "add_order_batch",
+            data={
+                "product": [p.pk for p in self.products],
+                "vendor": [v.pk for v in self.vendors],
+                "qty": [3, 4],
+            },
+        )
+        pairs = ",".join(f"{p.pk}:{v.pk}" for p in self.products for v in self.vendors)
+        self.get("stock_availability", query=f"?product={self.products[0].pk}&pair={pairs}")
+        self.get("stock_map")
+        order = self.order
+        self.get("edit_order", order.pk)
+        self.approve(order, "order")
+        # new pair, more than its first lot holds, and a status move
+        self.post(
+            "edit_order",
+            order.pk,
+            data={**self._line(self.products[1], self.vendors[1], 10), "status": "ORDER_SHIPPED"},
+        )
+        self.post("edit_order", order.pk, data={"request_approval": "1"})
+        self.post("cancel_order", order.pk)
+        self.get("delete_order", order.pk)
+        self.post("delete_order", order.pk)
+
+    def test_purchases(self):
+        self.get("purchase_list", query="?status=PO_RAISED&sort=-total_price")
+        self.get("export_purchases")
+        self.post("add_purchase", data=self._line(self.products[1], self.vendors[1], 9))
+        po = self.po
+        self.get("edit_purchase", po.pk)
+        self.post("edit_purchase", po.pk, data=self._line(self.products[1], self.vendors[1], 30))
+        self.approve(po, "po")
+        self.post(
+            "edit_purchase",
+            po.pk,
+            data={**self._line(self.products[0], self.vendors[0], 31), "status": "PO_SHIPPED"},
+        )
+        self.post("edit_purchase", po.pk, data={"request_approval": "1"})
+        self.get("print_purchase_order", po.pk)
+        self.post("delete_purchase", po.pk)
+
+    def test_approvals(self):
+        self.get("approval_request_list")
+        self.get("approval_manager_list", query="?sort=value")
+        self.get("po_approval_request_detail", self.po.pk)
+        self.get("inventory_approval_request_detail", self.lot.pk)
+        self.get("order_approval_request_detail", self.order.pk)
+        for model in ("po", "inventory", "order"):
+            self.get("update_approval", model, query="?sort=-total_price")
+        ids = list(Inventory.objects.values_list("pk", flat=True))
+        self.post("update_approval", "inventory", data={"action": "APPROVED", "pk": ids})
+        self.get("mark_approved", "po", self.po.pk)
+        self.post("mark_approved", "po", self.po.pk)
+        self.post("mark_rejected", "order", self.order.pk)
+
+    def test_users(self):
+        self.get("user_list")
+        self.get("profile")
+        self.post("profile", data={"username": "admin", "email": "root@example.com"})
+        password = "a-Long-pass-123"
+        new = {"username": "clerk", "email": "c@example.com", "password1": password}
+        self.post("user_add", data={**new, "password2": password})
+        clerk = User.objects.get(username="clerk")
+        self.get("user_edit", clerk.pk)
+        self.post(
+            "user_edit",
+            clerk.pk,
+            data={"username": "clerk", "email": "c2@example.com", "role": "sales_team"},
+        )
+        self.post(
+            "user_reset_password",
+            clerk.pk,
+            data={"new_password1": password + "x", "new_password2": password + "x"},
+        )
+        self.post("user_delete", clerk.pk)
+        self.assertSnapshotLive()
+        self.client.logout()
+        self.get("register")
+
+
+class CsvExportTests(TestCase):
+    """Exported text that a spreadsheet would evaluate is quoted."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("clerk", password="-")
+        self.client.force_login(self.user)
+        category = Category.objects.create(name="Parts")
+        product = Product.objects.create(
+            product_id="+P-1", name='=HYPERLINK("http://x","y")', category=category, price=5
+        )
+        vendor = Vendor.objects.create(vendor_id="V-1", name="@SUM(A1:A9)", address="-")
+        PurchaseOrder.objects.create(product=product, vendor=vendor, quantity=3)
+
+    def test_formula_cells_are_quoted(self):
+        response = self.client.get(reverse("export_purchases"))
+        body = b"".join(response.streaming_content).decode("utf-8-sig")
+        (row,) = csv.DictReader(body.splitlines())
+        self.assertEqual(row["Product ID"], "'+P-1")
+        self.assertEqual(row["Product"], '\'=HYPERLINK("http://x","y")')
+        self.assertEqual(row["Vendor"], "'@SUM(A1:A9)")
+        self.assertEqual(row["Quantity"], "3")
+
+    def test_numbers_are_left_alone(self):
+        self.assertEqual(export_module.safe_cell("-12.50"), "-12.50")
+        self.assertEqual(export_module.safe_cell("-1+2"), "'-1+2")
+        self.assertEqual(export_module.safe_cell(-3), -3)
+
+
+class CachedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_local_lock_released_when_compute_fails(self):
+        def fail():
+            raise RuntimeError("boom")
+
+        with self.assertRaises(RuntimeError):
+            cache_module.cached("test", (Order,), fail)
+        self.assertEqual(cache_module.cached("test", (Order,), lambda: 3), 3)
+        self.assertEqual(cache_module.cached("test", (Order,), lambda: 4), 3)  # a hit
+        self.assertEqual(cache_module._local_locks, {})
+
+
+class TransitionLogTests(TestCase):
+    """A change and its StatusTransition rows commit or roll back together."""
+
+    def setUp(self):
+        self.user = User.objects.create_user("manager", password="-")
+        category = Category.objects.create(name="Parts")
+        product = Product.objects.create(
+            product_id="P-1", name="Bolt", category=category, price=Decimal("2.00")
+        )
+        self.pos = [PurchaseOrder.objects.create(product=product, quantity=q) for q in (1, 2)]
+
+    def assertPending(self, po):
+        po.refresh_from_db()
+        self.assertEqual((po.approval_status, po.status), ("PENDING", "PO_RAISED"))
+
+    def test_commit_writes_the_log(self):
+        with transition_module.logged_atomic():
+            transition_module.set_approval(self.pos[0], "APPROVED", self.user)
+        entry = StatusTransition.objects.get()
+        self.assertEqual(
+            (entry.object_id, entry.from_status, entry.to_status, entry.user_id),
+            (self.pos[0].pk, "PO_RAISED", "PO_APPROVED", self.user.pk),
+        )
+
+    def test_error_rolls_back_change_and_log(self):
+        with self.assertRaises(RuntimeError):
+            with transition_module.logged_atomic():
+                transition_module.set_approval(self.pos[0], "APPROVED", self.user)
+                raise RuntimeError
+        self.assertPending(self.pos[0])
+        self.assertFalse(StatusTransition.objects.exists())
+
+    def test_caught_nested_error_drops_only_the_nested_change(self):
+        with transition_module.logged_atomic():
+            transition_module.set_approval(self.pos[0], "APPROVED", self.user)
+            try:
+                with transition_module.logged_atomic():
+                    transition_module.set_approval(self.pos[1], "APPROVED", self.user)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertPending(self.pos[1])
+        self.assertEqual(
+            list(StatusTransition.objects.values_list("object_id", flat=True)),
+            [self.pos[0].pk],
+        )
+
+
+class CatalogMixin:
+    """A logged-in user, two products and a vendor."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_superuser("admin", "admin@example.com", "-")
+        self.client.force_login(self.user)
+        category = Category.objects.create(name="Parts")
+        self.products = [
+            Product.objects.create(
+                product_id=f"P-{i}", name=f"Part {i}", category=category, price=price
+            )
+            for i, price in enumerate((Decimal("10.00"), Decimal("2.50")), start=1)
+        ]
+        self.vendor = Vendor.objects.create(vendor_id="V-1", name="Acme", address="-")
+
+    def _order(self, qty, product=None):
+        return Order.objects.create(
+            user=self.user, product=product or self.products[0], vendor=self.vendor, quantity=qty
+        )
+
+    def walk(self, name, query, *, step="next_url"):
+        """Follow a keyset list's ``step`` links; the rows of every page."""
+        pages, url = [], reverse(name) + query
+        while url:
+            page = self.client.get(url).context["page"]
+            pages.append(list(page.object_list))
+            url = getattr(page, step) and reverse(name) + getattr(page, step)
+        return pages
+
+
+class KeysetPaginationTests(CatalogMixin, TestCase):
+    """Cursor pages cover every row exactly once, ties included."""
+
+    def setUp(self):
+        super().setUp()
+        # totals 30, 10, 30, 20, 30, 10, 20 – ties broken by id
+        self.orders = [self._order(qty) for qty in (3, 1, 3, 2, 3, 1, 2)]
+
+    def test_pages_follow_sort_then_id(self):
+        pages = self.walk("order_list", "?sort=-total_price&page_size=3")
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        expected = sorted(self.orders, key=lambda o: (-o.quantity, -o.pk))
+        self.assertEqual([o.pk for page in pages for o in page], [o.pk for o in expected])
+
+    def test_previous_links_lead_back_to_the_first_page(self):
+        url = reverse("order_list") + "?sort=quantity&page_size=2"
+        first = self.client.get(url).context["page"]
+        second = self.client.get(reverse("order_list") + first.next_url).context["page"]
+        back = self.client.get(reverse("order_list") + second.previous_url).context["page"]
+        self.assertEqual([o.pk for o in back], [o.pk for o in first])
+        self.assertFalse(back.has_previous)
+
+    def test_tampered_cursor_restarts_at_the_first_page(self):
+        page = self.client.get(reverse("order_list") + "?cursor=not-a-cursor").context["page"]
+        self.assertEqual(page.object_list[0].pk, self.orders[-1].pk)
+
+    def test_filter_narrows_the_pages(self):
+        pages = self.walk("order_list", "?quantity=3&page_size=2")
+        self.assertEqual(
+            [o.pk for page in pages for o in page],
+            [o.pk for o in reversed(self.orders) if o.quantity == 3],
+        )
+
+
+class ApprovalQueueTests(CatalogMixin, TestCase):
+    """One queue over pending POs, inward lots and orders; bulk decisions."""
+
+    def setUp(self):
+        super().setUp()
+        self.po = PurchaseOrder.objects.create(
+            product=self.products[0], vendor=self.vendor, quantity=4  # 40.00
+        )
+        self.lot = Inventory.objects.create(
+            product=self.products[1], vendor=self.vendor, stock_quantity=6, inward_qty=6
+        )  # 15.00
+        self.order = self._order(2)  # 20.00
+        approved = self._order(9)
+        approved.approval_status, approved.status = "APPROVED", "ORDER_APPROVED"
+        approved.save()
+
+    def test_queue_merges_pending_rows_by_value(self):
+        pages = self.walk("approval_request_list", "?sort=value&page_size=2")
+        self.assertEqual(
+            [(item.kind, item.id, item.value) for page in pages for item in page],
+            [
+                ("inventory", self.lot.pk, Decimal("15.00")),
+                ("order", self.order.pk, Decimal("20.00")),
+                ("po", self.po.pk, Decimal("40.00")),
+            ],
+        )
+
+    def test_type_tab_and_counts(self):
+        response = self.client.get(reverse("approval_request_list") + "?type=order")
+        self.assertEqual([item.id for item in response.context["items"]], [self.order.pk])
+        self.assertEqual(
+            {kind: count for kind, _, count, _ in response.context["type_tabs"]},
+            {"po": 1, "inventory": 1, "order": 1},
+        )
+
+    def test_bulk_approval_reports_every_outcome(self):
+        rejected = self._order(1)
+        rejected.approval_status, rejected.status = "CANCELLED", "ORDER_REJECTED"
+        rejected.save()
+        shipped = self._order(1)
+        shipped.approval_status, shipped.status = "APPROVED", "ORDER_SHIPPED"
+        shipped.save()
+
+        response = self.client.post(
+            reverse("update_approval", args=["order"]),
+            {"action": "APPROVED", "pk": [self.order.pk, shipped.pk, rejected.pk, 999, "x"]},
+            follow=True,
+        )
+        texts = [str(m) for m in response.context["messages"]]
+        self.assertEqual(
+            texts,
+            [
+                f"Order #{self.order.pk} set to APPROVED",
+                f"Order #{shipped.pk} already APPROVED",
+                # a rejection is re-requested (PENDING) before it can be approved
+                f"Order #{rejected.pk} cannot move to APPROVED from their current status",
+                "Order #999 not found",
+                "Ignored invalid id(s): x",
+            ],
+        )
+
+        self.order.refresh_from_db()
+        self.assertEqual(
+            (self.order.approval_status, self.order.status), ("APPROVED", "ORDER_APPROVED")
+        )
+        self.assertEqual(
+            list(StatusTransition.objects.values_list("object_id", "to_status")),
+            [(self.order.pk, "ORDER_APPROVED")],
+        )
+
+    def test_bulk_approval_blocks_moves_past_the_approval_stage(self):
+        shipped = self._order(1)
+        shipped.approval_status, shipped.status = "APPROVED", "ORDER_SHIPPED"
+        shipped.save()
+        response = self.client.post(
+            reverse("update_approval", args=["order"]),
+            {"action": "CANCELLED", "pk": [shipped.pk]},
+            follow=True,
+        )
+        texts = [str(m) for m in response.context["messages"]]
+        self.assertIn(
+            f"Order #{shipped.pk} cannot move to CANCELLED from their current status", texts
+        )
+        shipped.refresh_from_db()
+        self.assertEqual(shipped.status, "ORDER_SHIPPED")
+
+    def test_select_all_is_capped(self):
+        extra = [self._order(1) for _ in range(2)]
+        ids = [self.order.pk] + [o.pk for o in extra]
+        with mock.patch("app.view.approval_view.MAX_BULK_APPROVALS", 2):
+            response = self.client.post(
+                reverse("update_approval", args=["order"]),
+                {"action": "APPROVED", "pk": ids},
+                follow=True,
+            )
+        approved = Order.objects.filter(pk__in=ids, approval_status="APPROVED")
+        self.assertEqual(sorted(approved.values_list("pk", flat=True)), ids[:2])
+        texts = [str(m) for m in response.context["messages"]]
+        self.assertTrue(any(t.startswith("1 more selected row(s) skipped") for t in texts))
+
+
+class ValuationCloseTests(TestCase):
+    """A period can only be closed as of today, and only once unless forced."""
+
+    def test_only_today_can_be_closed(self):
+        today = timezone.localdate()
+        for day in (today - timedelta(days=1), today + timedelta(days=1)):
+            with self.subTest(day=day), self.assertRaises(valuation_module.PeriodNotCurrent):
+                valuation_module.close_period(day)
+        self.assertFalse(ValuationPeriod.objects.exists())
+        self.assertEqual(valuation_module.close_period(today).period_end, today)
+
+    def test_reclosing_needs_force(self):
+        today = timezone.localdate()
+        valuation_module.close_period(today)
+        with self.assertRaises(valuation_module.PeriodClosed):
+            valuation_module.close_period(today)
+        valuation_module.close_period(today, force=True)
+        self.assertEqual(ValuationPeriod.objects.count(), 1)
+
+    def test_command_rejects_a_future_date(self):
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        with self.assertRaises(CommandError):
+            call_command("close_valuation_period", date=str(tomorrow), stdout=StringIO())
+
+
+class RollupWatermarkTests(CatalogMixin, TestCase):
+    """Each source row is folded into the daily rollup exactly once."""
+
+    def ordered(self):
+        return DailyRollup.objects.aggregate(qty=Sum("ordered_qty"), value=Sum("ordered_value"))
+
+    def test_rows_are_folded_once(self):
+        self._order(3)
+        self._order(2, product=self.products[1])
+        self.assertGreater(rollup_module.run_rollup(), 0)
+        self.assertEqual(self.ordered(), {"qty": 5, "value": Decimal("35.00")})
+        state = rollup_module.rollup_state()
+
+        self.assertEqual(rollup_module.run_rollup(), 0)  # nothing new
+        self.assertEqual(self.ordered()["qty"], 5)
+        self.assertEqual(rollup_module.rollup_state(), state)
+
+        self._order(4)
+        self.assertEqual(rollup_module.run_rollup(), 1)
+        self.assertEqual(self.ordered()["qty"], 9)
+        self.assertNotEqual(rollup_module.rollup_state(), state)
+
+    def test_full_rebuild_matches_incremental(self):
+        self._order(3)
+        rollup_module.run_rollup()
+        self._order(1)
+        rollup_module.run_rollup()
+        incremental = self.ordered()
+        rollup_module.run_rollup(full=True)
+        self.assertEqual(self.ordered(), incremental)
+
+
+class FilterErrorTests(CatalogMixin, TestCase):
+    """Invalid filter values are reported, never silently dropped."""
+
+    def setUp(self):
+        super().setUp()
+        self.orders = [self._order(qty) for qty in (1, 2)]
+
+    def test_list_warns_and_ignores_the_bad_filter(self):
+        response = self.client.get(reverse("order_list") + "?quantity=abc&status=ORDER_RAISED")
+        texts = [str(m) for m in response.context["messages"]]
+        self.assertEqual(texts, ["Filter ignored – quantity: not a whole number"])
+        self.assertEqual(len(response.context["page"]), 2)
+
+    def test_valid_filters_still_apply(self):
+        response = self.client.get(reverse("order_list") + "?quantity=2&order_date=2024-02-30")
+        texts = [str(m) for m in response.context["messages"]]
+        self.assertEqual(texts, ["Filter ignored – order_date: expected YYYY-MM-DD"])
+        self.assertEqual([o.pk for o in response.context["page"]], [self.orders[1].pk])
+
+    def test_export_rejects_bad_filters(self):
+        response = self.client.get(reverse("export_orders") + "?status=NOPE")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("status: unknown value 'NOPE'", response.content.decode())
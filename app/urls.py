@@ -4,6 +4,7 @@ from . import views
 from .view import (
     approval_view,
     category_view,
+    chart_view,
     inventory_view,
     order_view,
     product_view,
@@ -14,6 +15,20 @@ from .view import (
 
 urlpatterns = [
     path("", views.dashboard, name="dashboard"),
+    path("dashboard/live/", views.dashboard_async, name="dashboard_async"),
+    path(
+        "charts/stock/",
+        chart_view.chart_data,
+        {"chart": "stock"},
+        name="stock_chart_data",
+    ),
+    path(
+        "charts/order/",
+        chart_view.chart_data,
+        {"chart": "order"},
+        name="order_chart_data",
+    ),
+    path("charts/trend/", chart_view.trend_chart_data, name="trend_chart_data"),
     path("products/", product_view.product_list, name="product_list"),
     path("products/add/", product_view.add_product, name="add_product"),
     path("products/edit/<int:pk>/", product_view.edit_product, name="edit_product"),
@@ -36,6 +51,7 @@ urlpatterns = [
     path("vendors/delete/<int:pk>/", vendor_view.delete_vendor, name="delete_vendor"),
     path("inventory/", inventory_view.inventory_list, name="inventory_list"),
     path("inventory/add/", inventory_view.add_inventory, name="add_inventory"),
+    path("inventory/export/", inventory_view.export_inventory, name="export_inventory"),
     path(
         "inventory/edit/<int:pk>/", inventory_view.edit_inventory, name="edit_inventory"
     ),
@@ -46,10 +62,10 @@ urlpatterns = [
     ),
     path("orders/", order_view.order_list, name="order_list"),
     path("orders/add/", order_view.add_order, name="add_order"),
-    path("load-vendors/", order_view.load_vendors, name="load_vendors"),
-    path(
-        "get-stock-quantity/", order_view.get_stock_quantity, name="get_stock_quantity"
-    ),
+    path("orders/add/batch/", order_view.add_order_batch, name="add_order_batch"),
+    path("orders/export/", order_view.export_orders, name="export_orders"),
+    path("stock-availability/", order_view.stock_availability, name="stock_availability"),
+    path("stock-map/", order_view.stock_map, name="stock_map"),
     path("orders/edit/<int:pk>/", order_view.edit_order, name="edit_order"),
     path("orders/cancel/<int:pk>/", order_view.cancel_order, name="cancel_order"),
     path("orders/delete//<int:pk>", order_view.delete_order, name="delete_order"),
@@ -66,6 +82,7 @@ urlpatterns = [
     ),
     path("purchase/", purchase_view.purchase_list, name="purchase_list"),
     path("purchase/add/", purchase_view.add_purchase, name="add_purchase"),
+    path("purchase/export/", purchase_view.export_purchases, name="export_purchases"),
     path("purchase/<int:pk>/edit/", purchase_view.edit_purchase, name="edit_purchase"),
     path(
         "purchase/<int:pk>/delete/",
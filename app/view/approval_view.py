@@ -1,11 +1,32 @@
-from decimal import Decimal, InvalidOperation
-
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db.models import DecimalField, ExpressionWrapper, F, Q
+from django.db.models import DecimalField, ExpressionWrapper, F
 from django.shortcuts import get_object_or_404, redirect, render
-
-from app.models import Inventory, Order, PurchaseOrder
+from django.utils import timezone
+
+from app.models import Inventory, Order, Product, PurchaseOrder, StatusTransition, Vendor
+from app.modules.approval_module import QUEUE_LABELS, QUEUE_SOURCES, approval_queue
+from app.modules.cache_module import bump_version, cached
+from app.modules.filter_module import (
+    ChoiceFilter,
+    DecimalFilter,
+    FilterSpec,
+    IntFilter,
+    SearchFilter,
+    choice_values,
+    report_errors,
+)
+from app.modules.pagination_module import page_url
+from app.modules.summary_module import status_keys, summarize
+from app.modules.transition_module import (
+    STATUS_MAP,
+    InvalidTransition,
+    approval_allowed,
+    logged_atomic,
+    record_many,
+    set_approval,
+    touched_fields,
+)
 
 MODELS = {
     "po": PurchaseOrder,
@@ -13,56 +34,135 @@ MODELS = {
     "order": Order,
 }
 
-# common mapping for status when approval changes
-STATUS_MAP = {
-    "po": {
-        "PENDING": "PO_RAISED",
-        "APPROVED": "PO_APPROVED",
-        "CANCELLED": "PO_REJECTED",
-    },
-    "inventory": {
-        "PENDING": "INWARD_REQUESTED",
-        "APPROVED": "INWARD_APPROVED",
-        "CANCELLED": "INWARD_REJECTED",
-    },
-    "order": {
-        "PENDING": "ORDER_RAISED",
-        "APPROVED": "ORDER_APPROVED",
-        "CANCELLED": "ORDER_REJECTED",
-    },
+
+def _approval_filters(Model, qty_field):
+    return FilterSpec(
+        IntFilter("id", "id"),
+        SearchFilter("vendor", "vendor_id", kind="vendor"),
+        SearchFilter("product", "product_id", kind="product"),
+        DecimalFilter("product_price", "product__price"),
+        IntFilter("qty", qty_field),
+        DecimalFilter("total_price", "total_price"),
+        ChoiceFilter("status", "status", choices=choice_values(Model.STATUS_CHOICES)),
+        ChoiceFilter(
+            "approval_status",
+            "approval_status",
+            choices=choice_values(Model._meta.get_field("approval_status").choices),
+        ),
+    )
+
+
+APPROVAL_FILTERS = {
+    "po": _approval_filters(PurchaseOrder, "quantity"),
+    "inventory": _approval_filters(Inventory, "inward_qty"),
+    "order": _approval_filters(Order, "quantity"),
 }
 
+# rows one bulk approval may touch
+MAX_BULK_APPROVALS = 500
+
+
+def _selected_ids(post):
+    """Distinct ids from the repeated ``pk`` field, in the order posted, and
+    the raw values that are not ids."""
+    ids, invalid = {}, []
+    for raw in post.getlist("pk"):
+        try:
+            ids[int(raw)] = None
+        except ValueError:
+            invalid.append(raw)
+    return list(ids), invalid
+
+
+@logged_atomic()
+def _set_approval(model, ids, action, user):
+    """Apply ``action`` and its mapped status to ``ids`` with one UPDATE.
+
+    Returns the ids per outcome: ``updated``, ``unchanged`` (already at
+    ``action``), ``blocked`` (not an allowed transition) and ``missing``.
+    ``update()`` skips the save signals and ``auto_now``, so the model's
+    cache version is bumped and its timestamps set here; the transitions
+    are logged in one batch.
+    """
+    Model = MODELS[model]
+    status = STATUS_MAP[model][action]
+    current = {
+        pk: (approval, old_status)
+        for pk, approval, old_status in Model.objects.select_for_update()
+        .filter(pk__in=ids)
+        .values_list("pk", "approval_status", "status")
+    }
+    outcomes = {"updated": [], "unchanged": [], "blocked": [], "missing": []}
+    for pk in ids:
+        if pk not in current:
+            outcomes["missing"].append(pk)
+        elif current[pk][0] == action:
+            outcomes["unchanged"].append(pk)
+        elif not approval_allowed(model, *current[pk], action):
+            outcomes["blocked"].append(pk)
+        else:
+            outcomes["updated"].append(pk)
+
+    if outcomes["updated"]:
+        now = timezone.now()
+        Model.objects.filter(pk__in=outcomes["updated"]).update(
+            approval_status=action,
+            status=status,
+            **{name: now for name in touched_fields(Model)},
+        )
+        bump_version(Model)
+        record_many(
+            StatusTransition(
+                kind=model,
+                object_id=pk,
+                from_approval=current[pk][0],
+                to_approval=action,
+                from_status=current[pk][1],
+                to_status=status,
+                user=user,
+            )
+            for pk in outcomes["updated"]
+        )
+    return outcomes
+
+
+def _id_list(ids, limit=20):
+    shown = ", ".join(f"#{pk}" for pk in ids[:limit])
+    return shown + (f" and {len(ids) - limit} more" if len(ids) > limit else "")
+
+
+def _queue_context(request):
+    """Pending approvals of every type (or ``?type=``) as one paginated queue."""
+    kind = request.GET.get("type")
+    if kind not in QUEUE_SOURCES:
+        kind = None
+    page, counts = approval_queue(request, kinds=[kind] if kind else None)
+    return {
+        "page": page,
+        "items": page.object_list,
+        "type": kind,
+        "type_tabs": [
+            (
+                value,
+                QUEUE_LABELS[value],
+                counts[value],
+                page_url(request.GET, type=value, cursor=None),
+            )
+            for value in QUEUE_SOURCES
+        ],
+        "all_url": page_url(request.GET, type=None, cursor=None),
+        "total_pending": sum(counts.values()),
+    }
+
 
 @login_required
 def approval_request_list(request):
-    purchase_orders = PurchaseOrder.objects.filter(approval_status="PENDING")
-    inventories = Inventory.objects.filter(approval_status="PENDING")
-    orders = Order.objects.filter(approval_status="PENDING")
-    return render(
-        request,
-        "app/approval/approval_request_list.html",
-        {
-            "purchase_orders": purchase_orders,
-            "inventories": inventories,
-            "orders": orders,
-        },
-    )
+    return render(request, "app/approval/approval_request_list.html", _queue_context(request))
 
 
 @login_required
 def approval_manager_list(request):
-    purchase_orders = PurchaseOrder.objects.filter(approval_status="PENDING")
-    inventories = Inventory.objects.filter(approval_status="PENDING")
-    orders = Order.objects.filter(approval_status="PENDING")
-    return render(
-        request,
-        "app/approval/approval_manager_list.html",
-        {
-            "purchase_orders": purchase_orders,
-            "inventories": inventories,
-            "orders": orders,
-        },
-    )
+    return render(request, "app/approval/approval_manager_list.html", _queue_context(request))
 
 
 @login_required
@@ -91,77 +191,58 @@ def update_approval(request, model):
     Model = MODELS[model]
 
     if request.method == "POST":
-        pk = request.POST["pk"]
-        action = request.POST["action"]
-        obj = get_object_or_404(Model, pk=pk)
-        obj.approval_status = action
-        obj.status = STATUS_MAP[model][action]
-        obj.save(update_fields=["approval_status", "status"])
-        messages.success(request, f"{model.title()} #{pk} set to {action}")
-        return redirect("update_approval", model=model)
-
-    # --- Build query filters ---
-    query = Q()
-
-    # ID filter
-    id_q = request.GET.get("id")
-    if id_q:
-        query &= Q(id=id_q)
-
-    # Vendor filter
-    vendor_q = request.GET.get("vendor")
-    if vendor_q:
-        query &= Q(vendor__name__icontains=vendor_q) | Q(
-            vendor__vendor_id__icontains=vendor_q
-        )
-
-    # Product filter
-    product_q = request.GET.get("product")
-    if product_q:
-        query &= Q(product__name__icontains=product_q) | Q(
-            product__product_id__icontains=product_q
-        )
-
-    # Product price filter - same logic as order_list
-    product_price = request.GET.get("product_price")
-    if product_price:
-        try:
-            product_price_decimal = Decimal(product_price)
-            query &= Q(product__price=product_price_decimal)
-        except (InvalidOperation, ValueError):
-            pass
-
-    # Quantity filter
-    qty_q = request.GET.get("qty")
-    if qty_q:
-        try:
-            qty_val = int(qty_q)
-            if model == "inventory":
-                query &= Q(inward_qty=qty_q)
-            else:
-                query &= Q(quantity=qty_q)
-        except ValueError:
-            pass
-
-    # Total price filter - using the same logic as order_list
-    total_price = request.GET.get("total_price")
-    if total_price:
-        try:
-            total_price_decimal = Decimal(total_price)
-            query &= Q(total_price=total_price_decimal)
-        except (InvalidOperation, ValueError):
-            pass
-
-    # Status filter - Use the same approach as order_list
-    status_q = request.GET.get("status")
-    if status_q:
-        query &= Q(status=status_q)
-
-
-    # Approval Status filter
-    approval_status_q = request.GET.get("approval_status")
-    if approval_status_q:
-        query &= Q(approval_status=approval_status_q)
+        # one row's buttons post a single pk, the bulk bar every ticked one
+        action = request.POST.get("action")
+        ids, invalid = _selected_ids(request.POST)
+        tags = "auto-dismiss page-specific"
+        if action not in STATUS_MAP[model]:
+            messages.error(request, "Choose Pending, Approve or Cancel.", extra_tags=tags)
+        elif not ids and not invalid:
+            messages.warning(request, "Select at least one row.", extra_tags=tags)
+        else:
+            # "select all" can tick more than one batch; apply the first one
+            ids, skipped = ids[:MAX_BULK_APPROVALS], ids[MAX_BULK_APPROVALS:]
+            outcomes = _set_approval(model, ids, action, request.user) if ids else {}
+            if outcomes.get("updated"):
+                messages.success(
+                    request,
+                    f"{model.title()} {_id_list(outcomes['updated'])} set to {action}",
+                    extra_tags=tags,
+                )
+            if outcomes.get("unchanged"):
+                messages.info(
+                    request,
+                    f"{model.title()} {_id_list(outcomes['unchanged'])} already {action}",
+                    extra_tags=tags,
+                )
+            if outcomes.get("blocked"):
+                messages.error(
+                    request,
+                    f"{model.title()} {_id_list(outcomes['blocked'])} cannot move to {action}"
+                    " from their current status",
+                    extra_tags=tags,
+                )
+            if outcomes.get("missing"):
+                messages.warning(
+                    request,
+                    f"{model.title()} {_id_list(outcomes['missing'])} not found",
+                    extra_tags=tags,
+                )
+            if skipped:
+                messages.warning(
+                    request,
+                    f"{len(skipped)} more selected row(s) skipped – at most "
+                    f"{MAX_BULK_APPROVALS} are updated at a time; submit again for the rest",
+                    extra_tags=tags,
+                )
+            if invalid:
+                messages.error(
+                    request, f"Ignored invalid id(s): {', '.join(invalid[:20])}", extra_tags=tags
+                )
+        return redirect(request.get_full_path())
+
+    filters = APPROVAL_FILTERS[model].parse(request.GET)
+    report_errors(request, filters)
 
     # --- choose the right queryset ---
     if model == "inventory":
@@ -182,13 +263,23 @@ def update_approval(request, model):
         )
 
     # Apply filters
-    qs = qs.filter(query)
+    qs = qs.filter(filters.q)
+
+    summary = cached(
+        f"update_approval:{model}",
+        (Model, Product, Vendor),
+        lambda: summarize(
+            qs,
+            totals={"total_qty": "qty", "total_price": "total_price"},
+            statuses=status_keys(Model.STATUS_CHOICES),
+            status_quantity="qty",
+        ),
+        params=filters.cache_params,
+    )
 
     # Status choices for filter dropdown - Use the same approach as order_list
     status_choices = Model.STATUS_CHOICES
 
-    if status_q:
-        print(f"Sample record status: {qs.first().status if qs.exists() else 'No records'}")
     context = {
         "records": qs,
         "model": model,
@@ -197,6 +288,7 @@ def update_approval(request, model):
             model
         ],
         "status_choices": status_choices,
+        "summary": summary,
     }
 
     return render(request, "app/approval/update_approval.html", context)
@@ -234,10 +326,15 @@ def _handle_approval(request, model, pk, action, verb):
     obj = get_object_or_404(qs, pk=pk)
 
     if request.method == "POST":
-        obj.approval_status = action
-        obj.status = STATUS_MAP[model][action]
-        obj.save(update_fields=["approval_status", "status"])
-        messages.success(request, f"{model.title()} #{pk} marked {verb}.")
+        try:
+            changed = set_approval(obj, action, request.user)
+        except InvalidTransition as exc:
+            messages.error(request, f"{model.title()} #{pk}: {exc}")
+        else:
+            if changed:
+                messages.success(request, f"{model.title()} #{pk} marked {verb}.")
+            else:
+                messages.info(request, f"{model.title()} #{pk} is already {verb}.")
         return redirect("approval_manager_list")
 
     # GET → confirmation page
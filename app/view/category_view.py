@@ -2,7 +2,8 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import get_object_or_404, redirect, render
 
-from app.models import Category
+from app.models import Category, Order, Product
+from app.modules import snapshot_module
 
 
 @login_required
@@ -48,7 +49,12 @@ def edit_category(request, pk):
 def delete_category(request, pk):
     category = get_object_or_404(Category, pk=pk)
     if request.method == "POST":
-        category.delete()
+        # its products and their orders, lots and POs cascade
+        with snapshot_module.batched_deltas(
+            products=Product.objects.filter(category=category),
+            orders=Order.objects.filter(product__category=category),
+        ):
+            category.delete()
         messages.success(
             request,
             f"Category - {category.name} deleted successfully!",
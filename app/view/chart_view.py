@@ -0,0 +1,182 @@
+from datetime import timedelta
+
+from django.contrib.auth.decorators import login_required
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth
+from django.http import HttpResponseBadRequest, JsonResponse
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from app.models import Category, DailyRollup, Inventory, Order, Product, Vendor
+from app.modules.cache_module import cached, fingerprint, last_changed, revalidate
+from app.modules.chart_module import chart_payload
+from app.modules.rollup_module import rollup_state
+
+# ?group= → field to group by; "month" is resolved per model
+GROUPINGS = {
+    "product": "product__name",
+    "vendor": "vendor__name",
+    "category": "product__category__name",
+    "month": None,
+}
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 100
+
+CHARTS = {
+    "stock": {
+        "model": Inventory,
+        "quantity": "stock_quantity",
+        "date": "inward_date",
+        "label": "Stock",
+    },
+    "order": {
+        "model": Order,
+        "quantity": "quantity",
+        "date": "order_date",
+        "label": "Orders",
+    },
+}
+DEPENDS_ON = (Product, Vendor, Category)
+
+# series drawn by the trend chart: rollup column → legend label
+TREND_SERIES = {
+    "qty": {"ordered_qty": "Ordered", "po_qty": "Purchased", "inward_qty": "Inward"},
+    "value": {"ordered_value": "Ordered", "po_value": "Purchased"},
+}
+# y-axis title per metric
+TREND_UNITS = {"qty": "Units", "value": "Value (₹)"}
+DEFAULT_DAYS = 30
+MAX_DAYS = 366
+
+
+def _params(request):
+    group = request.GET.get("group", "product")
+    try:
+        limit = min(max(int(request.GET.get("limit", DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except ValueError:
+        limit = DEFAULT_LIMIT
+    return group, limit
+
+
+def _models(chart):
+    return (CHARTS[chart]["model"],) + DEPENDS_ON
+
+
+def _summary(chart, group, limit):
+    spec = CHARTS[chart]
+    qs = spec["model"].objects.all()
+    if group == "month":
+        rows = (
+            qs.annotate(label=TruncMonth(spec["date"]))
+            .values("label")
+            .annotate(total=Sum(spec["quantity"]))
+            .order_by("-label")[:limit]
+        )
+        rows = [
+            {"label": row["label"].strftime("%b %Y"), "total": row["total"]}
+            for row in reversed(list(rows))
+        ]
+    else:
+        rows = list(
+            qs.values(label=F(GROUPINGS[group]))
+            .annotate(total=Sum(spec["quantity"]))
+            .order_by("-total")[:limit]
+        )
+        for row in rows:
+            row["label"] = row["label"] or "N/A"
+    return chart_payload(rows, dataset_label=spec["label"])
+
+
+def _etag(request, chart):
+    return fingerprint(_models(chart), _params(request))
+
+
+def _last_modified(request, chart):
+    return last_changed(_models(chart))
+
+
+@login_required
+@condition(etag_func=_etag, last_modified_func=_last_modified)
+def chart_data(request, chart):
+    group, limit = _params(request)
+    if group not in GROUPINGS:
+        return HttpResponseBadRequest(
+            f"Unknown group '{group}'. Use one of: {', '.join(GROUPINGS)}."
+        )
+
+    payload = cached(
+        f"chart:{chart}",
+        _models(chart),
+        lambda: _summary(chart, group, limit),
+        params=(group, limit),
+    )
+    return revalidate(JsonResponse(payload))
+
+
+def _trend_params(request):
+    metric = request.GET.get("metric", "qty")
+    try:
+        days = min(max(int(request.GET.get("days", DEFAULT_DAYS)), 1), MAX_DAYS)
+    except ValueError:
+        days = DEFAULT_DAYS
+    return metric, days
+
+
+def _trend(metric, days):
+    series = TREND_SERIES[metric]
+    start = timezone.localdate() - timedelta(days=days - 1)
+    rows = {
+        row["date"]: row
+        for row in DailyRollup.objects.filter(date__gte=start)
+        .values("date")
+        .annotate(**{name: Sum(name) for name in series})
+        .order_by("date")
+    }
+    dates = [start + timedelta(days=i) for i in range(days)]
+    return {
+        "unit": TREND_UNITS[metric],
+        "labels": [d.strftime("%d %b") for d in dates],
+        "datasets": [
+            {
+                "label": label,
+                "data": [(rows.get(d) or {}).get(name) or 0 for d in dates],
+            }
+            for name, label in series.items()
+        ],
+    }
+
+
+def _rollup_state(request):
+    # read once per request; shared by the ETag, Last-Modified and cache key
+    if not hasattr(request, "_rollup_state"):
+        request._rollup_state = rollup_state()
+    return request._rollup_state
+
+
+def _trend_etag(request):
+    return fingerprint(
+        (), (_trend_params(request), str(timezone.localdate()), _rollup_state(request))
+    )
+
+
+def _trend_last_modified(request):
+    return _rollup_state(request)[0]
+
+
+@login_required
+@condition(etag_func=_trend_etag, last_modified_func=_trend_last_modified)
+def trend_chart_data(request):
+    """Daily totals from the rollup table – never scans the source tables."""
+    metric, days = _trend_params(request)
+    if metric not in TREND_SERIES:
+        return HttpResponseBadRequest(
+            f"Unknown metric '{metric}'. Use one of: {', '.join(TREND_SERIES)}."
+        )
+
+    payload = cached(
+        "chart:trend",
+        (),
+        lambda: _trend(metric, days),
+        params=(metric, days, str(timezone.localdate()), _rollup_state(request)),
+    )
+    return revalidate(JsonResponse(payload))
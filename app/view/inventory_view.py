@@ -1,109 +1,168 @@
-from decimal import DivisionByZero, InvalidOperation, Decimal
+from decimal import Decimal, InvalidOperation
+
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db.models import DecimalField, ExpressionWrapper, F, Sum, Q
+from django.db import transaction
 from django.shortcuts import get_object_or_404, redirect, render
-from django.utils.dateparse import parse_date
 from app.models import Inventory, Product, Vendor
+from app.modules.cache_module import cached
+from app.modules.export_module import (
+    choice_label,
+    column,
+    local_datetime,
+    money,
+    stream_csv,
+)
+from app.modules.filter_module import (
+    ChoiceFilter,
+    DateFilter,
+    DecimalFilter,
+    FilterSpec,
+    IntFilter,
+    SearchFilter,
+    choice_values,
+    invalid_filters,
+    report_errors,
+)
+from app.modules.pagination_module import keyset_paginate, line_total
+from app.modules.summary_module import summarize
+from app.modules.transition_module import (
+    InvalidTransition,
+    check_status,
+    logged_atomic,
+    set_approval,
+    set_status,
+    status_choices,
+)
+
+# ?sort= names → sortable columns of the inventory list
+INVENTORY_SORT_FIELDS = {
+    "id": "id",
+    "inward_qty": "inward_qty",
+    "stock_quantity": "stock_quantity",
+    "total_price": "total_price",
+    "date": "inward_date",
+}
+
+INVENTORY_FILTERS = FilterSpec(
+    IntFilter("inv_id", "id"),
+    SearchFilter("product", "product_id", kind="product"),
+    SearchFilter("vendor", "vendor_id", kind="vendor"),
+    IntFilter("stock_quantity", "stock_quantity"),
+    IntFilter("inward_qty", "inward_qty"),
+    DateFilter("inward_date", "inward_date"),
+    DecimalFilter("total_price", "total_price"),
+    ChoiceFilter("status", "status", choices=choice_values(Inventory.STATUS_CHOICES)),
+)
+
+INVENTORY_EXPORT_COLUMNS = [
+    column("Inward ID", "id"),
+    column("Inward Date", "inward_date", local_datetime),
+    column("Product ID", "product__product_id"),
+    column("Product", "product__name"),
+    column("Vendor ID", "vendor__vendor_id"),
+    column("Vendor", "vendor__name"),
+    column("Inward Qty", "inward_qty"),
+    column("Current Qty", "stock_quantity"),
+    column("Unit Price", "product__price", money),
+    column("Total Price", "total_price", money),
+    column("Unit Cost", "unit_cost", money),
+    column("Status", "status", choice_label(Inventory.STATUS_CHOICES)),
+    column(
+        "Approval",
+        "approval_status",
+        choice_label(Inventory._meta.get_field("approval_status").choices),
+    ),
+    column("Last Updated", "last_updated", local_datetime),
+]
+
+
+def _filtered_inventory(filters):
+    return Inventory.objects.annotate(total_price=line_total("stock_quantity")).filter(filters.q)
+
 
 @login_required
 def inventory_list(request):
-    query = Q()
-
-
-    # ----- filters -----------------------------------------------------------
-    inv_id = request.GET.get("inv_id")
-    if inv_id:
-        query &= Q(id=inv_id)
-
-    product_q = request.GET.get("product")
-    if product_q:
-        query &= Q(product__name__icontains=product_q) | \
-                 Q(product__product_id__icontains=product_q)
-
-    vendor_q = request.GET.get("vendor")
-    if vendor_q:
-        query &= Q(vendor__name__icontains=vendor_q) | \
-                 Q(vendor__vendor_id__icontains=vendor_q)
-
-    stock_quantity = request.GET.get("stock_quantity")
-    if stock_quantity:
-        try:
-            query &= Q(stock_quantity=int(stock_quantity))
-        except ValueError:
-            pass
-
-    inward_qty = request.GET.get("inward_qty")
-    if inward_qty:
-        try:
-            query &= Q(inward_qty=int(inward_qty))
-        except ValueError:
-            pass
-
-    inward_date = request.GET.get("inward_date")
-    if inward_date:
-        parsed_date = parse_date(inward_date)
-        if parsed_date:
-            query &= Q(inward_date__date=parsed_date)
-
-    total_price = request.GET.get("total_price")
-    if total_price:
-        try:
-            total_price_decimal = Decimal(total_price)
-            query &= Q(total_price=total_price_decimal)
-        except (InvalidOperation, DivisionByZero):
-            pass
-    status = request.GET.get("status")
-    if status:
-        query &= Q(status=status)
-    # -------------------------------------------------------------------------
-
+    filters = INVENTORY_FILTERS.parse(request.GET)
+    report_errors(request, filters)
     inventory = (
-        Inventory.objects
-        .annotate(
-            total_price=ExpressionWrapper(
-                F("stock_quantity") * F("product__price"),
-                output_field=DecimalField(max_digits=10, decimal_places=2),
-            )
-        )
-        .filter(query)
-        .order_by("-id")
+        _filtered_inventory(filters).select_related("product", "vendor").order_by("-id")
     )
 
     # ---- totals -------------------------------------------------------------
-    total_inward_qty = (
-        inventory.aggregate(Sum("inward_qty"))["inward_qty__sum"] or 0
-    )
-    total_current_stock = (
-        inventory.aggregate(Sum("stock_quantity"))["stock_quantity__sum"] or 0
-    )
-    total_price = (
-        inventory.aggregate(Sum("total_price"))["total_price__sum"] or 0
+    summary = cached(
+        "inventory_list",
+        (Inventory, Product, Vendor),
+        lambda: summarize(
+            inventory,
+            totals={
+                "total_inward_qty": "inward_qty",
+                "total_current_stock": "stock_quantity",
+                "total_price": "total_price",
+            },
+        ),
+        params=filters.cache_params,
     )
+    page = keyset_paginate(request, inventory, sort_fields=INVENTORY_SORT_FIELDS)
 
     return render(
         request,
         "app/inventory/inventory_list.html",
         {
-            "inventory": inventory,
-            "total_inward_qty": total_inward_qty,
-            "total_current_stock": total_current_stock,
-            "total_price": total_price,
+            "inventory": page.object_list,
+            "page": page,
+            "status_choices": Inventory.STATUS_CHOICES,
+            **summary.totals,
         },
     )
 
+
 @login_required
+def export_inventory(request):
+    filters = INVENTORY_FILTERS.parse(request.GET)
+    if filters.errors:
+        return invalid_filters(filters)
+    return stream_csv(
+        _filtered_inventory(filters).order_by("id"), INVENTORY_EXPORT_COLUMNS, "inventory"
+    )
+
+
+def _unit_cost(raw: str):
+    """Posted lot cost; blank means the product's list price (``None``)."""
+    if not raw.strip():
+        return None
+    try:
+        value = Decimal(raw)
+    except InvalidOperation:
+        raise ValueError(raw) from None
+    if not value.is_finite() or value < 0:
+        raise ValueError(raw)
+    return value
+
+
+@login_required
+@transaction.atomic
 def add_inventory(request):
     if request.method == "POST":
         product_id = request.POST["product"]
         vendor_id  = request.POST["vendor"]
         qty        = int(request.POST["qty"])
+        try:
+            unit_cost = _unit_cost(request.POST.get("unit_cost", ""))
+        except ValueError:
+            messages.error(
+                request,
+                "Unit cost must be a number of zero or more.",
+                extra_tags="auto-dismiss page-specific",
+            )
+            return redirect("add_inventory")
 
         Inventory.objects.create(
             product_id     = product_id,
             vendor_id      = vendor_id,
             stock_quantity = qty,
             inward_qty     = qty,
+            unit_cost      = unit_cost,
             status         = "INWARD_REQUESTED",   # hard-coded
         )
 
@@ -125,32 +184,39 @@ def add_inventory(request):
 
 
 @login_required
+@logged_atomic()
 def edit_inventory(request, pk):
     inventory = get_object_or_404(Inventory, pk=pk)
 
-    DISALLOWED_AFTER_APPROVAL = {"INWARD_REQUESTED", "INWARD_REJECTED"}
-
-    if inventory.approval_status == "APPROVED":
-        allowed_choices = [
-            (k, v)
-            for k, v in Inventory.STATUS_CHOICES
-            if k not in DISALLOWED_AFTER_APPROVAL
-        ]
-    else:
-        allowed_choices = []
+    allowed_choices = status_choices(inventory)
 
     if request.method == "POST":
         if "request_approval" in request.POST:
-            inventory.approval_status = "PENDING"
-            inventory.save(update_fields=["approval_status"])
-            messages.success(request, f"Approval requested for Inward #{inventory.id}.")
+            try:
+                changed = set_approval(inventory, "PENDING", request.user)
+            except InvalidTransition as exc:
+                messages.error(request, str(exc))
+            else:
+                if changed:
+                    messages.success(request, f"Approval requested for Inward #{inventory.id}.")
+                else:
+                    messages.info(request, f"Inward #{inventory.id} is already pending approval.")
+            return redirect("edit_inventory", pk=pk)
+
+        # only save status if widget was rendered
+        new_status = request.POST["status"] if allowed_choices else inventory.status
+        try:
+            check_status(inventory, new_status)
+        except InvalidTransition as exc:
+            messages.error(request, str(exc), extra_tags="auto-dismiss page-specific")
             return redirect("edit_inventory", pk=pk)
 
+        if str(inventory.product_id) != request.POST["product"]:
+            inventory.unit_cost = None  # re-costed at the new product's price
         inventory.product_id   = request.POST["product"]
         inventory.vendor_id    = request.POST["vendor"]
         inventory.stock_quantity = request.POST["qty"]
-        if allowed_choices:  # only save status if widget was rendered
-            inventory.status = request.POST["status"]
+        set_status(inventory, new_status, request.user)
         inventory.save()
         messages.success(
             request,
@@ -172,6 +238,7 @@ def edit_inventory(request, pk):
 
 
 @login_required
+@transaction.atomic
 def delete_inventory(request, pk):
     inventory = get_object_or_404(Inventory, pk=pk)
     if request.method == "POST":
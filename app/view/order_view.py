@@ -1,102 +1,135 @@
-from decimal import Decimal, DivisionByZero, InvalidOperation
+import gzip
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db.models import DecimalField, ExpressionWrapper, F, Q, Sum
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.utils.dateparse import parse_date
-from django.views.decorators.http import require_http_methods
-from django.db import transaction
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import condition, require_http_methods
+from django.db import DatabaseError, transaction
 from app.models import Inventory, Order, Product, Vendor
-
+from app.modules.allocation_module import (
+    InsufficientStock,
+    allocate,
+    record_allocation,
+    restore_order,
+)
+from app.modules.cache_module import cached, fingerprint, last_changed, revalidate
+from app.modules.export_module import (
+    choice_label,
+    column,
+    local_datetime,
+    money,
+    stream_csv,
+)
+from app.modules.filter_module import (
+    ChoiceFilter,
+    DateFilter,
+    DecimalFilter,
+    FilterSpec,
+    IntFilter,
+    SearchFilter,
+    choice_values,
+    invalid_filters,
+    report_errors,
+)
+from app.modules.order_batch_module import LinesShort, parse_lines, place_order_batch
+from app.modules.pagination_module import keyset_paginate, line_total
+from app.modules.stock_module import availability, lock_balances, stock_map_blob
+from app.modules.summary_module import status_keys, summarize
+from app.modules.transition_module import (
+    InvalidTransition,
+    check_status,
+    logged_atomic,
+    set_approval,
+    set_status,
+    status_choices,
+)
+
+# ?sort= names → sortable columns of the order list
+ORDER_SORT_FIELDS = {
+    "id": "id",
+    "quantity": "quantity",
+    "total_price": "total_price",
+    "date": "order_date",
+}
+
+ORDER_FILTERS = FilterSpec(
+    IntFilter("order_id", "id"),
+    SearchFilter("product", "product_id", kind="product"),
+    IntFilter("quantity", "quantity"),
+    SearchFilter("vendor", "vendor_id", kind="vendor"),
+    DateFilter("order_date", "order_date"),
+    DecimalFilter("product_price", "product__price"),
+    DecimalFilter("total_price", "total_price"),
+    ChoiceFilter("status", "status", choices=choice_values(Order.STATUS_CHOICES)),
+)
+
+
+
+ORDER_EXPORT_COLUMNS = [
+    column("Order ID", "id"),
+    column("Order Date", "order_date", local_datetime),
+    column("Product ID", "product__product_id"),
+    column("Product", "product__name"),
+    column("Vendor ID", "vendor__vendor_id"),
+    column("Vendor", "vendor__name"),
+    column("Quantity", "quantity"),
+    column("Unit Price", "product__price", money),
+    column("Total Price", "total_price", money),
+    column("Status", "status", choice_label(Order.STATUS_CHOICES)),
+    column("Approval", "approval_status", choice_label(Order.APPROVAL_CHOICES)),
+    column("Ordered By", "user__username"),
+]
+
+
+def _filtered_orders(filters):
+    return Order.objects.annotate(total_price=line_total("quantity")).filter(filters.q)
 
 
 @login_required
 def order_list(request):
-    query = Q()
-
-    order_id = request.GET.get("order_id")
-    if order_id:
-        query &= Q(id=order_id)
-
-    product_q = request.GET.get("product")
-    if product_q:
-        query &= Q(product__name__icontains=product_q) | Q(
-            product__product_id__icontains=product_q
-        )
-
-    quantity = request.GET.get("quantity")
-    if quantity:
-        query &= Q(quantity=quantity)
-
-    vendor_q = request.GET.get("vendor")
-    if vendor_q:
-        query &= Q(vendor__name__icontains=vendor_q) | Q(
-            vendor__vendor_id__icontains=vendor_q
-        )
-
-    order_date = request.GET.get("order_date")
-    if order_date:
-        try:
-            parsed_date = parse_date(order_date)
-            query &= Q(order_date__date=parsed_date)
-        except ValueError:
-            pass
-
-    product_price = request.GET.get("product_price")
-    if product_price:
-        query &= Q(product__price=product_price)
-
-    total_price = request.GET.get("total_price")
-    if total_price:
-        try:
-            total_price_decimal = Decimal(total_price)
-            query &= Q(total_price=total_price_decimal)
-        except (InvalidOperation, DivisionByZero):
-            pass
-
-    status = request.GET.get("status")
-    if status:
-        query &= Q(status=status)
-
-    # Annotate total_price once
+    filters = ORDER_FILTERS.parse(request.GET)
+    report_errors(request, filters)
     orders = (
-        Order.objects.annotate(
-            total_price=ExpressionWrapper(
-                F("quantity") * F("product__price"),
-                output_field=DecimalField(max_digits=10, decimal_places=2),
-            )
-        )
-        .filter(query)
-        .order_by("-id")
-    )
-
-    # 1) Overall aggregates
-    orders_total = orders.aggregate(
-        total_quantity=Sum("quantity"),
-        grand_total_price=Sum("total_price"),
+        _filtered_orders(filters).select_related("product", "vendor").order_by("-id")
     )
 
-    # 2) Quantity totals per status (flat dict for template)
-    status_totals = dict(
-        orders.values("status")
-        .annotate(qty=Sum("quantity"))
-        .values_list("status", "qty")
+    summary = cached(
+        "order_list",
+        (Order, Product, Vendor),
+        lambda: summarize(
+            orders,
+            totals={"total_quantity": "quantity", "grand_total_price": "total_price"},
+            statuses=status_keys(Order.STATUS_CHOICES),
+        ),
+        params=filters.cache_params,
     )
+    page = keyset_paginate(request, orders, sort_fields=ORDER_SORT_FIELDS)
 
     return render(
         request,
         "app/order/order_list.html",
         {
-            "orders": orders,
-            "orders_total": orders_total,
-            "status_totals": status_totals,
+            "orders": page.object_list,
+            "page": page,
+            "orders_total": summary.totals,
+            "status_totals": summary.by_status,
             "status_choices": Order.STATUS_CHOICES,
         },
     )
 
 
+@login_required
+def export_orders(request):
+    filters = ORDER_FILTERS.parse(request.GET)
+    if filters.errors:
+        return invalid_filters(filters)
+    return stream_csv(
+        _filtered_orders(filters).order_by("id"), ORDER_EXPORT_COLUMNS, "orders"
+    )
+
+
 @login_required
 @transaction.atomic
 def add_order(request):
@@ -110,14 +143,10 @@ def add_order(request):
             vendor = get_object_or_404(Vendor, id=vendor_id)
 
             # ------------------------------------------------------------------
-            # 1) SUM total stock (handles multiple Inventory rows)
+            # 1) Lock the pair's stock balance (held until commit, so two
+            #    orders cannot both pass the check on the same stock)
             # ------------------------------------------------------------------
-            total_stock = (
-                Inventory.objects.filter(product=product, vendor=vendor).aggregate(
-                    total=Sum("stock_quantity")
-                )["total"]
-                or 0
-            )
+            total_stock = lock_balances([(product.pk, vendor.pk)])[product.pk, vendor.pk]
 
             if total_stock < quantity:
                 messages.error(
@@ -128,18 +157,9 @@ def add_order(request):
                 return redirect("add_order")
 
             # ------------------------------------------------------------------
-            # 2) Deduct quantity row-by-row (FIFO)
+            # 2) Deduct quantity from the oldest lots (FIFO, one UPDATE)
             # ------------------------------------------------------------------
-            remaining = quantity
-            for inv in Inventory.objects.filter(
-                product=product, vendor=vendor, stock_quantity__gt=0
-            ).order_by("id"):
-                take = min(remaining, inv.stock_quantity)
-                inv.stock_quantity = F("stock_quantity") - take
-                inv.save(update_fields=["stock_quantity"])
-                remaining -= take
-                if remaining == 0:
-                    break
+            plan = allocate(product.pk, vendor.pk, quantity)
 
             # ------------------------------------------------------------------
             # 3) Create the order
@@ -147,6 +167,7 @@ def add_order(request):
             order = Order.objects.create(
                 user=request.user, product=product, vendor=vendor, quantity=quantity
             )
+            record_allocation(order, plan)
 
             messages.success(
                 request,
@@ -155,6 +176,10 @@ def add_order(request):
             )
             return redirect("order_list")
 
+        except DatabaseError:
+            # the transaction is unusable after a database error – let
+            # atomic roll it back rather than render inside it
+            raise
         except Exception as e:
             messages.error(
                 request,
@@ -171,91 +196,183 @@ def add_order(request):
 
 
 @login_required
-def load_vendors(request):
-    """AJAX view to load vendors based on selected product
-    – sums stock when the same vendor appears more than once."""
-    product_id = request.GET.get("product_id")
-    if not product_id:
-        return JsonResponse({"vendors": []})
-
-    qs = (
-        Inventory.objects.filter(product_id=product_id)
-        .values("vendor")
-        .annotate(total_stock=Sum("stock_quantity"))
-        .filter(total_stock__gt=0)
-    )
+def add_order_batch(request):
+    """Multi-line order: every line placed in one transaction (see
+    ``order_batch_module.place_order_batch``)."""
+    if request.method == "POST":
+        lines, errors = parse_lines(request.POST)
+        if not lines and not errors:
+            errors = ["Add at least one line."]
+        for error in errors:
+            messages.error(request, error, extra_tags="auto-dismiss page-specific")
+        if errors:
+            return redirect("add_order_batch")
 
-    vendors = [
-        {
-            "id": row["vendor"],
-            "vendor_id": Vendor.objects.get(pk=row["vendor"]).vendor_id,
-            "name": Vendor.objects.get(pk=row["vendor"]).name,
-            "stock": row["total_stock"],
-        }
-        for row in qs
-    ]
-    return JsonResponse({"vendors": vendors})
+        try:
+            batch = place_order_batch(request.user, lines)
+        except LinesShort as exc:
+            for (product_id, vendor_id), (available, requested) in exc.shortages.items():
+                messages.error(
+                    request,
+                    f"Insufficient stock for Product {product_id} / Vendor {vendor_id}. "
+                    f"Available: {available}, Requested: {requested}",
+                    extra_tags="auto-dismiss page-specific",
+                )
+            return redirect("add_order_batch")
+        except InsufficientStock as exc:
+            messages.error(
+                request, f"Insufficient stock. {exc}", extra_tags="auto-dismiss page-specific"
+            )
+            return redirect("add_order_batch")
+
+        messages.success(
+            request,
+            f"Order batch # {batch.id} with {len(lines)} line(s) created successfully!",
+            extra_tags="auto-dismiss page-specific",
+        )
+        return redirect("order_list")
+
+    return render(request, "app/order/add_order_batch.html", {"products": Product.objects.all()})
+
+
+# ids / pairs one availability request may ask for
+MAX_AVAILABILITY_KEYS = 200
+# stock moves bump Inventory; vendor renames bump Vendor
+AVAILABILITY_MODELS = (Inventory, Vendor)
+
+
+def _listed(request, name):
+    """All values of a repeatable, comma separated query parameter."""
+    return [value for raw in request.GET.getlist(name) for value in raw.split(",") if value]
+
+
+def _availability_params(request):
+    """``?product=1&product=2`` and ``?pair=<product>:<vendor>`` (either may
+    also be comma separated) → (product ids, pairs). Raises ``ValueError``."""
+    try:
+        products = sorted({int(value) for value in _listed(request, "product")})
+    except ValueError:
+        raise ValueError("product: expected whole numbers") from None
+    try:
+        pairs = sorted(
+            {(int(p), int(v)) for p, v in (value.split(":") for value in _listed(request, "pair"))}
+        )
+    except ValueError:
+        raise ValueError("pair: expected <product>:<vendor>") from None
+    if len(products) + len(pairs) > MAX_AVAILABILITY_KEYS:
+        raise ValueError(f"at most {MAX_AVAILABILITY_KEYS} products and pairs per request")
+    return products, pairs
+
+
+def _availability_etag(request):
+    try:
+        params = _availability_params(request)
+    except ValueError:
+        return None
+    return fingerprint(AVAILABILITY_MODELS, params)
+
+
+def _availability_last_modified(request):
+    return last_changed(AVAILABILITY_MODELS)
 
 
 @login_required
-def get_stock_quantity(request):
-    """AJAX view to get summed stock quantity for selected product-vendor."""
-    product_id = request.GET.get("product_id")
-    vendor_id = request.GET.get("vendor_id")
-
-    if not (product_id and vendor_id):
-        return JsonResponse({"stock_quantity": 0})
-
-    total = (
-        Inventory.objects.filter(product_id=product_id, vendor_id=vendor_id).aggregate(
-            total=Sum("stock_quantity")
-        )["total"]
-        or 0
+@condition(etag_func=_availability_etag, last_modified_func=_availability_last_modified)
+def stock_availability(request):
+    """Vendors and stock for many products and/or (product, vendor) pairs
+    in one round trip:
+
+        {"products": {"<product id>": [{"id", "vendor_id", "name", "stock"}, …]}}
+    """
+    try:
+        products, pairs = _availability_params(request)
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    found = availability(products, pairs)
+    return revalidate(
+        JsonResponse({"products": {str(pid): rows for pid, rows in found.items()}})
     )
-    return JsonResponse({"stock_quantity": total})
+
+
+def _stock_map_etag(request):
+    version, _ = stock_map_blob()
+    return version
 
 
 @login_required
-@transaction.atomic
+@condition(etag_func=_stock_map_etag)
+def stock_map(request):
+    """The whole product → vendor → stock map for the order forms, as one
+    pre-compressed JSON blob (see ``stock_module.stock_map``). Its version
+    hash is the ETag, so an unchanged map costs the form a 304."""
+    version, body = stock_map_blob()
+    if "gzip" in request.headers.get("Accept-Encoding", ""):
+        response = HttpResponse(body, content_type="application/json")
+        response["Content-Encoding"] = "gzip"
+    else:
+        response = HttpResponse(gzip.decompress(body), content_type="application/json")
+    response["X-Stock-Map-Version"] = version
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return revalidate(response)
+
+
+@login_required
+@logged_atomic()
 def edit_order(request, pk):
     order = get_object_or_404(Order, pk=pk)
     original_qty = order.quantity
 
-    # statuses to hide if order is already approved
-    DISALLOWED_AFTER_APPROVAL = {"ORDER_RAISED", "ORDER_REJECTED"}
-
-    if order.approval_status == "APPROVED":
-        allowed_status = [(k, v) for k, v in Order.STATUS_CHOICES
-                          if k not in DISALLOWED_AFTER_APPROVAL]
-    else:
-        allowed_status = []   # template will not render the dropdown
+    # current status + the moves the transition table allows (empty until approved)
+    allowed_status = status_choices(order)
 
     if request.method == "POST":
         # ---------- 1) “Request Approval” button ----------
         if "request_approval" in request.POST:
-            order.approval_status = "PENDING"
-            order.save(update_fields=["approval_status"])
-            messages.success(
-                request,
-                f"Approval re-requested for Order #{order.id}.",
-                extra_tags="auto-dismiss page-specific",
-            )
+            try:
+                changed = set_approval(order, "PENDING", request.user)
+            except InvalidTransition as exc:
+                messages.error(request, str(exc), extra_tags="auto-dismiss page-specific")
+            else:
+                if changed:
+                    messages.success(
+                        request,
+                        f"Approval re-requested for Order #{order.id}.",
+                        extra_tags="auto-dismiss page-specific",
+                    )
+                else:
+                    messages.info(
+                        request,
+                        f"Order #{order.id} is already pending approval.",
+                        extra_tags="auto-dismiss page-specific",
+                    )
             return redirect("edit_order", pk=pk)
 
         # ---------- 2) normal save ----------
         product_id = int(request.POST["product"])
         vendor_id  = int(request.POST["vendor"])
         new_qty    = int(request.POST["qty"])
+        # only when dropdown was shown
+        new_status = request.POST["status"] if allowed_status else order.status
+        try:
+            check_status(order, new_status)
+        except InvalidTransition as exc:
+            messages.error(request, str(exc), extra_tags="auto-dismiss page-specific")
+            return redirect("edit_order", pk=pk)
 
         product = get_object_or_404(Product, pk=product_id)
         vendor  = get_object_or_404(Vendor, pk=vendor_id)
 
         # editable stock = physical stock + what this order already holds
-        current_stock = (
-            Inventory.objects.filter(product=product, vendor=vendor)
-            .aggregate(total=Sum("stock_quantity"))["total"] or 0
+        # (only when it stays on the same pair); both balances stay locked
+        old_pair = (order.product_id, order.vendor_id)
+        new_pair = (product.pk, vendor.pk)
+        balances = lock_balances(
+            [new_pair, old_pair] if order.vendor_id is not None else [new_pair]
         )
-        available = current_stock + original_qty
+        available = balances[new_pair]
+        if new_pair == old_pair:
+            available += original_qty
 
         if new_qty > available:
             messages.error(
@@ -265,37 +382,26 @@ def edit_order(request, pk):
             )
             return redirect("edit_order", pk=pk)
 
-        # restore old qty to inventory (FIFO reverse)
-        restore = original_qty
-        for inv in Inventory.objects.filter(
-            product=order.product, vendor=order.vendor
-        ).order_by("id"):
-            give = min(restore, inv.stock_quantity + restore)
-            inv.stock_quantity = F("stock_quantity") + give
-            inv.save(update_fields=["stock_quantity"])
-            restore -= give
-            if restore == 0:
-                break
-
-        # deduct new qty from inventory (FIFO forward)
-        deduct = new_qty
-        for inv in Inventory.objects.filter(
-            product=product, vendor=vendor, stock_quantity__gt=0
-        ).order_by("id"):
-            take = min(deduct, inv.stock_quantity)
-            inv.stock_quantity = F("stock_quantity") - take
-            inv.save(update_fields=["stock_quantity"])
-            deduct -= take
-            if deduct == 0:
-                break
+        # put the old qty back on the lots it came from, then deduct new qty (FIFO)
+        restore_order(order)
+        try:
+            plan = allocate(product.pk, vendor.pk, new_qty)
+        except InsufficientStock as exc:
+            transaction.set_rollback(True)
+            messages.error(
+                request,
+                f"Insufficient stock. {exc}",
+                extra_tags="auto-dismiss page-specific",
+            )
+            return redirect("edit_order", pk=pk)
 
         # update order
         order.product_id = product_id
         order.vendor_id  = vendor_id
         order.quantity   = new_qty
-        if allowed_status:  # only when dropdown was shown
-            order.status = request.POST["status"]
+        set_status(order, new_status, request.user)
         order.save()
+        record_allocation(order, plan)
 
         messages.success(
             request,
@@ -341,20 +447,8 @@ def delete_order(request, pk):
     order = get_object_or_404(Order, pk=pk)
 
     if request.method == "POST":
-        # 1. Restore stock (FIFO)
-        remaining = order.quantity
-        inventories = (
-            Inventory.objects
-            .filter(product=order.product, vendor=order.vendor)
-            .order_by("id")
-        )
-        for inv in inventories:
-            add = min(remaining, inv.stock_quantity + remaining)
-            inv.stock_quantity = F("stock_quantity") + add
-            inv.save(update_fields=["stock_quantity"])
-            remaining -= add
-            if remaining == 0:
-                break
+        # 1. Restore stock to the lots the order was filled from
+        restore_order(order)
 
         # 2. Delete the order
         order.delete()
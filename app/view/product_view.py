@@ -2,13 +2,14 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import get_object_or_404, redirect, render
 
-from app.models import Category, Product
+from app.models import Category, Order, Product
+from app.modules import snapshot_module
 
 
 
 @login_required
 def product_list(request):
-    products = Product.objects.all().order_by("name")
+    products = Product.objects.select_related("category").order_by("name")
     return render(request, "app/product/product_list.html", {"products": products})
 
 
@@ -66,7 +67,12 @@ def edit_product(request, pk):
 def delete_product(request, pk):
     product = get_object_or_404(Product, pk=pk)
     if request.method == "POST":
-        product.delete()
+        # the orders, lots and POs cascade – apply their deltas in one go
+        with snapshot_module.batched_deltas(
+            products=Product.objects.filter(pk=product.pk),
+            orders=Order.objects.filter(product=product),
+        ):
+            product.delete()
         messages.success(
             request,
             f"Product - {product.name} deleted successfully!",
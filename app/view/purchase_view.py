@@ -1,105 +1,120 @@
-from decimal import Decimal, InvalidOperation
-
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db.models import DecimalField, ExpressionWrapper, F, Q, Sum
 from django.shortcuts import get_object_or_404, redirect, render
-from django.utils.dateparse import parse_date
 
 from app.models import Product, PurchaseOrder, Vendor
+from app.modules.cache_module import cached
+from app.modules.export_module import (
+    choice_label,
+    column,
+    local_datetime,
+    money,
+    stream_csv,
+)
+from app.modules.filter_module import (
+    ChoiceFilter,
+    DateFilter,
+    DecimalFilter,
+    FilterSpec,
+    IntFilter,
+    SearchFilter,
+    choice_values,
+    invalid_filters,
+    report_errors,
+)
+from app.modules.pagination_module import keyset_paginate, line_total
+from app.modules.transition_module import (
+    InvalidTransition,
+    check_status,
+    logged_atomic,
+    set_approval,
+    set_status,
+    status_choices,
+)
+from app.modules.summary_module import status_keys, summarize
+
+# ?sort= names → sortable columns of the purchase order list
+PURCHASE_SORT_FIELDS = {
+    "id": "id",
+    "quantity": "quantity",
+    "total_price": "total_price",
+    "date": "created_at",
+}
+
+PURCHASE_FILTERS = FilterSpec(
+    IntFilter("po_id", "id"),
+    SearchFilter("product", "product_id", kind="product"),
+    SearchFilter("vendor", "vendor_id", kind="vendor"),
+    IntFilter("quantity", "quantity"),
+    DecimalFilter("total_price", "total_price"),
+    DateFilter("created_date", "created_at"),
+    ChoiceFilter("status", "status", choices=choice_values(PurchaseOrder.STATUS_CHOICES)),
+)
+
+
+PURCHASE_EXPORT_COLUMNS = [
+    column("PO ID", "id"),
+    column("Created", "created_at", local_datetime),
+    column("Product ID", "product__product_id"),
+    column("Product", "product__name"),
+    column("Vendor ID", "vendor__vendor_id"),
+    column("Vendor", "vendor__name"),
+    column("Quantity", "quantity"),
+    column("Unit Price", "product__price", money),
+    column("Total Price", "total_price", money),
+    column("Status", "status", choice_label(PurchaseOrder.STATUS_CHOICES)),
+    column("Approval", "approval_status", choice_label(PurchaseOrder.APPROVAL_CHOICES)),
+    column("Updated", "updated_at", local_datetime),
+]
+
+
+def _filtered_purchases(filters):
+    return PurchaseOrder.objects.annotate(total_price=line_total("quantity")).filter(filters.q)
 
 
 @login_required
 def purchase_list(request):
-    query = Q()
-
-    # --- filters -------------------------------------------------------------
-    po_id = request.GET.get("po_id")
-    if po_id:
-        query &= Q(id=po_id)
-
-    product_q = request.GET.get("product")
-    if product_q:
-        query &= Q(product__name__icontains=product_q) | Q(
-            product__product_id__icontains=product_q
-        )
-
-    vendor_q = request.GET.get("vendor")
-    if vendor_q:
-        query &= Q(vendor__name__icontains=vendor_q) | Q(
-            vendor__vendor_id__icontains=vendor_q
-        )
-
-    quantity = request.GET.get("quantity")
-    if quantity:
-        try:
-            query &= Q(quantity=int(quantity))
-        except ValueError:
-            pass
-
-    total_price = request.GET.get("total_price")
-    if total_price:
-        try:
-            query &= Q(total_price=Decimal(total_price))
-        except InvalidOperation:
-            pass
-
-    created_date = request.GET.get("created_date")
-    if created_date:
-        parsed = parse_date(created_date)
-        if parsed:
-            query &= Q(created_at__date=parsed)
-
-    status = request.GET.get("status")
-    if status:
-        query &= Q(status=status)
-    # ------------------------------------------------------------------------
-
+    filters = PURCHASE_FILTERS.parse(request.GET)
+    report_errors(request, filters)
     orders = (
-        PurchaseOrder.objects.select_related("product", "vendor")
-        .annotate(
-            total_price=ExpressionWrapper(
-                F("quantity") * F("product__price"),
-                output_field=DecimalField(max_digits=12, decimal_places=2),
-            )
-        )
-        .filter(query)
-        .order_by("-id")
+        _filtered_purchases(filters).select_related("product", "vendor").order_by("-id")
     )
 
-    # status counts
-    status_totals = dict(
-        orders.values("status")
-        .annotate(total=Sum("quantity"))
-        .values_list("status", "total")
-    )
-    STATUS_KEYS = [
-        "PO_RAISED",
-        "PO_APPROVED",
-        "PO_REJECTED",
-        "PO_SHIPPED",
-        "PO_DELIVERED",
-        "INWARD_REQUESTED",
-    ]
-    summary = {k: status_totals.get(k, 0) for k in STATUS_KEYS}
-
-
-    grand_total = orders.aggregate(
-        total_quantity=Sum("quantity"),
-        grand_total_price=Sum("total_price"),
+    summary = cached(
+        "purchase_list",
+        (PurchaseOrder, Product, Vendor),
+        lambda: summarize(
+            orders,
+            totals={"total_quantity": "quantity", "grand_total_price": "total_price"},
+            statuses=status_keys(PurchaseOrder.STATUS_CHOICES),
+        ),
+        params=filters.cache_params,
     )
+    page = keyset_paginate(request, orders, sort_fields=PURCHASE_SORT_FIELDS)
 
     return render(
         request,
         "app/purchase/purchase_list.html",
         {
-            "orders": orders,
-            "summary": summary,
-            "grand_total": grand_total,
+            "orders": page.object_list,
+            "page": page,
+            "status_choices": PurchaseOrder.STATUS_CHOICES,
+            "summary": summary.by_status,
+            "grand_total": summary.totals,
         },
     )
 
 
+@login_required
+def export_purchases(request):
+    filters = PURCHASE_FILTERS.parse(request.GET)
+    if filters.errors:
+        return invalid_filters(filters)
+    return stream_csv(
+        _filtered_purchases(filters).order_by("id"), PURCHASE_EXPORT_COLUMNS, "purchase-orders"
+    )
+
+
 @login_required
 def add_purchase(request):
     if request.method == "POST":
@@ -125,35 +140,38 @@ def add_purchase(request):
 
 
 @login_required
+@logged_atomic()
 def edit_purchase(request, pk):
     order = get_object_or_404(PurchaseOrder, pk=pk)
 
-    # ---- Statuses that are **never** selectable after approval
-    DISALLOWED_AFTER_APPROVAL = {"PO_RAISED", "PO_REJECTED"}
-
-    # ---- Build the list that will reach the template
-    if order.approval_status == "APPROVED":
-        allowed_choices = [
-            (k, v)
-            for k, v in PurchaseOrder.STATUS_CHOICES
-            if k not in DISALLOWED_AFTER_APPROVAL
-        ]
-    else:
-        allowed_choices = []  # empty ⇒ drop-down not rendered
+    # ---- Current status + the moves the transition table allows
+    allowed_choices = status_choices(order)  # empty ⇒ drop-down not rendered
 
     if request.method == "POST":
         if "request_approval" in request.POST:
-            order.approval_status = "PENDING"
-            order.save(update_fields=["approval_status"])
-            messages.success(request, f"Approval requested for PO #{order.id}.")
+            try:
+                changed = set_approval(order, "PENDING", request.user)
+            except InvalidTransition as exc:
+                messages.error(request, str(exc))
+            else:
+                if changed:
+                    messages.success(request, f"Approval requested for PO #{order.id}.")
+                else:
+                    messages.info(request, f"PO #{order.id} is already pending approval.")
+            return redirect("edit_purchase", pk=pk)
+
+        # Only save status if the widget was shown
+        new_status = request.POST["status"] if allowed_choices else order.status
+        try:
+            check_status(order, new_status)
+        except InvalidTransition as exc:
+            messages.error(request, str(exc), extra_tags="auto-dismiss page-specific")
             return redirect("edit_purchase", pk=pk)
 
         order.product_id = request.POST["product"]
         order.vendor_id = request.POST["vendor"]
         order.quantity = request.POST["qty"]
-        # Only save status if the widget was shown
-        if allowed_choices:  # same condition as in template
-            order.status = request.POST["status"]
+        set_status(order, new_status, request.user)
         order.save()
         messages.success(
             request,
@@ -6,6 +6,8 @@ from django.contrib.auth.models import User
 from django.shortcuts import get_object_or_404, redirect, render
 
 from app.forms import CustomUserCreationForm, UserEditForm
+from app.models import Order
+from app.modules import snapshot_module
 
 
 @login_required
@@ -45,7 +47,9 @@ def user_edit(request, pk):
 def user_delete(request, pk):
     user = get_object_or_404(User, pk=pk)
     if request.method == "POST":
-        user.delete()
+        # the user's orders cascade
+        with snapshot_module.batched_deltas(orders=Order.objects.filter(user=user)):
+            user.delete()
         messages.success(request, "User deleted.")
         return redirect("user_list")
     return render(request, "app/user/user_confirm_delete.html", {"user": user})
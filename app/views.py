@@ -1,81 +1,33 @@
+from asgiref.sync import sync_to_async
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db.models import F, Sum
 from django.shortcuts import redirect, render
 
-from app.modules.chart_module import chart_js_script
+from app.modules.cache_module import cached
+from app.modules.dashboard_module import compute_dashboard_metrics_async
+from app.modules.snapshot_module import snapshot_metrics
 
 from .forms import CustomUserCreationForm, UserUpdateForm
-from .models import Category, Inventory, Order, Product, PurchaseOrder, UserProfile
+from .models import Inventory, Order, Product, PurchaseOrder, UserProfile
+
+DASHBOARD_MODELS = (Order, Inventory, PurchaseOrder, Product)
 
 
 @login_required
 def dashboard(request):
-    products_count = Product.objects.count()
-
-    inventory_summary = list(
-        Inventory.objects.values("product__name").annotate(total=Sum("stock_quantity")).order_by("-total")[:3]
-    )
-
-    products = Product.objects.all()
-    categories = Category.objects.all()
-    inventory = Inventory.objects.all()
+    metrics = cached("dashboard", DASHBOARD_MODELS, snapshot_metrics)
+    return render(request, "app/base/dashboard.html", metrics.as_context())
 
-    order_summary = (
-        Order.objects.values("product__name")
-        .annotate(total=Sum("quantity"))
-        .order_by("-total")[:3]
-    )
-    orders_count = Order.objects.count()
-
-    total_stock = Inventory.objects.aggregate(t=Sum("stock_quantity"))["t"] or 0
-    total_orders = Order.objects.aggregate(total=Sum("quantity"))["total"] or 0
-    total_po_orders = PurchaseOrder.objects.aggregate(total=Sum("quantity"))["total"] or 0
-
-    # NEW / UPDATED AGGREGATES
-    total_inward_qty = (
-        Inventory.objects.aggregate(total=Sum("inward_qty"))["total"] or 0
-    )
 
-    total_order_price = (
-        Order.objects.aggregate(total=Sum(F("quantity") * F("product__price")))["total"]
-        or 0
-    )
-
-    total_po_order_price = (
-        PurchaseOrder.objects.aggregate(total=Sum(F("quantity") * F("product__price")))["total"]
-        or 0
-    )
-
-    total_stock_price = (
-        Inventory.objects.aggregate(
-            total=Sum(F("stock_quantity") * F("product__price"))
-        )["total"]
-        or 0
+@login_required
+async def dashboard_async(request):
+    """Live dashboard for ASGI deployments – aggregates run concurrently
+    instead of being read from the snapshot."""
+    metrics = await compute_dashboard_metrics_async()
+    return await sync_to_async(render)(
+        request, "app/base/dashboard.html", metrics.as_context()
     )
 
-    context = {
-        "products_count": products_count,
-        "orders_count": orders_count,
-        "inventory_summary": inventory_summary,
-        "order_summary": order_summary,
-        "products": products,
-        "categories": categories,
-        "inventory": inventory,
-        "total_po_orders":total_po_orders,
-        "total_stock": total_stock,
-        "total_orders": total_orders,
-        "total_inward_qty": total_inward_qty,
-        "total_po_order_price":total_po_order_price,
-        "total_order_price": total_order_price,
-        "total_stock_price": total_stock_price,
-        "stock_script": chart_js_script("stockChart", inventory_summary, dataset_label="Stock"),
-        "order_script": chart_js_script("orderChart", order_summary,  dataset_label="Orders"),
-    }
-    
-
-    return render(request, "app/base/dashboard.html", context)
-
 
 def register(request):
     if request.method == "POST":
@@ -50,6 +50,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "app.middleware.QueryBudgetMiddleware",
 ]
 
 ROOT_URLCONF = "kmdv_crm.urls"
@@ -64,6 +65,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "app.context_processors.nav_badges",
             ],
         },
     },
@@ -79,6 +81,11 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # SQLite ignores SELECT ... FOR UPDATE: start write transactions with
+        # BEGIN IMMEDIATE so a second writer queues on the database lock (for
+        # up to ``timeout`` seconds) instead of failing with SQLITE_BUSY
+        # part-way through an order
+        "OPTIONS": {"transaction_mode": "IMMEDIATE", "timeout": 20},
     }
 }
 
@@ -94,6 +101,42 @@ DATABASES = {
 #     }
 # }
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Aggregates are keyed by per-model version counters, so any backend works;
+# for multiple worker processes on one host switch to the file based cache:
+# CACHES = {
+#     "default": {
+#         "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+#         "LOCATION": BASE_DIR / "cache",
+#     }
+# }
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "kmdv-crm",
+    }
+}
+
+# Seconds a cached dashboard/list aggregate is served without a version bump
+KMDV_AGGREGATE_CACHE_TIMEOUT = 300
+
+# Rows per page on the order / inventory / purchase lists (?page_size= overrides)
+KMDV_LIST_PAGE_SIZE = 50
+
+# Products with less orderable stock than this count towards the low-stock badge
+KMDV_LOW_STOCK_THRESHOLD = 10
+
+# Thread pool size for the concurrent aggregates of the async dashboard
+KMDV_DASHBOARD_WORKERS = 4
+
+# Query budgets (app.middleware.QueryBudgetMiddleware)
+# Per-URL-name overrides of app.middleware.QUERY_BUDGETS, e.g. {"dashboard": 10}
+KMDV_QUERY_BUDGETS = {}
+# Raise instead of logging when a request is over budget or repeats a query
+KMDV_QUERY_BUDGET_RAISE = False
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 